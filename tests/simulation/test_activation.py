@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from traffic_model.simulation.activation import AMBER, DETECTED, GREEN, OFF, ActivationLog, format_time, \
+    is_compiled
+
+
+def write_log(directory: str, rows: list) -> str:
+    path = os.path.join(directory, 'TEST.csv')
+    with open(path, 'w') as log_file:
+        log_file.write('time;01;011\n')
+        for row in rows:
+            log_file.write(';'.join(row) + '\n')
+    return path
+
+
+class TestActivationLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = write_log(self.directory.name, [
+            ['02-11-2020 08:00:00.0', '#', ''],
+            ['02-11-2020 08:00:00.1', 'Z', '|'],
+            ['02-11-2020 08:00:00.2', '', '|'],
+        ])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_ingest_states(self):
+        # Tests if the characters are turned into the right state codes.
+        log = ActivationLog.open(self.path)
+        self.assertEqual(log.columns, ['01', '011'])
+        self.assertEqual(log.column('01').tolist(), [GREEN, AMBER, OFF])
+        self.assertEqual(log.column('011').tolist(), [OFF, DETECTED, DETECTED])
+
+    def test_read_time(self):
+        # Tests if the timestamps are formatted like the raw log.
+        log = ActivationLog.open(self.path)
+        self.assertEqual(log.read(0, 'time'), '02-11-2020 08:00:00.0')
+        self.assertEqual(log.read(2, 'time'), '02-11-2020 08:00:00.2')
+        self.assertEqual(format_time(log.time[1]), '02-11-2020 08:00:00.1')
+
+    def test_window(self):
+        # Tests if a window only holds its rows, plus the amber phase that is still running at the end.
+        log = ActivationLog.open_window(self.path, 0, 1, padding=0)
+        self.assertEqual(log.offset, 0)
+        self.assertEqual(len(log), 2)
+        log = ActivationLog.open_window(self.path, 2, 3, padding=0)
+        self.assertEqual(log.offset, 2)
+        self.assertEqual(len(log), 1)
+        self.assertEqual(log.read(2, '011'), DETECTED)
+        self.assertEqual(log.read(2, 'time'), '02-11-2020 08:00:00.2')
+        with self.assertRaisesRegex(ValueError, 'row 3.* 3 rows'):
+            ActivationLog.open_window(self.path, 3, 4)
+
+    def test_read_only(self):
+        # Tests if the shared mapping can not be written to.
+        log = ActivationLog.open(self.path)
+        with self.assertRaises(ValueError):
+            log.column('01')[0] = OFF
+
+    def test_outdated(self):
+        # Tests if a changed raw log is compiled again.
+        ActivationLog.open(self.path)
+        self.assertTrue(is_compiled(self.path))
+        os.utime(self.path, (os.path.getmtime(self.path) + 10,) * 2)
+        self.assertFalse(is_compiled(self.path))
+
+    def test_failed_ingest(self):
+        # Tests if a log that can not be compiled leaves the compiled log before it and no temporary files.
+        ActivationLog.open(self.path)
+        write_log(self.directory.name, [['not a time', '#', '']])
+        os.utime(self.path, (os.path.getmtime(self.path) + 10,) * 2)
+        with self.assertRaises(ValueError):
+            ActivationLog.open(self.path)
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         ['TEST.columns.json', 'TEST.csv', 'TEST.states.npy', 'TEST.time.npy'])
+        self.assertEqual(np.load(os.path.join(self.directory.name, 'TEST.states.npy')).shape, (3, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 from traffic_model.simulation import agents
 from traffic_model.simulation.agents import Car, Node, Light, Sensor
 from traffic_model.simulation.model import Traffic
+from traffic_model.simulation.routes import Route
 import math
 
 class TestAgents(unittest.TestCase):
@@ -19,7 +20,9 @@ class TestAgents(unittest.TestCase):
         test_light = Light(0, Traffic(), (1, 1), False, "Light")
         test_node1 = Node(0, Traffic(), (1, 1), False, False, 5, test_light)
         test_node2 = Node(0, Traffic(), (2, 2), False, False, 5, test_light)
-        test_car = Car(0, Traffic(), (1, 1), [test_node1, test_node2], 1, test_node1, test_node2, test_node2)
+        test_route = Route('Loop', 5, {'in': {'nodes': [test_node1, test_node2]}, 'conn': {'nodes': []},
+                                       'out': {'nodes': [test_node2]}})
+        test_car = Car(0, Traffic(), test_route)
         self.assertNotEqual(test_car.current_node, test_car.end_node,
                             "Endnode == Current node, Fails because it cant move.")
 
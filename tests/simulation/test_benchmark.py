@@ -0,0 +1,84 @@
+import copy
+import tracemalloc
+import unittest
+
+from traffic_model.simulation.activation import DETECTED
+from traffic_model.simulation.benchmark import add_rush_hour, benchmark, benchmark_corridor, compare, memory_source, \
+    peak_memory_mb, run_window
+from traffic_model.simulation.model import Traffic
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_window(self):
+        # Tests if a window is measured and a rush hour has more cars than the same window without it.
+        morning = run_window('morning', 'agent', 600)
+        rush_hour = run_window('rush_hour', 'agent', 600)
+        self.assertEqual(morning['steps'], 600)
+        self.assertGreater(morning['steps_per_second'], 0)
+        self.assertGreater(morning['peak_rss_mb'], 0)
+        self.assertGreater(rush_hour['car_steps'], morning['car_steps'])
+
+    def test_peak_memory(self):
+        # Tests if the peak memory is measured without the resource module too, with tracemalloc as the last resort.
+        self.assertIn(memory_source(), ('resource', 'psutil', 'tracemalloc'))
+        self.assertGreater(peak_memory_mb(memory_source()), 0)
+        tracemalloc.start()
+        try:
+            data = bytearray(4 * 1024 * 1024)
+            self.assertGreaterEqual(peak_memory_mb('tracemalloc'), 4)
+            del data
+        finally:
+            tracemalloc.stop()
+        slower = {'results': {'morning/vector': {'steps_per_second': 1, 'construction_seconds': 0, 'steps': 1,
+                                                 'peak_rss_mb': 100, 'memory_source': 'tracemalloc'}}}
+        base = {'results': {'morning/vector': {'steps_per_second': 1, 'construction_seconds': 0, 'steps': 2,
+                                               'peak_rss_mb': 10, 'memory_source': 'resource'}}}
+        self.assertEqual(compare(slower, base), [])
+
+    def test_rush_hour(self):
+        # Tests if every spawn loop detects a car every headway steps.
+        test_instance = Traffic(width=750, height=750, max_steps=400, start=252000)
+        add_rush_hour(test_instance, 40)
+        for loop, edges in test_instance.spawn_edges.items():
+            edges = edges[edges < test_instance.end_step]
+            self.assertEqual(len(edges), 10)
+            self.assertTrue(((edges[1:] - edges[:-1]) == 40).all())
+            self.assertEqual(test_instance.data.read(int(edges[0]), loop), DETECTED)
+
+    def test_compare(self):
+        # Tests if slower runs, more memory and changed results are regressions, and windows out of the log skipped.
+        results = benchmark(['morning', 'evening'], ['vector'], 300, 1, out=lambda line: None)
+        self.assertEqual(results['skipped'], ['evening'])
+        self.assertEqual(list(results['results']), ['morning/vector'])
+        self.assertEqual(compare(results, results), [])
+        slower = copy.deepcopy(results)
+        slower['results']['morning/vector']['steps_per_second'] /= 2
+        slower['results']['morning/vector']['peak_rss_mb'] *= 2
+        slower['results']['morning/vector']['finished_cars'] += 1
+        self.assertEqual(len(compare(slower, results)), 3)
+        self.assertEqual(compare(results, slower), ['morning/vector: finished_cars is '
+                                                    f'{results["results"]["morning/vector"]["finished_cars"]}, '
+                                                    f'in the baseline '
+                                                    f'{slower["results"]["morning/vector"]["finished_cars"]}'])
+
+    def test_speedups(self):
+        # Tests if the vector engine is compared with the agents per window, over the run and the schedule.
+        results = benchmark(['recorded', 'rush_hour'], ['agent', 'vector'], 300, 1, out=lambda line: None)
+        self.assertEqual(list(results['speedups']), ['recorded', 'rush_hour'])
+        for speedup in results['speedups'].values():
+            self.assertGreater(speedup['run'], 0)
+            self.assertGreater(speedup['schedule'], 0)
+        run = results['results']['rush_hour/vector']
+        self.assertLess(run['schedule_seconds'], run['run_seconds'])
+
+    def test_corridor(self):
+        # Tests if the corridor is timed in one process and sharded, with the same results and fewer exchanges.
+        results = benchmark_corridor(['agent'], 600, 1, out=lambda line: None)
+        run = results['results']['agent']
+        self.assertTrue(run['same_results'])
+        self.assertGreater(run['speedup'], 0)
+        self.assertLess(run['exchanges'], 600 / 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
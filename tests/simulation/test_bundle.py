@@ -0,0 +1,41 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from traffic_model.simulation.bundle import bundle_path, load_bundle, source_paths
+from traffic_model.simulation.intersection import data_path
+
+
+class TestBundle(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        for path in source_paths('BOS210', data_path):
+            shutil.copy(path, self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_arrays(self):
+        # Tests if the lanes, nodes and sensors are flattened with the right offsets.
+        bundle = load_bundle('BOS210', self.directory)
+        offsets = bundle['lane_node_offsets']
+        self.assertEqual(len(offsets), len(bundle['lane_ids']) + 1)
+        self.assertEqual(offsets[-1], len(bundle['node_xy']))
+        self.assertEqual(bundle['sensor_xy'].shape, (len(bundle['sensor_names']), 2, 2))
+        self.assertTrue(bundle_path('BOS210', self.directory).exists())
+        self.assertEqual(list(self.directory.glob('*.tmp')), [])
+
+    def test_recompiled_when_changed(self):
+        # Tests if a bundle is compiled again when the json it was made from changes.
+        sgr_path = source_paths('BOS210', self.directory)[2]
+        sgr_path.write_text('{"01": {"02": "3"}}')
+        self.assertEqual(load_bundle('BOS210', self.directory)['signal_groups'].tolist(), ['01', '02'])
+        sgr_path.write_text('{"01": {"05": "4"}}')
+        bundle = load_bundle('BOS210', self.directory)
+        self.assertEqual(bundle['signal_groups'].tolist(), ['01', '05'])
+        self.assertEqual(bundle['clearance'][0, 1], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from mesa.batchrunner import BatchRunner
+
+from traffic_model.simulation.collector import ColumnCollector
+from traffic_model.simulation.model import Traffic
+
+
+class TestColumnCollector(unittest.TestCase):
+    def test_interval(self):
+        # Tests if a row is collected every interval, also when steps are offered at once.
+        class Counter:
+            step_count = 0
+            value = 0.0
+
+        counter = Counter()
+        collector = ColumnCollector({'value': 'value'}, 20, 4)
+        for step in range(1, 11):
+            counter.step_count, counter.value = step, step / 2
+            collector.collect(counter)
+        counter.step_count, counter.value = 16, 8.0
+        collector.collect(counter, 6)
+        self.assertEqual(collector.columns()['step'].tolist(), [1, 5, 9, 13])
+        self.assertEqual(collector.columns()['value'].tolist(), [0.5, 2.5, 4.5, 8.0])
+        self.assertEqual(len(collector.steps), 5)
+        with self.assertRaises(ValueError):
+            ColumnCollector({'value': 'value'}, 20, 0)
+
+    def test_decimated_run(self):
+        # Tests if a decimated run keeps every interval-th row of a full run, with or without fast forward.
+        runs = []
+        for interval, fast_forward in ((1, False), (10, False), (10, True)):
+            test_instance = Traffic(width=750, height=750, max_steps=3000, collect_interval=interval,
+                                    fast_forward=fast_forward)
+            while test_instance.running:
+                test_instance.step()
+            runs.append(test_instance.datacollector.columns())
+        self.assertEqual(len(runs[0]['step']), 3000)
+        for name, values in runs[0].items():
+            self.assertEqual(runs[1][name].tolist(), values[::10].tolist())
+            self.assertEqual(runs[2][name].tolist(), values[::10].tolist())
+
+    def test_to_npz(self):
+        # Tests if the npz file has the collected columns.
+        test_instance = Traffic(width=750, height=750, max_steps=600, collect_interval=10)
+        while test_instance.running:
+            test_instance.step()
+        with tempfile.TemporaryDirectory() as directory:
+            path = test_instance.datacollector.to_npz(Path(directory) / 'data.npz')
+            with np.load(path) as data:
+                self.assertEqual(sorted(data.files), ['avg_car_steps', 'avg_car_wait', 'step'])
+                self.assertEqual(len(data['step']), 60)
+                self.assertEqual(data['avg_car_wait'].tolist(),
+                                 test_instance.datacollector.columns()['avg_car_wait'].tolist())
+
+    def test_batch_runner(self):
+        # Tests if the Mesa BatchRunner gets the collected rows of every run, like from a Mesa DataCollector.
+        batch_run = BatchRunner(Traffic, variable_parameters={'light_01': [0, 20]},
+                                fixed_parameters={'width': 750, 'height': 750, 'max_steps': 600,
+                                                  'collect_interval': 10},
+                                max_steps=600,
+                                model_reporters={'avg_car_wait': lambda model: model.finished_car_wait_int},
+                                display_progress=False)
+        batch_run.run_all()
+        self.assertEqual(len(batch_run.get_model_vars_dataframe()), 2)
+        frames = batch_run.get_collector_model()
+        self.assertEqual(len(frames), 2)
+        for frame in frames.values():
+            self.assertEqual(list(frame.columns), ['avg_car_steps', 'avg_car_wait'])
+            self.assertEqual(frame.index.tolist(), list(range(252501, 253101, 10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
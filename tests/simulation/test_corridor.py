@@ -0,0 +1,163 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from datetime import datetime
+from pathlib import Path
+
+from traffic_model.simulation.corridor import BOS_LINKS, Corridor, Link, ShardedCorridor, main
+from traffic_model.simulation.intersection import load_intersection
+from traffic_model.simulation.model import Traffic
+from traffic_model.simulation.synthetic import generate_log
+
+
+class TestCorridor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # BOS211 has no recorded log, a synthetic one starts at the time of step 252500 of BOS210.
+        cls.directory = tempfile.TemporaryDirectory()
+        intersection = load_intersection('BOS211')
+        rates = {loop: 300 for loop in intersection.bundle['sensor_names'].tolist()}
+        cls.log = str(generate_log(Path(cls.directory.name) / 'BOS211.csv', intersection, 3000, rates,
+                                   start=datetime(2020, 11, 2, 8)))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def intersections(self) -> dict:
+        """
+        Gets the parameters of BOS210 and BOS211 that are their own.
+        :return: Per intersection name its parameters.
+        """
+        return {'BOS210': {}, 'BOS211': {'activation_path': self.log, 'start': 0}}
+
+    def run_corridor(self, **parameters) -> Corridor:
+        """
+        Runs BOS210 and BOS211 together.
+        :param parameters: The parameters of the corridor.
+        :return: The corridor after its run.
+        """
+        corridor = Corridor(self.intersections(), width=750, height=750, start=252500, max_steps=2000, **parameters)
+        while corridor.running:
+            corridor.step()
+        return corridor
+
+    def test_hand_off(self):
+        # Tests if the cars that leave over a link enter the next intersection instead of its spawn loop.
+        corridor = self.run_corridor()
+        bos211 = corridor.models['BOS211']
+        self.assertEqual(set(bos211.entry_routes), {'15', '14', '13'})
+        self.assertFalse({route.lane_id for loop, route in bos211.spawn_routes.items()
+                          if loop in bos211.active_loops} & set(bos211.entry_routes))
+        self.assertEqual(corridor.steps, 2000)
+        metrics = corridor.metrics()
+        self.assertGreater(metrics['corridor']['handed_off'], 0)
+        self.assertEqual(metrics['corridor']['finished_cars'],
+                         metrics['BOS210']['finished_cars'] + metrics['BOS211']['finished_cars'])
+        self.assertGreater(metrics['BOS211']['finished_cars'], 0)
+
+    def test_engines(self):
+        # Tests if both engines and fast forward give the same corridor.
+        metrics = self.run_corridor().metrics()
+        self.assertEqual(self.run_corridor(engine='vector').metrics(), metrics)
+        self.assertEqual(self.run_corridor(fast_forward=True).metrics(), metrics)
+
+    def test_one_intersection(self):
+        # Tests if a corridor without links is the same as the model on its own.
+        corridor = Corridor({'BOS210': {}}, links=(), width=750, height=750, start=252500, max_steps=1500,
+                            fast_forward=True)
+        while corridor.running:
+            corridor.step()
+        test_instance = Traffic(width=750, height=750, start=252500, max_steps=1500)
+        while test_instance.running:
+            test_instance.step()
+        steps, wait = corridor.finished_cars()
+        self.assertEqual(steps.count, test_instance.finished_cars.steps.count)
+        self.assertEqual(steps.mean(), test_instance.calc_finished_car_steps())
+        self.assertEqual(wait.mean(), test_instance.calc_finished_car_wait())
+
+    def test_sharded(self):
+        # Tests if the shards in their own processes give the same results as one process, for any link delay.
+        metrics = self.run_corridor().metrics()
+        sharded = ShardedCorridor(self.intersections(), width=750, height=750, start=252500, max_steps=2000)
+        self.assertEqual(sharded.window, 1)
+        self.assertEqual(sharded.run(), metrics)
+        # The cars need time to drive to a lane out, so the shards run many steps between two exchanges.
+        self.assertLess(sharded.exchanges, 2000 / 10)
+
+        links = tuple(link._replace(delay=25) for link in BOS_LINKS)
+        metrics = self.run_corridor(links=links).metrics()
+        sharded = ShardedCorridor(self.intersections(), links=links, fast_forward=True, width=750, height=750,
+                                  start=252500, max_steps=2000)
+        self.assertEqual(sharded.window, 25)
+        self.assertEqual(sharded.run(), metrics)
+        sharded = ShardedCorridor(self.intersections(), links=links, shards=[['BOS211', 'BOS210']], width=750,
+                                  height=750, start=252500, max_steps=2000)
+        self.assertEqual(sharded.window, 2000)
+        self.assertEqual(sharded.run(), metrics)
+
+    def test_steps_to_leave(self):
+        # Tests if no car leaves over a lane out before the amount of steps the model said it takes at least.
+        for engine in ('agent', 'vector'):
+            test_instance = Traffic(width=750, height=750, max_steps=3000, exit_lanes=('15', '17', '18'),
+                                    engine=engine)
+            steps = 0
+            earliest = 0
+            left = 0
+            while test_instance.running:
+                earliest = max(earliest, steps + test_instance.steps_to_leave({'15', '17', '18'}))
+                test_instance.step()
+                steps += 1
+                if test_instance.exits:
+                    self.assertGreaterEqual(steps, earliest)
+                    left += len(test_instance.exits)
+                    test_instance.exits.clear()
+            self.assertGreater(left, 0)
+            self.assertEqual(test_instance.steps_to_leave({'1'}), 3000)
+
+    def test_sharded_invalid(self):
+        # Tests if every intersection needs one shard and if a failing shard stops the run.
+        with self.assertRaises(ValueError):
+            ShardedCorridor(self.intersections(), shards=[['BOS210']])
+        intersections = self.intersections()
+        intersections['BOS211']['max_steps'] = 5
+        sharded = ShardedCorridor(intersections, shards=[['BOS210'], ['BOS211']], max_steps=10)
+        with self.assertRaises(RuntimeError):
+            sharded.run()
+        self.assertEqual(sharded.processes, [])
+
+    def test_light_settings(self):
+        # Tests if the green time is increased per intersection, for the signal groups of that intersection only.
+        intersections = self.intersections()
+        intersections['BOS211']['light_settings'] = {'05': 20}
+        corridor = Corridor(intersections, width=750, height=750, start=252500, max_steps=2000)
+        plain = Corridor(self.intersections(), width=750, height=750, start=252500, max_steps=2000)
+        self.assertNotEqual(corridor.models['BOS211'].data.column('05').tolist(),
+                            plain.models['BOS211'].data.column('05').tolist())
+        self.assertEqual(corridor.models['BOS210'].data.column('05').tolist(),
+                         plain.models['BOS210'].data.column('05').tolist())
+        intersections['BOS211']['light_settings'] = {'01': 20}
+        with self.assertRaises(ValueError):
+            Corridor(intersections, width=750, height=750, start=252500, max_steps=2000)
+
+    def test_invalid(self):
+        # Tests if a link without delay and models with another max_steps are refused.
+        with self.assertRaises(ValueError):
+            Corridor({'BOS210': {}}, links=(Link('BOS210', '15', 'BOS211', '15', 0),))
+        with self.assertRaises(ValueError):
+            Corridor({'BOS210': {}, 'BOS211': {'max_steps': 10}}, links=BOS_LINKS, max_steps=20)
+
+    def test_main_without_log(self):
+        # Tests if the command line asks for the log of an intersection that has no recorded log.
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()) as error:
+            main(['--intersections', 'BOS210', 'BOS211', '--max-steps', '10'])
+        self.assertIn('--log BOS211=PATH', error.getvalue())
+        output = Path(self.directory.name) / 'corridor.json'
+        metrics = main(['--log', f'BOS211={self.log}', '--start', 'BOS211=0', '--max-steps', '10',
+                        '--output', str(output)])
+        self.assertEqual(set(metrics), {'BOS210', 'BOS211', 'corridor'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+
+from traffic_model.simulation.benchmark import add_rush_hour
+from traffic_model.simulation.model import Traffic
+
+
+def record(engine: str, start: int, max_steps: int, headway: int = None, batch_cars: int = None) -> tuple:
+    """
+    Runs a window of the recorded data and keeps the positions of the cars after every step.
+    With a headway every spawn loop detects a car every headway steps instead.
+    With batch_cars the vector engine moves the cars at once from that many cars.
+    """
+    test_instance = Traffic(light_12=10, light_01=20, width=750, height=750, max_steps=max_steps, start=start,
+                            engine=engine)
+    if headway is not None:
+        add_rush_hour(test_instance, headway)
+    if batch_cars is not None:
+        test_instance.vector_engine.batch_cars = batch_cars
+    positions = []
+    while test_instance.running:
+        test_instance.step()
+        if test_instance.vector_engine is not None:
+            cars = test_instance.vector_engine
+            cars.store()
+            positions.append(np.stack((cars.x[:cars.count], cars.y[:cars.count],
+                                       cars.distance_to_next_node[:cars.count]), axis=1))
+        else:
+            positions.append(np.array([agent.pos + (agent.distance_to_next_node,)
+                                       for agent in test_instance.schedule.agents if agent.agent_type == 'car'],
+                                      dtype=np.float64).reshape(-1, 3))
+    return (positions, test_instance.finished_cars,
+            test_instance.sensor_on_car_found, test_instance.sensor_on_no_car)
+
+
+class TestVectorEngine(unittest.TestCase):
+    def assert_same_run(self, agent_run: tuple, vector_run: tuple) -> None:
+        """
+        Checks if the cars are in the same places after every step, up to the rounding of numpy, and the results are
+        the same.
+        """
+        self.assertEqual(len(agent_run[0]), len(vector_run[0]))
+        for step, (agent_positions, vector_positions) in enumerate(zip(agent_run[0], vector_run[0])):
+            self.assertEqual(agent_positions.shape, vector_positions.shape, f'The cars differ after step {step}')
+            np.testing.assert_allclose(vector_positions, agent_positions, rtol=0, atol=1e-6,
+                                       err_msg=f'The cars differ after step {step}')
+        self.assertEqual(agent_run[1:], vector_run[1:])
+
+    def test_same_as_agents(self):
+        # Tests if the vector engine moves every car like the Car agents on recorded windows, one by one and at once.
+        for start in (252500, 260000):
+            agent_run = record('agent', start, 1500)
+            self.assertGreater(agent_run[1].steps.count, 0)
+            for batch_cars in (0, 1000):
+                with self.subTest(start=start, batch_cars=batch_cars):
+                    self.assert_same_run(agent_run, record('vector', start, 1500, batch_cars=batch_cars))
+
+    def test_same_as_agents_full_lanes(self):
+        # Tests if the cars follow each other the same when the lanes are full and cars pass a node behind each other.
+        agent_run = record('agent', 252000, 1000, 15)
+        for batch_cars in (0, 1000):
+            with self.subTest(batch_cars=batch_cars):
+                self.assert_same_run(agent_run, record('vector', 252000, 1000, 15, batch_cars))
+
+    def test_drawn_cars(self):
+        # Tests if the visualization gets the cars of the engine.
+        test_instance = Traffic(width=750, height=750, max_steps=600, engine='vector')
+        while test_instance.running:
+            test_instance.step()
+        cars = [agent for agent in test_instance.get_drawn_agents() if agent.agent_type == 'car']
+        self.assertEqual(len(cars), test_instance.active_car_count)
+        self.assertNotIn('engine', [agent.agent_type for agent in test_instance.get_drawn_agents()])
+
+
+class TestRouteEngine(unittest.TestCase):
+    def test_positions(self):
+        # Tests if the positions are worked out on the segment to the next node and no car gets past the car in front.
+        test_instance = Traffic(width=750, height=750, max_steps=1000, start=252000, engine='route')
+        add_rush_hour(test_instance, 15)
+        cars = test_instance.vector_engine
+        while test_instance.running:
+            test_instance.step()
+            cars.store()
+            count = cars.count
+            node = cars.node[:count] + 1
+            distance_to_next_node = cars.distance_to_next_node[:count]
+            np.testing.assert_allclose(np.hypot(cars.x[:count] - cars.node_x[node], cars.y[:count] - cars.node_y[node]),
+                                       np.abs(distance_to_next_node), rtol=0, atol=1e-6)
+            along = cars.node_lane_offset[node] - distance_to_next_node
+            self.assertTrue((along[cars.ahead_slots()] >= along).all())
+        self.assertGreater(test_instance.finished_cars.steps.count, 0)
+
+    def test_close_to_agents(self):
+        # Tests if the distances along the routes give results close to the agents on a recorded window.
+        agent_run = record('agent', 252500, 3000)
+        route_run = record('route', 252500, 3000)
+        self.assertEqual(route_run[2:], agent_run[2:])
+        self.assertAlmostEqual(route_run[1].steps.count, agent_run[1].steps.count, delta=2)
+        average = agent_run[1].steps.mean()
+        self.assertAlmostEqual(route_run[1].steps.mean(), average, delta=average * 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from traffic_model.simulation.headless import main, parse_args, model_parameters, progress_line
+
+
+class TestHeadless(unittest.TestCase):
+    def test_parameters(self):
+        # Tests if the command line arguments become the parameters of the model.
+        parameters = model_parameters(parse_args(['--light-12', '10', '--start', '468000', '--max-steps', '600']))
+        self.assertEqual(parameters['light_12'], 10)
+        self.assertEqual(parameters['light_01'], 0)
+        self.assertEqual(parameters['start'], 468000)
+        self.assertEqual(parameters['max_steps'], 600)
+
+    def test_progress_line(self):
+        # Tests if the progress of a run without steps or wall time can be formatted.
+        self.assertTrue(progress_line(0, 0, 0).startswith('step 0/0 (100%), 0 steps/s'))
+        self.assertTrue(progress_line(50, 200, 2).startswith('step 50/200 (25%), 25 steps/s'))
+
+    def test_main(self):
+        # Tests if a run writes its metrics and the collected series.
+        with tempfile.TemporaryDirectory() as directory:
+            metrics = main(['--max-steps', '1200', '--collect-interval', '10', '--progress', '0',
+                            '--output', directory])
+            with open(Path(directory) / 'metrics.json') as json_file:
+                written = json.load(json_file)
+            self.assertEqual(written['metrics'], metrics)
+            self.assertEqual(written['parameters']['max_steps'], 1200)
+            self.assertGreater(metrics['steps_per_second'], 0)
+            with np.load(Path(directory) / 'series.npz') as series:
+                self.assertEqual(len(series['step']), 120)
+                self.assertEqual(series['step'][0], 252501)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+from pathlib import Path
+
+from traffic_model.simulation.intersection import data_path, load_intersection
+
+
+class TestIntersection(unittest.TestCase):
+    def test_load(self):
+        # Tests if all the data of an intersection is found, independent of the working directory.
+        intersection = load_intersection('BOS210')
+        self.assertEqual(intersection.name, 'BOS210')
+        self.assertEqual(intersection.bundle['lane_ids'][0], '1')
+        self.assertEqual(intersection.bundle['sensor_names'][0], '011')
+        self.assertEqual(intersection.signal_groups['01']['24'], 10)
+        self.assertEqual(intersection.activation_path, Path(data_path) / 'BOS210.csv')
+
+    def test_cached(self):
+        # Tests if an intersection is only loaded once per process.
+        self.assertIs(load_intersection('BOS210'), load_intersection('BOS210'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import math
+import unittest
+
+from traffic_model.simulation.model import Traffic
+
+
+class TestLoopOccupancy(unittest.TestCase):
+    def test_same_as_all_cars(self):
+        # Tests if the loops find the same cars as checking every car on the lane of the loop.
+        test_instance = Traffic(width=750, height=750, max_steps=3000)
+        checked = 0
+        while test_instance.running:
+            test_instance.step()
+            cars = [agent for agent in test_instance.schedule.agents if agent.agent_type == 'car']
+            sensors = [agent for agents in test_instance.signal_agents.values() for agent in agents
+                       if agent.agent_type == 'sensor']
+            found = test_instance.loop_occupancy.occupied(sensors, test_instance.lane_queues)
+            expected = [sensor for sensor in sensors
+                        if any(math.dist(sensor.center, car.pos) <= 8 and car.next_node.lane_id == sensor.lane_id
+                               for car in cars)]
+            self.assertEqual(sorted(sensor.unique_id for sensor in found),
+                             sorted(sensor.unique_id for sensor in expected))
+            checked += len(found)
+        self.assertGreater(checked, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
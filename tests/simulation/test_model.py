@@ -30,6 +30,45 @@ class MyTestCase(unittest.TestCase):
         #Omdat onze eigen eerste entry om 8 uur is zou dit het resultaat moeten zijn
         self.assertEqual(p1,p2)
 
+    def test_fast_forward(self):
+        # Jumping over the steps without cars should end in the same state as doing every step.
+        results = []
+        for fast_forward in (False, True):
+            test_instance = Traffic(max_steps=600, fast_forward=fast_forward)
+            while test_instance.running:
+                test_instance.step()
+            results.append((test_instance.step_count, test_instance.data_time, test_instance.finished_cars,
+                            test_instance.sensor_on_no_car, test_instance.active_loops,
+                            {name: values.tolist() for name, values in test_instance.datacollector.columns().items()}))
+        self.assertEqual(results[0], results[1])
+
+    def test_static_geometry(self):
+        # The nodes, roads, lights and sensors are not scheduled or placed on the space, but can still be drawn.
+        test_instance = Traffic(width=750, height=750, max_steps=10)
+        self.assertGreater(len(test_instance.geometry.nodes), 0)
+        self.assertGreater(len(test_instance.geometry.roads), 0)
+        self.assertEqual({agent.agent_type for agent in test_instance.geometry.signals}, {'light', 'sensor'})
+        for agent in test_instance.schedule.agents:
+            self.assertEqual(agent.agent_type, 'car')
+        self.assertEqual(len(test_instance.space._agent_to_index), 0)
+        drawn = test_instance.get_drawn_agents()
+        self.assertEqual(drawn[:len(test_instance.geometry)], list(test_instance.geometry))
+        self.assertEqual(test_instance.geometry.roads[0].pos, test_instance.geometry.roads[0].start_node.pos)
+        with self.assertRaises(RuntimeError):
+            test_instance.make_intersection()
+
+    def test_done_cars_reused(self):
+        # Finished cars are removed from the schedule, and reused for the next cars.
+        test_instance = Traffic(width=750, height=750, max_steps=1500)
+        made = set()
+        while test_instance.running:
+            test_instance.step()
+            made.update(id(agent) for agent in test_instance.schedule.agents if agent.agent_type == 'car')
+            cars = [agent for agent in test_instance.schedule.agents if agent.agent_type == 'car']
+            self.assertTrue(all(car.active for car in cars))
+            self.assertEqual(len(cars), test_instance.active_car_count)
+        self.assertGreater(test_instance.finished_cars.steps.count, 0)
+        self.assertLess(len(made), test_instance.finished_cars.steps.count + test_instance.active_car_count)
 
 
 if __name__ == '__main__':
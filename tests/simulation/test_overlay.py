@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from traffic_model.simulation.activation import AMBER, GREEN, OFF, ActivationLog
+from traffic_model.simulation.overlay import OverlayLog
+
+
+def make_log(offset: int = 0) -> ActivationLog:
+    states = np.zeros((10, 2), dtype=np.uint8)
+    states.flags.writeable = False
+    return ActivationLog(states, np.arange(10, dtype=np.int64), ['01', '03'], offset)
+
+
+class TestOverlayLog(unittest.TestCase):
+    def test_unchanged(self):
+        # Tests if an unchanged log reads the base and allocates no intervals.
+        log = OverlayLog(make_log())
+        self.assertEqual(log.read(3, '01'), OFF)
+        self.assertEqual(log.intervals, {})
+        self.assertFalse(log.column('01').flags.writeable)
+
+    def test_assign(self):
+        # Tests if overlapping changes split the earlier intervals.
+        log = OverlayLog(make_log(100))
+        log.assign('01', 2, 8, GREEN)
+        log.assign('01', 4, 6, AMBER)
+        self.assertEqual(log.column('01').tolist(), [0, 0, 2, 2, 1, 1, 2, 2, 0, 0])
+        self.assertEqual(log.column('01', 3, 5).tolist(), [2, 1])
+        self.assertEqual(log.read(104, '01'), AMBER)
+        self.assertEqual(log.read(107, '01'), GREEN)
+        self.assertEqual(log.read(108, '01'), OFF)
+        self.assertEqual(log.intervals['01'], ([2, 4, 6], [4, 6, 8], [GREEN, AMBER, GREEN]))
+
+    def test_assign_covering(self):
+        # Tests if a change that covers earlier intervals replaces them, and rows after the log are ignored.
+        log = OverlayLog(make_log())
+        log.assign('03', 1, 2, GREEN)
+        log.assign('03', 4, 5, GREEN)
+        log.assign('03', 0, 20, AMBER)
+        self.assertEqual(log.intervals['03'], ([0], [10], [AMBER]))
+        self.assertEqual(log.column('01').tolist(), [OFF] * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
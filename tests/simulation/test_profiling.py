@@ -0,0 +1,51 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from traffic_model.simulation.model import Traffic
+
+
+class TestStepProfiler(unittest.TestCase):
+    def test_same_run(self):
+        # Tests if a profiled run has the same results as a run without the profiler, for both engines.
+        for engine in ('agent', 'vector'):
+            runs = []
+            for profile in (False, True):
+                test_instance = Traffic(width=750, height=750, max_steps=2000, start=252500, engine=engine,
+                                        fast_forward=True, profile=profile)
+                while test_instance.running:
+                    test_instance.step()
+                runs.append((test_instance.step_count, test_instance.finished_cars,
+                             test_instance.datacollector.columns()['avg_car_steps'].tolist()))
+            self.assertEqual(runs[0], runs[1])
+
+    def test_report(self):
+        # Tests if the report has every phase and agent type and can be written as json.
+        test_instance = Traffic(width=750, height=750, max_steps=1000, start=252500, profile=True)
+        while test_instance.running:
+            test_instance.step()
+        profiler = test_instance.profiler
+        report = profiler.report()
+        self.assertEqual(report['steps'], 1000)
+        for phase in ('spawn_cars', 'update_signals', 'statistics', 'collect', 'schedule', 'change_lanes', 'get_done_cars'):
+            self.assertEqual(report['phases'][phase]['calls'], 1000)
+        self.assertIn('car.step', report['agents'])
+        self.assertIn('car.advance', report['agents'])
+        self.assertEqual(report['active_cars']['step'][:2], [252501, 252511])
+        self.assertEqual(len(report['active_cars']['count']), 100)
+        self.assertIn('schedule', profiler.format())
+        with tempfile.TemporaryDirectory() as directory:
+            path = profiler.to_json(Path(directory) / 'profile.json')
+            with open(path) as json_file:
+                self.assertEqual(json.load(json_file), json.loads(json.dumps(report)))
+
+    def test_off(self):
+        # Tests if a model is not profiled by default, and its step and phases are not wrapped.
+        test_instance = Traffic(width=750, height=750, max_steps=10, start=252500)
+        self.assertIsNone(test_instance.profiler)
+        self.assertFalse({'step', 'step_schedule', 'spawn_cars'} & set(vars(test_instance)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from traffic_model.simulation.model import Traffic
+from traffic_model.simulation.queues import LaneQueue
+
+
+class QueuedCar:
+    """
+    A car with only what a queue needs, for the queue tests.
+    """
+    queue = None
+    ahead = None
+    behind = None
+
+    def __init__(self, unique_id: int, distance: float):
+        self.unique_id = unique_id
+        self.distance = distance
+
+    def lane_distance(self) -> float:
+        return self.distance
+
+
+class TestLaneQueue(unittest.TestCase):
+    def test_join_leave(self):
+        # Tests if cars are kept in the order they drive and can leave from anywhere in the queue.
+        queue = LaneQueue('1')
+        cars = [QueuedCar(0, 30.0), QueuedCar(1, 20.0), QueuedCar(2, 20.0), QueuedCar(3, 5.0)]
+        for index in (3, 0, 2, 1):
+            queue.join(cars[index])
+        self.assertEqual(list(queue), cars)
+        self.assertIs(cars[2].ahead, cars[1])
+        self.assertIs(cars[2].behind, cars[3])
+        self.assertIs(cars[1].queue, queue)
+        queue.leave(cars[1])
+        self.assertIsNone(cars[1].queue)
+        self.assertEqual(list(queue), [cars[0], cars[2], cars[3]])
+        self.assertEqual(len(queue), 3)
+
+    def test_model_queues(self):
+        # Tests if every driving car is in the queue of the lane of its next node.
+        test_instance = Traffic(width=750, height=750, max_steps=1500)
+        while test_instance.running:
+            test_instance.step()
+        cars = [car for queue in test_instance.lane_queues.values() for car in queue]
+        self.assertEqual(len(cars), test_instance.active_car_count)
+        for car in cars:
+            self.assertEqual(car.queue.lane_id, car.next_node.lane_id)
+        for queue in test_instance.lane_queues.values():
+            distances = [car.lane_distance() for car in queue]
+            self.assertEqual(distances, sorted(distances, reverse=True))
+
+    def test_finished_cars_leave(self):
+        # Tests if cars on a short exit route, that pass a node and their end node in one step, leave the queues.
+        for engine in ('agent', 'vector', 'route'):
+            test_instance = Traffic(width=750, height=750, max_steps=1500, exit_lanes=('15', '17', '18'),
+                                    engine=engine)
+            while test_instance.running:
+                test_instance.step()
+                self.assertEqual(sum(len(queue) for queue in test_instance.lane_queues.values()),
+                                 test_instance.active_car_count)
+                for car in test_instance.car_pool:
+                    self.assertIsNone(car.queue)
+            self.assertGreater(len(test_instance.exits), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
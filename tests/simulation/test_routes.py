@@ -0,0 +1,50 @@
+import math
+import unittest
+
+from traffic_model.simulation.model import Traffic
+
+
+class TestRoutes(unittest.TestCase):
+    def test_compiled_once(self):
+        # Tests if every spawn loop has a route and the cars drive over the nodes of that route.
+        test_instance = Traffic(width=750, height=750, max_steps=1500)
+        self.assertEqual(sorted(test_instance.spawn_routes), sorted(test_instance.active_loops))
+        routes = [route.nodes for route in test_instance.spawn_routes.values()]
+        while test_instance.running:
+            test_instance.step()
+            for agent in test_instance.schedule.agents:
+                if agent.agent_type == 'car':
+                    self.assertTrue(any(agent.lane is nodes for nodes in routes))
+
+    def test_nodes(self):
+        # Tests if a route has no nodes at the same position, other than the end node at the end.
+        test_instance = Traffic(width=750, height=750, max_steps=10)
+        for route in test_instance.spawn_routes.values():
+            positions = [node.pos for node in route.nodes[:-1]]
+            lane = test_instance.lanes[route.lane_id]
+            self.assertEqual(route.nodes[:len(lane['in']['nodes'])], lane['in']['nodes'])
+            self.assertEqual(len(set(positions[len(lane['in']['nodes']):])), len(positions) - len(lane['in']['nodes']))
+            self.assertIs(route.nodes[-1], route.end_node)
+            self.assertIs(route.start_node, route.nodes[0])
+
+    def test_segments(self):
+        # Tests if the segments of a route are the distances between its nodes.
+        test_instance = Traffic(width=750, height=750, max_steps=10)
+        for route in test_instance.spawn_routes.values():
+            self.assertEqual(len(route.segments), len(route.nodes) - 1)
+            self.assertIs(route.nodes[route.end_index], route.end_node)
+            for index, node in enumerate(route.nodes[:-1]):
+                self.assertEqual(route.segments[index], math.dist(node.pos, route.nodes[index + 1].pos))
+            self.assertTrue(all(route.segments[:route.end_index]))
+
+    def test_light_length(self):
+        # Tests if the light of a route is on the stop line at its light length, the sum of the segments before it.
+        test_instance = Traffic(width=750, height=750, max_steps=10)
+        for route in test_instance.spawn_routes.values():
+            self.assertIsNotNone(route.light_length)
+            index = next(index for index, node in enumerate(route.nodes) if node.stop_line)
+            self.assertEqual(route.nodes[index].pos, route.light.pos)
+            self.assertAlmostEqual(route.light_length, sum(route.segments[:index]))
+
+if __name__ == '__main__':
+    unittest.main()
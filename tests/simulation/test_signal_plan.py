@@ -0,0 +1,180 @@
+import json
+import pathlib
+import unittest
+
+import numpy as np
+
+from traffic_model.simulation.activation import AMBER, GREEN, OFF, ActivationLog, encode_states
+from traffic_model.simulation.model import Traffic
+from traffic_model.simulation.overlay import OverlayLog
+from traffic_model.simulation.signal_plan import conflicting_groups, green_extensions, replace_timings
+
+data_path = pathlib.Path(__file__).parents[2] / 'traffic_model' / 'simulation' / 'data'
+with open(data_path / 'signalgroup_BOS210.json') as json_file:
+    sgr_data = json.load(json_file)
+
+
+def reference_manipulate(states: np.ndarray, columns: list, first: int, max_steps: int, lights: dict) -> None:
+    """
+    The cell by cell implementation of Traffic.manipulate_traffic_light_data this engine replaces.
+    """
+    for light in lights.keys():
+        if lights[light] > 0:
+            column = states[:, columns.index(light)]
+            streak = 0
+            to_replace = []
+            for index, value in enumerate(column[first:first + max_steps]):
+                if value == GREEN:
+                    streak += 1
+                else:
+                    if streak > 0:
+                        increase_info = streak / 100 * lights[light]
+                        orange_index = index + first
+                        orange_value = value
+                        while orange_value == AMBER:
+                            orange_index += 1
+                            try:
+                                orange_value = column[orange_index]
+                            except IndexError:
+                                break
+                        to_replace.append([index + first, int(np.round(increase_info)),
+                                           orange_index + np.round(increase_info)])
+                    streak = 0
+            if len(to_replace) > 1:
+                to_replace.pop()
+            for replace_index, increase, orange in to_replace:
+                for col in columns:
+                    if col in sgr_data[light]:
+                        other = states[:, columns.index(col)]
+                        crosses = []
+                        for c in range(replace_index, min(replace_index + increase, len(other))):
+                            if other[c] == AMBER or other[c] == GREEN:
+                                crosses.append(c)
+                        if len(crosses) > 0:
+                            crosses.append(crosses[-1] + int(sgr_data[light][col]) * 10)
+                            other[crosses[0]: crosses[-1] + 1] = OFF
+                column[replace_index:replace_index + increase + 1] = GREEN
+                column[replace_index + increase: int(orange) + 1] = AMBER
+
+
+def pandas_manipulate(data, step_count: int, max_steps: int, lights: dict) -> None:
+    """
+    The pandas implementation of Traffic.manipulate_traffic_light_data and check_and_replace_timings
+    the model started with, on a data frame of the raw log.
+    """
+    def check_and_replace_timings(replace_index, increase, orange, light):
+        for col in data.columns:
+            if col in sgr_data[light]:
+                crosses = []
+                for c in range(replace_index, replace_index + increase):
+                    if data[col][c] == 'Z' or data[col][c] == '#':
+                        crosses.append(c)
+                if len(crosses) > 0:
+                    crosses.append(crosses[-1] + int(sgr_data[light][col]) * 10)
+                    data.loc[crosses[0]: crosses[-1], col] = np.nan
+
+        data.loc[replace_index:replace_index + increase, light] = '#'
+        data.loc[replace_index + increase: orange, light] = 'Z'
+
+    for light in lights.keys():
+        if lights[light] > 0:
+            streak = 0
+            to_replace = []
+            for index, value in enumerate(data[light][step_count:step_count + max_steps]):
+                if value == "#":
+                    streak += 1
+                else:
+                    if streak > 0:
+                        increase_info = streak / 100 * lights[light]
+                        orange_index = index + step_count
+                        orange_value = value
+                        while orange_value == 'Z':
+                            orange_index += 1
+                            try:
+                                orange_value = data[light][orange_index]
+                            except KeyError:
+                                break
+                        to_replace.append([index + step_count, int(np.round(increase_info)),
+                                           orange_index + np.round(increase_info)])
+                    streak = 0
+            if len(to_replace) > 1:
+                to_replace.pop()
+            for i in to_replace:
+                check_and_replace_timings(i[0], i[1], i[2], light)
+
+
+def random_states(rows: int, columns: list, seed: int) -> np.ndarray:
+    """
+    Makes a log where every light switches between green, amber and red with random phase lengths.
+    """
+    random = np.random.default_rng(seed)
+    states = np.zeros((rows, len(columns)), dtype=np.uint8)
+    for index in range(len(columns)):
+        row = int(random.integers(0, 200))
+        while row < rows:
+            green = int(random.integers(20, 400))
+            amber = int(random.integers(0, 40))
+            states[row:row + green, index] = GREEN
+            states[row + green:row + green + amber, index] = AMBER
+            row += green + amber + int(random.integers(1, 600))
+    return states
+
+
+class TestSignalPlan(unittest.TestCase):
+    def compare(self, rows: int, first: int, max_steps: int, lights: dict, seed: int):
+        columns = sorted(sgr_data.keys())
+        states = random_states(rows, columns, seed)
+        expected = states.copy()
+        reference_manipulate(expected, columns, first, max_steps, lights)
+
+        states.flags.writeable = False
+        data = OverlayLog(ActivationLog(states, np.zeros(rows, dtype=np.int64), columns))
+        for light in lights.keys():
+            if lights[light] > 0:
+                conflicts = conflicting_groups(columns, sgr_data[light])
+                for i in green_extensions(data.column(light), first, max_steps, lights[light]):
+                    replace_timings(data, conflicts, i[0], i[1], i[2], light)
+
+        for col in columns:
+            changed = np.flatnonzero(data.column(col) != expected[:, columns.index(col)])
+            self.assertEqual(changed.tolist(), [], f'Light {col} differs from the reference')
+
+    def test_same_as_reference(self):
+        # Tests if the vectorized engine changes the log exactly like the cell by cell implementation.
+        lights = {'11': 7, '12': 20, '01': 13, '03': 5, '41': 20, '04': 11, '05': 3}
+        for seed in range(5):
+            self.compare(20000, 1000, 15000, lights, seed)
+
+    def test_same_as_reference_at_log_end(self):
+        # Tests the amber phases and extensions that run into the end of the loaded rows.
+        lights = {'11': 50, '12': 100, '01': 0, '03': 35, '41': 1, '04': 0, '05': 64}
+        for seed in range(5):
+            self.compare(5000, 0, 5000, lights, seed)
+
+    def test_same_as_pandas(self):
+        # Tests if the model changes a recorded window exactly like the pandas implementation it started with.
+        import pandas as pd
+
+        start = 252500
+        max_steps = 3000
+        lights = {'11': 7, '12': 20, '01': 13, '03': 5, '41': 20, '04': 11, '05': 3}
+        test_instance = Traffic(width=750, height=750, start=start, max_steps=max_steps, light_settings=lights)
+        data = test_instance.data
+        frame = pd.read_csv(data_path / 'BOS210.csv', sep=';', dtype=str, skiprows=range(1, data.offset + 1),
+                            nrows=len(data) + 1000)
+        pandas_manipulate(frame, start - data.offset, max_steps, lights)
+        expected = encode_states(frame[data.columns].to_numpy()[:len(data)])
+        for col in data.columns:
+            changed = np.flatnonzero(data.column(col) != expected[:, data.columns.index(col)])
+            self.assertEqual(changed.tolist(), [], f'Light {col} differs from the pandas implementation')
+        plain = Traffic(width=750, height=750, start=start, max_steps=max_steps).data
+        self.assertNotEqual(expected[:, data.columns.index('12')].tolist(), plain.column('12').tolist())
+
+    def test_single_phase_is_kept(self):
+        # Tests if the only green phase is extended, instead of being dropped as the last one.
+        states = np.array([GREEN] * 10 + [AMBER] * 3 + [OFF] * 10, dtype=np.uint8)
+        self.assertEqual(green_extensions(states, 0, len(states), 50), [[10, 5, 18.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from traffic_model.simulation.model import Traffic
+from traffic_model.simulation.snapshot import load_snapshot, restore, save_snapshot, take_snapshot
+
+
+def final_state(model: Traffic) -> tuple:
+    """
+    Runs a model to the end and gets everything its results are made of.
+    """
+    while model.running:
+        model.step()
+    columns = {name: values.tolist() for name, values in model.datacollector.columns().items()}
+    return (model.step_count, model.data_time, model.finished_cars, model.sensor_on_car_found,
+            model.sensor_on_no_car, model.active_car_count, model.active_loops, columns)
+
+
+class TestSnapshot(unittest.TestCase):
+    parameters = {'light_12': 10, 'light_01': 20, 'width': 750, 'height': 750, 'max_steps': 3000}
+
+    def test_resume(self):
+        # Tests if a restored model ends exactly like the model that was not stopped, also from a file.
+        for engine in ('agent', 'vector', 'route'):
+            expected = final_state(Traffic(engine=engine, **self.parameters))
+            test_instance = Traffic(engine=engine, **self.parameters)
+            for _ in range(1234):
+                test_instance.step()
+            with tempfile.TemporaryDirectory() as directory:
+                snapshot = load_snapshot(save_snapshot(take_snapshot(test_instance), Path(directory) / 'model.pkl'))
+            self.assertGreater(len(snapshot['cars']['route']), 0)
+            self.assertEqual(final_state(restore(snapshot)), expected)
+            self.assertEqual(final_state(test_instance), expected)
+
+    def test_other_engine(self):
+        # Tests if a snapshot of the agents continues the same in the vector engine.
+        test_instance = Traffic(**self.parameters)
+        for _ in range(1500):
+            test_instance.step()
+        snapshot = take_snapshot(test_instance)
+        self.assertEqual(final_state(restore(snapshot, engine='vector')), final_state(restore(snapshot)))
+
+    def test_fork(self):
+        # Tests if a fork only changes the signal timings after the snapshot, and the snapshot can be used again.
+        test_instance = Traffic(**self.parameters)
+        for _ in range(1000):
+            test_instance.step()
+        snapshot = take_snapshot(test_instance)
+        fork = restore(snapshot, light_12=20, max_steps=6000)
+        other = Traffic(**dict(self.parameters, light_12=20, max_steps=6000))
+        row = fork.step_count + 1 - fork.data.offset
+        self.assertEqual(fork.data.column('12', 0, row).tolist(), test_instance.data.column('12', 0, row).tolist())
+        self.assertEqual(fork.data.column('12', row).tolist(), other.data.column('12', row).tolist())
+        self.assertEqual(final_state(fork)[0], test_instance.step_count + 5000)
+        self.assertEqual(final_state(restore(snapshot)), final_state(test_instance))
+        with self.assertRaises(ValueError):
+            restore(snapshot, start=260000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from traffic_model.simulation.model import Traffic
+from traffic_model.simulation.statistics import Accumulator, CarStatistics
+
+
+class TestStatistics(unittest.TestCase):
+    def test_accumulator(self):
+        # Tests the mean, variance and quantiles against numpy.
+        values = np.random.default_rng(0).integers(0, 2000, 1001).tolist()
+        accumulator = Accumulator()
+        for value in values:
+            accumulator.add(value)
+        self.assertEqual(accumulator.mean(), sum(values) / len(values))
+        self.assertAlmostEqual(accumulator.variance(), float(np.var(values)))
+        for q in (0, 0.1, 0.5, 0.9, 0.99, 1):
+            self.assertEqual(accumulator.quantile(q), int(np.quantile(values, q, method='inverted_cdf')))
+        self.assertEqual(Accumulator().mean(), 0)
+        self.assertIsNone(Accumulator().quantile(0.5))
+
+    def test_merge(self):
+        # Tests if merging the statistics of two halves gives the statistics of all the cars.
+        cars = [('1', '01', 300, 20), ('2', '12', 410, 0), ('1', '01', 280, 35), ('3', '12', 500, 120)]
+        whole, first, second = CarStatistics(), CarStatistics(), CarStatistics()
+        for index, car in enumerate(cars):
+            whole.add(*car)
+            (first if index % 2 else second).add(*car)
+        first.merge(second)
+        self.assertEqual(first, whole)
+        self.assertEqual(whole.lane_steps['1'].count, 2)
+        self.assertEqual(whole.group_wait['12'].total, 120)
+
+    def test_model_statistics(self):
+        # Tests if the statistics per lane and per signal group add up to the statistics of all cars.
+        test_instance = Traffic(width=750, height=750, max_steps=3000)
+        while test_instance.running:
+            test_instance.step()
+        finished = test_instance.finished_cars
+        self.assertGreater(finished.steps.count, 0)
+        self.assertEqual(test_instance.calc_finished_car_steps(), finished.steps.total / finished.steps.count)
+        for per_key in (finished.lane_steps, finished.group_steps):
+            merged = Accumulator()
+            for accumulator in per_key.values():
+                merged.merge(accumulator)
+            self.assertEqual(merged, finished.steps)
+        self.assertEqual(sum(accumulator.total for accumulator in finished.lane_wait.values()), finished.wait.total)
+
+
+if __name__ == '__main__':
+    unittest.main()
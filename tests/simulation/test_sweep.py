@@ -0,0 +1,40 @@
+import csv
+import tempfile
+import unittest
+from pathlib import Path
+
+from traffic_model.simulation.sweep import parameter_grid, parse_parameters, run_point, sweep
+
+# The metrics that depend on the speed of the machine.
+TIMING = ('wall_seconds', 'steps_per_second', 'simulated_seconds_per_second')
+
+
+def without_timing(row: dict) -> dict:
+    return {key: value for key, value in row.items() if key not in TIMING}
+
+
+class TestSweep(unittest.TestCase):
+    def test_parameter_grid(self):
+        # Tests if every combination is made, with the fixed parameters in every point.
+        points = parameter_grid(parse_parameters(['light_12=0,10', 'start=252000,256000']), {'max_steps': 600})
+        self.assertEqual(len(points), 4)
+        self.assertEqual(points[1], {'max_steps': 600, 'light_12': 0, 'start': 256000})
+        self.assertEqual(parse_parameters(['engine=vector', 'fast_forward=true']),
+                         {'engine': ['vector'], 'fast_forward': [True]})
+
+    def test_sweep(self):
+        # Tests if the pool gives the same rows as running the points one by one, and writes all of them.
+        points = parameter_grid({'light_12': [0, 20]}, {'width': 750, 'height': 750, 'max_steps': 1500})
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'sweep.csv'
+            rows = sweep(points, path, processes=2, out=lambda line: None)
+            with open(path) as csv_file:
+                written = list(csv.DictReader(csv_file))
+        self.assertEqual(len(written), 2)
+        self.assertEqual(sorted(int(row['index']) for row in written), [0, 1])
+        for index, row in enumerate(rows):
+            self.assertEqual(without_timing(row), without_timing(run_point((index, points[index]))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import filecmp
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from traffic_model.simulation.activation import DETECTED, GREEN, OFF, ActivationLog
+from traffic_model.simulation.intersection import load_intersection
+from traffic_model.simulation.model import Traffic
+from traffic_model.simulation.synthetic import conflicts, generate_log, observed_rates, signal_cycle
+
+
+class TestSynthetic(unittest.TestCase):
+    def test_clearance(self):
+        # Tests if a conflicting group is off while a group is on, and for the clearance time before it turns green.
+        intersection = load_intersection('BOS210')
+        groups = intersection.bundle['signal_groups'].tolist()
+        clearance = conflicts(intersection)
+        cycle = signal_cycle(groups, clearance, 200, 30)
+        states = np.concatenate((cycle, cycle, cycle))
+        for (from_sg, to_sg), steps in clearance.items():
+            on = states[:, groups.index(to_sg)] != OFF
+            other = states[:, groups.index(from_sg)]
+            self.assertTrue((other[on] == OFF).all())
+            green = states[:, groups.index(to_sg)] == GREEN
+            for start in np.flatnonzero(green[1:] & ~green[:-1]) + 1:
+                self.assertTrue((other[max(0, start - steps):start] == OFF).all())
+        self.assertTrue((states == GREEN).any(axis=0).all())
+
+    def test_generate(self):
+        # Tests if the log has the columns of the bundle, the rates per loop and is the same for any chunk size.
+        intersection = load_intersection('BOS210')
+        with tempfile.TemporaryDirectory() as directory:
+            path = generate_log(Path(directory) / 'one.csv', intersection, 36000, {'044': 600, '114': 300}, scale=2)
+            generate_log(Path(directory) / 'two.csv', intersection, 36000, {'044': 600, '114': 300}, scale=2,
+                         chunk_size=777)
+            self.assertTrue(filecmp.cmp(path, Path(directory) / 'two.csv', shallow=False))
+
+            log = ActivationLog.open(str(path))
+            self.assertEqual(len(log), 36000)
+            self.assertEqual(log.columns, intersection.bundle['signal_groups'].tolist()
+                             + intersection.bundle['sensor_names'].tolist())
+            self.assertEqual(log.read(10, 'time'), '02-11-2020 00:00:01.0')
+            rates = observed_rates(str(path), ['044', '114', '011'])
+            self.assertAlmostEqual(rates['044'], 1200, delta=150)
+            self.assertAlmostEqual(rates['114'], 600, delta=100)
+            self.assertEqual(rates['011'], 0)
+
+            test_instance = Traffic(width=750, height=750, max_steps=3000, start=0, activation_path=str(path))
+            self.assertIn(test_instance.read_row_col('044'), (OFF, DETECTED))
+            while test_instance.running:
+                test_instance.step()
+            self.assertGreater(test_instance.finished_cars.steps.count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+
+from traffic_model.simulation.activation import AMBER, DETECTED, GREEN, OFF, ActivationLog
+from traffic_model.simulation.overlay import OverlayLog
+from traffic_model.simulation.transitions import TransitionIndex
+
+
+class TestTransitionIndex(unittest.TestCase):
+    def setUp(self):
+        states = np.array([[GREEN, OFF], [GREEN, DETECTED], [AMBER, DETECTED], [OFF, OFF], [OFF, OFF]],
+                          dtype=np.uint8)
+        self.data = OverlayLog(ActivationLog(states, np.zeros(5, dtype=np.int64), ['01', '011'], 100))
+
+    def test_column_transitions(self):
+        # Tests if only the changes are indexed, starting with the state at the start step.
+        index = TransitionIndex(self.data, ['01', '011'], 101)
+        steps, states = index.column_transitions['01']
+        self.assertEqual(steps.tolist(), [101, 102, 103])
+        self.assertEqual(states.tolist(), [GREEN, AMBER, OFF])
+
+    def test_pop(self):
+        # Tests if every change is handed out once, in the order of the steps.
+        index = TransitionIndex(self.data, ['01', '011'], 101)
+        self.assertEqual(index.pop(101), [('01', GREEN), ('011', DETECTED)])
+        self.assertEqual(index.pop(101), [])
+        self.assertEqual(index.pop(110), [('01', AMBER), ('01', OFF), ('011', OFF)])
+
+    def test_overlay(self):
+        # Tests if changed timings are indexed instead of the base log.
+        self.data.assign('01', 2, 3, GREEN)
+        index = TransitionIndex(self.data, ['01'], 100)
+        self.assertEqual(index.column_transitions['01'][0].tolist(), [100, 103])
+
+
+if __name__ == '__main__':
+    unittest.main()
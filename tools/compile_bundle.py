@@ -0,0 +1,19 @@
+import os
+import sys
+
+# Sets a universal directory path so the traffic model can be imported from the tools folder
+main_path = os.path.dirname(os.path.realpath(__file__))
+main_path = (os.path.normpath(main_path + os.sep + os.pardir))
+sys.path.insert(0, main_path)
+
+from traffic_model.simulation.bundle import compile_bundle
+
+# Output folders with the intersections in them, only the simulation reads bundles
+folders = {
+    os.path.join(main_path, 'traffic_model', 'simulation', 'data'): ['BOS210', 'BOS211']
+}
+
+if __name__ == '__main__':
+    for folder, names in folders.items():
+        for name in names:
+            print(f'Compiled {compile_bundle(name, folder)}')
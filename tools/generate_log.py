@@ -0,0 +1,12 @@
+import os
+import sys
+
+# Sets a universal directory path so the traffic model can be imported from the tools folder
+main_path = os.path.dirname(os.path.realpath(__file__))
+main_path = (os.path.normpath(main_path + os.sep + os.pardir))
+sys.path.insert(0, main_path)
+
+from traffic_model.simulation.synthetic import main
+
+if __name__ == '__main__':
+    main()
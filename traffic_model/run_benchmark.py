@@ -0,0 +1,4 @@
+from simulation.benchmark import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+from simulation.corridor import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+from simulation.sweep import main
+
+if __name__ == '__main__':
+    main()
@@ -21,7 +21,7 @@ class SimpleCanvas(VisualizationElement):
 
     def render(self, model):
         space_state = []
-        for obj in model.schedule.agents:
+        for obj in model.get_drawn_agents():
             portrayal = self.portrayal_method(obj)
             x, y = obj.pos
             x = (x - model.space.x_min) / (model.space.x_max - model.space.x_min)
@@ -0,0 +1,270 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# The state codes used in a compiled activation log. Light states map one on one on Light.state.
+OFF = 0
+AMBER = 1
+GREEN = 2
+DETECTED = 3
+
+# The characters used in the raw activation log and their state code, everything else is OFF.
+STATE_CODES = {
+    '#': GREEN,
+    'Z': AMBER,
+    '|': DETECTED
+}
+
+TIME_COLUMN = 'time'
+TIME_FORMAT = '%d-%m-%Y %H:%M:%S.%f'
+EPOCH = datetime(1970, 1, 1)
+
+
+def compiled_paths(path: str) -> tuple:
+    """
+    Gets the paths of the files a compiled activation log is made of.
+    :param path: The path of the raw activation log (csv).
+    :return: A tuple with the state matrix path, the timestamps path and the columns path.
+    """
+    stem = os.path.splitext(path)[0]
+    return stem + '.states.npy', stem + '.time.npy', stem + '.columns.json'
+
+
+def count_rows(path: str) -> int:
+    """
+    Counts the amount of data rows in a raw activation log, without parsing it.
+    :param path: The path of the raw activation log.
+    :return: The amount of rows, without the header.
+    """
+    with open(path, 'rb') as log_file:
+        lines = sum(chunk.count(b'\n') for chunk in iter(lambda: log_file.read(1 << 20), b''))
+        log_file.seek(-1, os.SEEK_END)
+        if log_file.read(1) != b'\n':
+            lines += 1
+    return lines - 1
+
+
+def encode_states(values: np.ndarray) -> np.ndarray:
+    """
+    Turns the characters of the raw activation log into state codes.
+    :param values: An array with the raw characters.
+    :return: An uint8 array with the state codes.
+    """
+    codes = np.full(values.shape, OFF, dtype=np.uint8)
+    for character, code in STATE_CODES.items():
+        codes[values == character] = code
+    return codes
+
+
+def read_header(path: str) -> tuple:
+    """
+    Reads the header of a .npy file, used to find the byte offset of a row.
+    :param path: The path of the .npy file.
+    :return: A tuple with the shape of the array and the byte offset where the data starts.
+    """
+    with open(path, 'rb') as fp:
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape = np.lib.format.read_array_header_1_0(fp)[0]
+        else:
+            shape = np.lib.format.read_array_header_2_0(fp)[0]
+        return shape, fp.tell()
+
+
+def amber_tail(path: str, offset: int, shape: tuple, row: int, chunk_size: int = 1000) -> int:
+    """
+    Counts how many rows from a row onwards are still part of an amber phase that is running at that row.
+    The rows are read in chunks, straight from the compiled state matrix.
+    :param path: The path of the compiled state matrix.
+    :param offset: The byte offset where the data of the state matrix starts.
+    :param shape: The shape of the state matrix.
+    :param row: The row to start counting at.
+    :param chunk_size: The amount of rows that is read at once.
+    :return: The amount of rows until every column left its amber phase.
+    """
+    rows, columns = shape
+    running = np.ones(columns, dtype=bool)
+    tail = 0
+    while row + tail < rows:
+        count = min(chunk_size, rows - row - tail)
+        chunk = np.fromfile(path, dtype=np.uint8, count=count * columns, offset=offset + (row + tail) * columns)
+        amber = np.logical_and.accumulate(chunk.reshape(count, columns) == AMBER, axis=0) & running
+        still_amber = amber.any(axis=1)
+        if not still_amber.all():
+            return tail + int(np.argmin(still_amber))
+        running = amber[-1]
+        tail += count
+    return tail
+
+
+def format_time(timestamp: int) -> str:
+    """
+    Formats a timestamp the way the raw activation log does.
+    :param timestamp: The timestamp in milliseconds.
+    :return: The time, for example '02-11-2020 08:00:00.0'.
+    """
+    moment = EPOCH + timedelta(milliseconds=int(timestamp))
+    return moment.strftime('%d-%m-%Y %H:%M:%S.') + str(moment.microsecond // 100000)
+
+
+def ingest(path: str, chunk_size: int = 100000) -> None:
+    """
+    Compiles a raw, ';' separated activation log into an uint8 state matrix and int64 timestamps.
+    The log is read in chunks, so the whole day never has to be in memory.
+    Every file is written next to its final path first and then moved in place, the columns last,
+    so a failed or parallel ingest never leaves a half written compiled log behind.
+    :param path: The path of the raw activation log.
+    :param chunk_size: The amount of rows that is parsed at once.
+    :return: None
+    """
+    # Pandas is only needed to parse the raw log, so it is not imported with the simulation.
+    import pandas as pd
+
+    paths = compiled_paths(path)
+    states_path, time_path, columns_path = [f'{final_path}.{os.getpid()}.tmp' for final_path in paths]
+    rows = count_rows(path)
+    columns = [col for col in pd.read_csv(path, sep=';', nrows=0).columns if col != TIME_COLUMN]
+
+    try:
+        states = np.lib.format.open_memmap(states_path, mode='w+', dtype=np.uint8, shape=(rows, len(columns)))
+        times = np.lib.format.open_memmap(time_path, mode='w+', dtype=np.int64, shape=(rows,))
+        row = 0
+        for chunk in pd.read_csv(path, sep=';', dtype=str, keep_default_na=False, chunksize=chunk_size):
+            end = row + len(chunk)
+            states[row:end] = encode_states(chunk[columns].to_numpy())
+            parsed = pd.to_datetime(chunk[TIME_COLUMN], format=TIME_FORMAT).to_numpy()
+            times[row:end] = parsed.astype('datetime64[ms]').astype(np.int64)
+            row = end
+        states.flush()
+        times.flush()
+        del states, times
+        with open(columns_path, 'w') as fp:
+            json.dump(columns, fp)
+    except BaseException:
+        for temporary_path in (states_path, time_path, columns_path):
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        raise
+
+    # The columns are moved in place last, they mark the compiled log as complete.
+    for temporary_path, final_path in zip((states_path, time_path, columns_path), paths):
+        os.replace(temporary_path, final_path)
+
+
+def is_compiled(path: str) -> bool:
+    """
+    Checks if there is a compiled activation log that is newer than the raw log.
+    :param path: The path of the raw activation log.
+    :return: True if the compiled log can be used, otherwise False.
+    """
+    columns_path = compiled_paths(path)[2]
+    if not os.path.exists(columns_path):
+        return False
+    if not os.path.exists(path):
+        return True
+    return os.path.getmtime(columns_path) >= os.path.getmtime(path)
+
+
+def compile_if_needed(path: str) -> tuple:
+    """
+    Compiles an activation log if it is missing or outdated.
+    :param path: The path of the raw activation log.
+    :return: A tuple with the state matrix path, the timestamps path and the column names.
+    """
+    if not is_compiled(path):
+        ingest(path)
+    states_path, time_path, columns_path = compiled_paths(path)
+    with open(columns_path) as json_file:
+        return states_path, time_path, json.load(json_file)
+
+
+class ActivationLog:
+    """
+    A class used to represent a compiled activation log (the sensor and traffic light data).
+    Attributes:
+        columns: The names of the sensor and light columns, in the order of the state matrix.
+        states: A rows x columns uint8 matrix with the state codes.
+        time: The int64 timestamps of the rows, in milliseconds.
+        offset: The row of the full log that is the first row of this log.
+        column_index: The index of every column in the state matrix.
+    """
+
+    def __init__(self, states: np.ndarray, time: np.ndarray, columns: list, offset: int = 0):
+        """
+        Constructor for the ActivationLog class.
+        :param states: A rows x columns uint8 matrix with the state codes.
+        :param time: The int64 timestamps of the rows, in milliseconds.
+        :param columns: The names of the columns.
+        :param offset: The row of the full log that is the first row of this log.
+        """
+        self.states = states
+        self.time = time
+        self.columns = columns
+        self.offset = offset
+        self.column_index = {col: index for index, col in enumerate(columns)}
+
+    @classmethod
+    def open(cls, path: str, mmap_mode: str = 'r'):
+        """
+        Opens the compiled version of an activation log, compiles it first if it is missing or outdated.
+        :param path: The path of the raw activation log.
+        :param mmap_mode: How the state matrix is mapped, 'r' for read-only or 'c' for copy-on-write.
+        :return: The memory-mapped ActivationLog.
+        """
+        states_path, time_path, columns = compile_if_needed(path)
+        return cls(np.load(states_path, mmap_mode=mmap_mode), np.load(time_path, mmap_mode='r'), columns)
+
+    @classmethod
+    def open_window(cls, path: str, start: int, stop: int, padding: int = 600, mmap_mode: str = 'r'):
+        """
+        Opens only the rows start up to stop of an activation log, compiles it first if it is missing or outdated.
+        The amber phases that are still running at stop are included, plus some padding for extended green times.
+        :param path: The path of the raw activation log.
+        :param start: The first row of the window.
+        :param stop: The row after the last row of the window.
+        :param padding: The amount of extra rows after the amber phases.
+        :param mmap_mode: How the state matrix is mapped, 'r' for read-only or 'c' for copy-on-write.
+        :return: The memory-mapped ActivationLog of the window.
+        :raises ValueError: When the start is not a row of the log.
+        """
+        states_path, time_path, columns = compile_if_needed(path)
+        shape, states_offset = read_header(states_path)
+        if not 0 <= start < shape[0]:
+            raise ValueError(f'The window starts at row {start}, but the log {path} has {shape[0]} rows')
+        time_offset = read_header(time_path)[1]
+        stop = min(stop, shape[0])
+        stop = min(stop + amber_tail(states_path, states_offset, shape, stop) + padding, shape[0])
+        rows = stop - start
+        if rows == 0:
+            return cls(np.zeros((0, shape[1]), dtype=np.uint8), np.zeros(0, dtype=np.int64), columns, start)
+
+        # The byte offset of a row is the header plus the size of all the rows before it.
+        states = np.memmap(states_path, dtype=np.uint8, mode=mmap_mode, offset=states_offset + start * shape[1],
+                           shape=(rows, shape[1]))
+        time = np.memmap(time_path, dtype=np.int64, mode='r', offset=time_offset + start * 8, shape=(rows,))
+        return cls(states, time, columns, start)
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def column(self, col: str) -> np.ndarray:
+        """
+        Gets all the states of one column, without copying them. The view starts at the offset row.
+        :param col: The column name.
+        :return: A view on the column of the state matrix.
+        """
+        return self.states[:, self.column_index[col]]
+
+    def read(self, row: int, col: str):
+        """
+        Reads one cell of the log.
+        :param row: The row to read, as a row of the full log.
+        :param col: The column to read.
+        :return: The formatted time for the time column, otherwise the state code.
+        """
+        row -= self.offset
+        if col == TIME_COLUMN:
+            return format_time(self.time[row])
+        return int(self.states[row, self.column_index[col]])
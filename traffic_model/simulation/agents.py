@@ -2,6 +2,24 @@ from mesa import Agent
 import math
 import numpy as np
 
+from .activation import AMBER, DETECTED, GREEN
+
+
+def torus_distance_squared(point_a: tuple, point_b: tuple, width: float, height: float) -> float:
+    """
+    Calculates the squared distance between two points around the edges of a space, like space.get_neighbors does.
+    :param point_a: The x, y coordinates of the first point.
+    :param point_b: The x, y coordinates of the second point.
+    :param width: The width of the space.
+    :param height: The height of the space.
+    :return: The squared distance.
+    """
+    x = abs(point_a[0] - point_b[0])
+    y = abs(point_a[1] - point_b[1])
+    x = min(x, width - x)
+    y = min(y, height - y)
+    return x * x + y * y
+
 
 def get_next_point(curr_point: tuple, target_point: tuple, distance_between_points: float, distance: float) -> tuple:
     """
@@ -70,9 +88,10 @@ class Node(Agent):
         self.connecting_lane = connecting_lane
 
 
-class Car(Agent):
+class Car:
     """
     A class used to represent a Car, used to drive in the simulation
+    The car has __slots__ instead of a Mesa Agent dictionary, finished cars are reused by the model with reset.
 
     1px = 0.6067808505563733m
     1m = 1.6480414618936536 px
@@ -80,101 +99,117 @@ class Car(Agent):
     50km/h =  2.2889464748522967 px per step
 
     Attributes:
+        unique_id: The unique agent ID.
+        model: The model where the agent is in.
         next_pos: The next position the car wants to move to. X, y tuple.
         active: Whether the car is active or not.
         steps_active: How many steps the car has been active.
         wait_at_light: How many steps the car has bee waiting at a red light.
         acceleration: The amount om pixels per step the car wants accelerate at.
         max_speed: The amount of pixels per step the car is allowed to move.
+        route: The Route the car drives over.
         pos: A x, y position tuple.
         current_node: The current node the car is at.
         next_node: The next node, where the car is moving to.
         end_node: The final node, the car stops at this node.
         agent_type: What type of agent this is.
-        lane: The lane which the car is driving on.
+        lane: The nodes of the route which the car is driving on.
         node_index: The current node index the car is at.
         distance_to_next_node: The distance in pixels to the next node.
         current_speed: The current amountof pixels per step the car is moving at.
+        queue: The LaneQueue of the lane of the next node.
+        ahead: The car in front of self in the queue.
+        behind: The car behind self in the queue.
     """
-    next_pos = None
-    active = True
-    steps_active = 0
-    wait_at_light = 0
+    __slots__ = ('unique_id', 'model', 'next_pos', 'active', 'steps_active', 'wait_at_light', 'route', 'pos',
+                 'current_node', 'next_node', 'end_node', 'agent_type', 'lane', 'node_index', 'distance_to_next_node',
+                 'current_speed', 'queue', 'ahead', 'behind')
     acceleration = 0.05722366187130742  # 1.25 km/h
     max_speed = 2.2889464748522967  # 50km/h
 
-    def __init__(self,
-                 unique_id: int,
-                 model,
-                 pos: tuple,
-                 lane: list,
-                 node_index: int,
-                 current_node: Node,
-                 next_node: Node,
-                 end_node: Node,
-                 agent_type: str = "car"
-                 ):
+    def __init__(self, unique_id: int, model, route, agent_type: str = "car"):
         """
         Constructor for the Car class.
         :param unique_id: The unique agent ID.
         :param model: The model where the agent is in.
-        :param pos: A x, y position tuple.
-        :param lane: The lane which the car is driving on.
-        :param node_index: The current node index the car is at.
-        :param current_node: The current node the car is at.
-        :param next_node: The next node, where the car is moving to.
-        :param end_node: The final node, the car stops at this node.
+        :param route: The Route the car drives over, it starts at its start node.
         :param agent_type: What type of agent this is.
         """
-        super().__init__(unique_id, model)
-        self.pos = pos
-        self.current_node = current_node
-        self.next_node = next_node
-        self.end_node = end_node
+        self.model = model
         self.agent_type = agent_type
-        self.lane = lane
-        self.node_index = node_index
+        self.reset(unique_id, route)
+
+    def reset(self, unique_id: int, route) -> None:
+        """
+        Puts the car at the start of a new route, as if it was just made.
+        :param unique_id: The unique agent ID.
+        :param route: The Route the car drives over.
+        :return: None.
+        """
+        self.unique_id = unique_id
+        self.active = True
+        self.steps_active = 0
+        self.wait_at_light = 0
+        self.route = route
+        self.pos = route.start_node.pos
+        self.next_pos = self.pos
+        self.current_node = route.start_node
+        self.next_node = route.next_node
+        self.end_node = route.end_node
+        self.lane = route.nodes
+        self.node_index = 0
         self.distance_to_next_node = math.dist(self.pos, self.next_node.pos)
         self.current_speed = self.max_speed
+        self.queue = None
+        self.ahead = None
+        self.behind = None
 
     def get_next_car(self, radius: int) -> tuple:
         """
-        Gets the next car object and the distance to it.
+        Gets the next car object and the distance to it, the car in front of self in the queue of its lane.
+        The car counts within the radius like space.get_neighbors, a car at exactly the same point is not seen.
         :param radius: How far do we scan for the next car.
         :return: A tuple with a car object and how far away it is. If there are no cars found, None is returned.
         """
-        neighbors = self.model.space.get_neighbors(self.pos, radius, False)
-        dist_to_end = math.dist(self.pos, self.end_node.pos)
-        cars_in_front = {}
-        for n in neighbors:
-            if n.agent_type == 'car':
-                if n.active:
-                    if n.next_node.lane_id == self.next_node.lane_id:
-                        n_dist_end = math.dist(n.pos, self.end_node.pos)
-                        if dist_to_end > n_dist_end:
-                            cars_in_front[n_dist_end] = n
-        if len(cars_in_front) > 0:
-            next_car = cars_in_front[max(list(cars_in_front.keys()))]
-            return next_car, math.dist(self.pos, next_car.pos)
-        else:
-            return None
+        next_car = self.ahead
+        if next_car is not None:
+            space = self.model.space
+            squared = torus_distance_squared(self.pos, next_car.pos, space.width, space.height)
+            if 0 < squared <= radius ** 2:
+                return next_car, math.dist(self.pos, next_car.pos)
+        return None
 
-    def get_distance_to_light(self) -> tuple:
+    def lane_distance(self) -> float:
         """
-        Calculates distance from self to traffic light.
-        :return: A tuple with the distance to the light and the state of the light.
+        Calculates how far the car is along the lane of its next node, the order of the queue of the lane.
+        :return: The distance in pixels from the first node of the lane.
         """
-        return math.dist(self.pos, self.lane[0].light.pos), self.lane[0].light.state
+        return self.route.lane_offsets[self.node_index + 1] - self.distance_to_next_node
 
-    def move_agent(self, new_pos: tuple) -> None:
+    def join_queue(self) -> None:
         """
-        Moves the agent to the new position.
-        :param new_pos: a tuple with x, y position.
+        Moves the car to the queue of the lane of its next node, if it is not in there yet.
         :return: None.
         """
-        # Moves agent
-        self.pos = new_pos
-        self.model.space.move_agent(self, new_pos)
+        queue = self.model.lane_queues[self.next_node.lane_id]
+        if queue is not self.queue:
+            if self.queue is not None:
+                self.queue.leave(self)
+            queue.join(self)
+
+    def distance_to_end(self) -> float:
+        """
+        Calculates how far the car has to drive over its route to the end node.
+        :return: The distance in pixels.
+        """
+        return self.distance_to_next_node + sum(self.route.segments[self.node_index + 1:self.route.end_index])
+
+    def get_distance_to_light(self) -> tuple:
+        """
+        Calculates distance from self to traffic light.
+        :return: A tuple with the distance to the light and the state of the light.
+        """
+        return math.dist(self.pos, self.lane[0].light.pos), self.lane[0].light.state
 
     def get_next_node(self) -> bool:
         """
@@ -191,12 +226,18 @@ class Car(Agent):
     def stop_car(self) -> None:
         """
         Stops the car and submits all the statistics.
+        It leaves its queue at once, the model retires it after the step.
         :return: None.
         """
         # Stops car
-        self.model.finished_car_steps.append(self.steps_active)
-        self.model.finished_car_wait.append(self.wait_at_light)
+        self.model.finished_cars.add(self.route.lane_id, self.route.signal_group, self.steps_active,
+                                     self.wait_at_light)
+        if self.route.exit_lane is not None:
+            self.model.exits.append(self.route.exit_lane)
+        self.model.active_car_count -= 1
+        self.queue.leave(self)
         self.active = False
+        self.model.done_cars.append(self)
 
     def red_light(self) -> bool:
         """
@@ -226,29 +267,35 @@ class Car(Agent):
         :return: None.
         """
         next_car = self.get_next_car(60)
-        if next_car:
+        if next_car is not None:
             if next_car[1] <= self.current_speed + 15:  # 15px = 9.1017127583456m
                 self.current_speed = next_car[1] - 15  # Hier moet nog een getal vanaf
 
     def move_to_next_node(self) -> bool:
         """
         Gets the next node for a car to move to, if available.
+        The car is put on the node at once, the cars that step after it this step see it there.
+        When the next node is on another lane the car moves to its queue after the step, see Traffic.change_lanes.
         :return: If a node is available: True, else False.
         """
         if not self.get_next_node():
             self.stop_car()
             return False
         self.node_index += 1
-        self.move_agent(self.current_node.pos)
-        self.distance_to_next_node = math.dist(self.pos, self.next_node.pos)
+        self.pos = self.current_node.pos
+        self.distance_to_next_node = self.route.segments[self.node_index]
+        if self.next_node.lane_id != self.queue.lane_id:
+            self.model.lane_changes.append(self)
         return True
 
     def advance(self) -> None:
         """
         A function that Mesa requires to work, moves the agent.
+        The position wraps around the edges of the space, like an agent that is moved on it.
         :return: None.
         """
-        self.move_agent(self.next_pos)
+        if self.active:
+            self.pos = self.model.space.torus_adj(self.next_pos)
 
     def step(self) -> None:
         """
@@ -284,6 +331,7 @@ class Road(Agent):
     """
     A class used to represent a Road, used to connect two nodes. Mainly used for visualisation.
     Attributes:
+        pos: A x, y position tuple, the position of the start node.
         start_node: The node from where the road starts.
         end_node: The node where the roads ends.
         lane_id: The lane id of the lane this road is forming.
@@ -315,6 +363,7 @@ class Road(Agent):
         :param agent_type: What type of agent this is.
         """
         super().__init__(unique_id, model)
+        self.pos = start_node.pos
         self.start_node = start_node
         self.end_node = end_node
         self.lane_id = lane_id
@@ -333,6 +382,7 @@ class Sensor(Agent):
         sensor_id: The sensor id.
         start_pos: The x, y position that the sensor starts at.
         end_pos: The x, y position that the sensor ends at.
+        center: The x, y position of the middle of the sensor.
         lane_id: The lane id of where the sensor is.
         distance_from_light: The distance from the corresponding traffic light.
     """
@@ -369,38 +419,34 @@ class Sensor(Agent):
         self.sensor_id = sensor_id
         self.start_pos = start_pos
         self.end_pos = end_pos
+        self.center = tuple(np.average(np.array([start_pos, end_pos]), axis=0).tolist())
         self.lane_id = lane_id
         self.distance_from_light = distance_from_light
 
-    def car_on_sensor(self, threshold: int = 8) -> bool:
+    def car_on_sensor(self) -> bool:
         """
-        Function that checks if a car if on sensor.
-        :param threshold: How much space between the center of the sensor and the car.
+        Function that checks if a car if on sensor, with the LoopOccupancy of the model.
         :return: If there is a car on sensor: True, else False.
         """
-        neighbors = self.model.space.get_neighbors(np.average(np.array([self.start_pos, self.end_pos]), axis=0), 10,
-                                                   True)
-        for car in neighbors:
-            if car.agent_type == 'car':
-                if car.active:
-                    if math.dist(tuple(np.average(np.array([self.start_pos, self.end_pos]), axis=0)),
-                                 car.pos) <= threshold and car.next_node.lane_id == self.lane_id:
-                        self.model.sensor_on_car_found += 1
-                        return True
+        if self.model.loop_occupancy.occupied([self], self.model.lane_queues):
+            self.model.sensor_on_car_found += 1
+            return True
         self.model.sensor_on_no_car += 1
         return False
 
-    def step(self) -> None:
+    def update(self, data_state: int) -> None:
         """
-        Mesa requires this function. Takes care of all the sensor logic.
+        Takes care of all the sensor logic, called by the model when the state in the data changes.
+        A detecting sensor that does not spawn cars checks every step if there is a car on it.
+        :param data_state: The new state code from the activation data.
         :return: None.
         """
-        data_state = self.model.read_row_col(self.sensor_id)
-        if data_state != "|":
+        if data_state != DETECTED:
             self.state = 0
+            self.model.detecting_sensors.pop(self.unique_id, None)
         else:
             if self.sensor_id not in self.model.active_loops.keys():
-                self.car_on_sensor()
+                self.model.detecting_sensors[self.unique_id] = self
             self.state = 1
 
 
@@ -437,15 +483,15 @@ class Light(Agent):
         self.agent_type = agent_type
         self.light_id = light_id
 
-    def step(self) -> None:
+    def update(self, data_state: int) -> None:
         """
-        Mesa requires this function. Takes care of all the light logic.
+        Takes care of all the light logic, called by the model when the state in the data changes.
+        :param data_state: The new state code from the activation data.
         :return: None.
         """
-        data_state = self.model.read_row_col(self.light_id)
-        if data_state == '#':
+        if data_state == GREEN:
             self.state = 2
-        elif data_state == 'Z':
+        elif data_state == AMBER:
             self.state = 1
         else:
             self.state = 0
@@ -0,0 +1,365 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from .activation import DETECTED, OFF, compile_if_needed, read_header
+from .corridor import Corridor, ShardedCorridor
+from .intersection import load_intersection
+from .model import Traffic
+from .synthetic import generate_log
+
+# The fixed windows of the log, by name. The rush hour adds a car on every spawn loop every headway steps.
+# The recorded window is the morning with the few cars of the log only, where the engines are compared.
+WINDOWS = {
+    'night': {'start': 36000},
+    'morning': {'start': 252000},
+    'recorded': {'start': 252500},
+    'afternoon': {'start': 468000},
+    'evening': {'start': 576000},
+    'rush_hour': {'start': 252000, 'headway': 40}
+}
+
+# The steps a spawn loop detects a synthetic car.
+PULSE_STEPS = 5
+
+# Construction times within this many seconds of the baseline are noise, not a regression.
+NOISE_SECONDS = 0.05
+
+# The time of the morning window, the synthetic log of BOS211 starts at it for the corridor benchmark.
+MORNING_TIME = datetime(2020, 11, 2, 7, 59, 10)
+
+# The vehicles per hour of every induction loop of BOS211, it has no recorded log to measure them in.
+CORRIDOR_RATE = 300
+
+# The metrics of the simulation itself, a change means the results of the model changed.
+RESULT_METRICS = ('finished_cars', 'avg_car_steps', 'avg_car_wait', 'car_steps')
+
+
+def log_rows(intersection: str) -> int:
+    """
+    Gets the amount of rows in the activation log of an intersection, it is compiled first if needed.
+    :param intersection: The name of the intersection.
+    :return: The amount of rows.
+    """
+    states_path = compile_if_needed(load_intersection(intersection).activation_path)[0]
+    return read_header(states_path)[0][0]
+
+
+def memory_source() -> str:
+    """
+    Finds how the peak memory of this process can be measured: the resource module is only there on Unix,
+    psutil is optional and tracemalloc only sees the memory Python allocates itself.
+    :return: 'resource', 'psutil' or 'tracemalloc'.
+    """
+    try:
+        import resource
+        return 'resource'
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return 'psutil'
+    except ImportError:
+        return 'tracemalloc'
+
+
+def peak_memory_mb(source: str) -> float:
+    """
+    Measures the peak memory of this process so far.
+    :param source: How to measure it, see memory_source. For tracemalloc the tracing has to be started before.
+    :return: The peak memory in megabytes.
+    """
+    if source == 'resource':
+        import resource
+        # Linux gives the peak resident memory in kilobytes, macOS in bytes.
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    if source == 'psutil':
+        import psutil
+        # Windows keeps the peak working set, elsewhere only the current resident memory is known.
+        memory = psutil.Process().memory_info()
+        return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+    return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+
+
+def add_rush_hour(model: Traffic, headway: int) -> None:
+    """
+    Replaces the detections of the spawn loops with a car every headway steps on every loop, a bit apart per loop.
+    :param model: The model, before its first step.
+    :param headway: The steps between two cars on a loop.
+    :return: None
+    """
+    for index, loop in enumerate(model.active_loops.keys()):
+        model.data.assign(loop, 0, len(model.data), OFF)
+        for row in range(index * headway // len(model.active_loops), len(model.data), headway):
+            model.data.assign(loop, row, row + PULSE_STEPS, DETECTED)
+    model.index_transitions(model.step_count)
+
+
+def run_window(window: str, engine: str, steps: int, intersection: str = 'BOS210') -> dict:
+    """
+    Makes and runs the model of one window and measures it, best run in a fresh process for the peak memory.
+    :param window: The name of the window in WINDOWS.
+    :param engine: The engine of the model.
+    :param steps: The amount of steps to run.
+    :param intersection: The name of the intersection.
+    :return: The measurements and the results of the run.
+    """
+    settings = WINDOWS[window]
+    source = memory_source()
+    if source == 'tracemalloc':
+        tracemalloc.start()
+    started = time.perf_counter()
+    model = Traffic(width=750, height=750, max_steps=steps, start=settings['start'], intersection=intersection,
+                    engine=engine)
+    if 'headway' in settings:
+        add_rush_hour(model, settings['headway'])
+    construction_seconds = time.perf_counter() - started
+
+    # The schedule is where the engine moves the cars, the rest of a step is the same for both engines.
+    schedule = [0.0]
+    step_schedule = model.step_schedule
+
+    def timed_schedule() -> None:
+        schedule_started = time.perf_counter()
+        step_schedule()
+        schedule[0] += time.perf_counter() - schedule_started
+
+    model.step_schedule = timed_schedule
+    car_steps = 0
+    started = time.perf_counter()
+    while model.running:
+        model.step()
+        car_steps += model.active_car_count
+    run_seconds = time.perf_counter() - started
+
+    peak_rss_mb = peak_memory_mb(source)
+    if source == 'tracemalloc':
+        tracemalloc.stop()
+    return {
+        'window': window,
+        'engine': engine,
+        'start': settings['start'],
+        'steps': steps,
+        'construction_seconds': construction_seconds,
+        'run_seconds': run_seconds,
+        'schedule_seconds': schedule[0],
+        'steps_per_second': steps / run_seconds if run_seconds else 0.0,
+        'us_per_car_step': run_seconds / car_steps * 1e6 if car_steps else 0.0,
+        'peak_rss_mb': peak_rss_mb,
+        'memory_source': source,
+        'finished_cars': model.finished_cars.steps.count,
+        'avg_car_steps': model.calc_finished_car_steps(),
+        'avg_car_wait': model.calc_finished_car_wait(),
+        'car_steps': car_steps
+    }
+
+
+def run_isolated(arguments: tuple) -> dict:
+    """
+    Runs one window in a new process, so the memory and construction time of earlier runs do not count.
+    :param arguments: The arguments of run_window.
+    :return: The measurements and the results of the run.
+    """
+    with multiprocessing.Pool(1) as pool:
+        return pool.apply(run_window, arguments)
+
+
+def benchmark(windows: list, engines: list, steps: int, repeats: int = 3, intersection: str = 'BOS210',
+              out=print) -> dict:
+    """
+    Runs every window with every engine, the fastest of the repeats is kept.
+    The windows that are not in the log of the intersection are skipped.
+    With both engines the speedup of the vector engine is given per window, over the whole run and the schedule.
+    :param windows: The names of the windows.
+    :param engines: The engines.
+    :param steps: The amount of steps per run.
+    :param repeats: How many times every run is done.
+    :param intersection: The name of the intersection.
+    :param out: The function the progress lines are given to.
+    :return: The benchmark, with the machine, a result per window and engine and the speedups per window.
+    """
+    rows = log_rows(intersection)
+    results = {}
+    speedups = {}
+    skipped = []
+    for window in windows:
+        if WINDOWS[window]['start'] + steps > rows:
+            skipped.append(window)
+            out(f'{window}: skipped, the log of {intersection} has {rows} rows')
+            continue
+        for engine in engines:
+            runs = [run_isolated((window, engine, steps, intersection)) for _ in range(repeats)]
+            best = min(runs, key=lambda run: run['run_seconds'])
+            best['construction_seconds'] = min(run['construction_seconds'] for run in runs)
+            best['schedule_seconds'] = min(run['schedule_seconds'] for run in runs)
+            best['peak_rss_mb'] = max(run['peak_rss_mb'] for run in runs)
+            results[f'{window}/{engine}'] = best
+            out(f'{window}/{engine}: {best["steps_per_second"]:.0f} steps/s, '
+                f'{best["us_per_car_step"]:.1f} us per car step, {best["peak_rss_mb"]:.0f} MB')
+        if 'agent' in engines and 'vector' in engines:
+            agent, vector = results[f'{window}/agent'], results[f'{window}/vector']
+            speedups[window] = {'run': agent['run_seconds'] / vector['run_seconds'],
+                                'schedule': agent['schedule_seconds'] / vector['schedule_seconds']}
+            out(f'{window}: the vector engine runs {speedups[window]["run"]:.1f}x as fast, '
+                f'{speedups[window]["schedule"]:.1f}x in the schedule')
+    return {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor()},
+        'intersection': intersection,
+        'steps': steps,
+        'repeats': repeats,
+        'skipped': skipped,
+        'results': results,
+        'speedups': speedups
+    }
+
+
+def run_corridor(intersections: dict, engine: str, steps: int, sharded: bool) -> dict:
+    """
+    Runs BOS210 and BOS211 as a corridor from the morning window and measures it.
+    :param intersections: Per intersection name the parameters of its own.
+    :param engine: The engine of the models.
+    :param steps: The amount of steps to run.
+    :param sharded: Whether every intersection runs in its own process, otherwise both run in this process.
+    :return: The seconds it took, including making the models, the windows that were exchanged and the metrics.
+    """
+    parameters = {'width': 750, 'height': 750, 'start': WINDOWS['morning']['start'], 'max_steps': steps,
+                  'engine': engine}
+    started = time.perf_counter()
+    if sharded:
+        corridor = ShardedCorridor(intersections, **parameters)
+        metrics = corridor.run()
+        exchanges = corridor.exchanges
+    else:
+        corridor = Corridor(intersections, **parameters)
+        while corridor.running:
+            corridor.step()
+        metrics = corridor.metrics()
+        exchanges = 0
+    return {'seconds': time.perf_counter() - started, 'exchanges': exchanges, 'metrics': metrics}
+
+
+def benchmark_corridor(engines: list, steps: int, repeats: int = 3, out=print) -> dict:
+    """
+    Times the corridor of BOS210 and BOS211 in one process and with every intersection in its own process.
+    BOS211 gets a synthetic log that starts at the morning window. The runs are not isolated, the shards are
+    processes of their own already. A speedup needs a free processor per shard, see processors.
+    :param engines: The engines.
+    :param steps: The amount of steps per run.
+    :param repeats: How many times every run is done.
+    :param out: The function the progress lines are given to.
+    :return: Per engine the best seconds of both, the speedup and if both gave the same metrics.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        intersection = load_intersection('BOS211')
+        rates = {loop: CORRIDOR_RATE for loop in intersection.bundle['sensor_names'].tolist()}
+        log = generate_log(Path(directory) / 'BOS211.csv', intersection, steps + 1, rates, start=MORNING_TIME)
+        intersections = {'BOS210': {}, 'BOS211': {'activation_path': str(log), 'start': 0}}
+        for engine in engines:
+            one = [run_corridor(intersections, engine, steps, False) for _ in range(repeats)]
+            sharded = [run_corridor(intersections, engine, steps, True) for _ in range(repeats)]
+            one_seconds = min(run['seconds'] for run in one)
+            sharded_seconds = min(run['seconds'] for run in sharded)
+            results[engine] = {
+                'one_process_seconds': one_seconds,
+                'sharded_seconds': sharded_seconds,
+                'speedup': one_seconds / sharded_seconds,
+                'exchanges': sharded[0]['exchanges'],
+                'same_results': all(run['metrics'] == one[0]['metrics'] for run in one + sharded)
+            }
+            out(f'corridor/{engine}: {one_seconds:.2f} s in one process, {sharded_seconds:.2f} s sharded '
+                f'({results[engine]["speedup"]:.2f}x, {results[engine]["exchanges"]} exchanges)')
+    return {'steps': steps, 'repeats': repeats, 'processors': os.cpu_count(), 'results': results}
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """
+    Compares the results of a benchmark with a baseline, for the runs that are in both.
+    A run is slower when it does fewer steps per second or takes longer to construct (beyond NOISE_SECONDS),
+    and heavier when it uses more memory, all by more than the tolerance.
+    The memory is only compared when both were measured the same way.
+    Any change of the results of the model itself is listed too.
+    :param results: The benchmark.
+    :param baseline: The benchmark that is the baseline.
+    :param tolerance: The fraction a measurement can be worse before it is a regression.
+    :return: The regressions, as lines of text.
+    """
+    regressions = []
+    for name, run in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        if run['steps_per_second'] < base['steps_per_second'] * (1 - tolerance):
+            regressions.append(f'{name}: {run["steps_per_second"]:.0f} steps/s, '
+                               f'the baseline does {base["steps_per_second"]:.0f}')
+        if run['construction_seconds'] > base['construction_seconds'] * (1 + tolerance) + NOISE_SECONDS:
+            regressions.append(f'{name}: constructed in {run["construction_seconds"]:.3f} s, '
+                               f'the baseline in {base["construction_seconds"]:.3f} s')
+        same_source = run.get('memory_source', 'resource') == base.get('memory_source', 'resource')
+        if same_source and run['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f'{name}: {run["peak_rss_mb"]:.0f} MB, the baseline uses {base["peak_rss_mb"]:.0f} MB')
+        if run['steps'] == base['steps']:
+            for metric in RESULT_METRICS:
+                if run[metric] != base[metric]:
+                    regressions.append(f'{name}: {metric} is {run[metric]}, in the baseline {base[metric]}')
+    return regressions
+
+
+def main(argv: list = None) -> list:
+    """
+    Runs the benchmark from the command line, writes it and compares it with the baseline.
+    The process exits with 1 when there are regressions.
+    :param argv: The arguments, the arguments of the process when None.
+    :return: The regressions.
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks the traffic simulation over fixed windows of the log.')
+    parser.add_argument('--windows', nargs='+', choices=list(WINDOWS), default=list(WINDOWS),
+                        help='The windows to run.')
+    parser.add_argument('--engines', nargs='+', choices=('agent', 'vector'), default=['agent', 'vector'],
+                        help='The engines to run every window with.')
+    parser.add_argument('--steps', type=int, default=6000, help='The amount of steps per run, 10 per second.')
+    parser.add_argument('--repeats', type=int, default=3, help='How many times every run is done, the best counts.')
+    parser.add_argument('--intersection', default='BOS210', help='The name of the intersection.')
+    parser.add_argument('--corridor', action='store_true',
+                        help='Also time BOS210 and BOS211 as a corridor, in one process and sharded.')
+    parser.add_argument('--output', type=Path, default=Path('benchmark.json'), help='The file the results go to.')
+    parser.add_argument('--baseline', type=Path, default=Path('benchmarks/baseline.json'),
+                        help='The baseline to compare with, it is skipped when the file does not exist.')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='The fraction a measurement can be worse than the baseline.')
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.windows, args.engines, args.steps, args.repeats, args.intersection)
+    if args.corridor:
+        results['corridor'] = benchmark_corridor(args.engines, args.steps, args.repeats)
+    paths = [args.output]
+    regressions = []
+    if args.save_baseline:
+        paths.append(args.baseline)
+    elif args.baseline.exists():
+        with open(args.baseline) as json_file:
+            regressions = compare(results, json.load(json_file), args.tolerance)
+    for path in paths:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as json_file:
+            json.dump(results, json_file, indent=4)
+    for regression in regressions:
+        print(f'regression: {regression}')
+    if regressions:
+        sys.exit(1)
+    return regressions
+
+
+if __name__ == '__main__':
+    main()
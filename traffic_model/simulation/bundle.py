@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+# The version of the bundle layout, a bundle with another version is compiled again.
+BUNDLE_VERSION = 1
+
+
+def source_paths(name: str, directory: Path) -> list:
+    """
+    Gets the paths of the json files a bundle is compiled from.
+    :param name: The name of the intersection.
+    :param directory: The folder with the data.
+    :return: A list with the lane, sensor and signal group paths.
+    """
+    directory = Path(directory)
+    return [directory / f'lane_done_{name}.json', directory / f'sensors_done_{name}.json',
+            directory / f'signalgroup_{name}.json']
+
+
+def bundle_path(name: str, directory: Path) -> Path:
+    """
+    Gets the path of the bundle of an intersection.
+    :param name: The name of the intersection.
+    :param directory: The folder with the data.
+    :return: The path of the bundle.
+    """
+    return Path(directory) / f'{name}.bundle.npz'
+
+
+def source_hash(name: str, directory: Path) -> str:
+    """
+    Hashes the content of the json files of an intersection, a missing signal group file counts as empty.
+    :param name: The name of the intersection.
+    :param directory: The folder with the data.
+    :return: The sha256 hex digest.
+    """
+    digest = hashlib.sha256(str(BUNDLE_VERSION).encode())
+    for path in source_paths(name, directory):
+        digest.update(path.name.encode())
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def offsets(lengths: list) -> np.ndarray:
+    """
+    Turns a list of lengths into the start offsets of every part, plus the total length at the end.
+    :param lengths: The lengths of the parts.
+    :return: An int64 array with one offset more than there are parts.
+    """
+    return np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+
+
+def compile_bundle(name: str, directory: Path) -> Path:
+    """
+    Compiles the json files of an intersection into one bundle with flat arrays.
+    Only the vehicle lanes and the induction loops are kept, in the order of the json files.
+    :param name: The name of the intersection.
+    :param directory: The folder with the data, the bundle is written there as well.
+    :return: The path of the bundle.
+    """
+    lane_path, sensor_path, sgr_path = source_paths(name, directory)
+    with open(lane_path) as json_file:
+        lanes = [lane for lane in json.load(json_file) if lane['laneAttributes']['type_lane'] == 'vehicle']
+    with open(sensor_path) as json_file:
+        sensors = [sensor for sensor in json.load(json_file) if sensor['sensorDeviceType'] == 'inductionLoop']
+    sgr_data = {}
+    if sgr_path.exists():
+        with open(sgr_path) as json_file:
+            sgr_data = json.load(json_file)
+
+    # Every signal group that is in a relation gets a row and a column, -1 means there is no conflict.
+    signal_groups = sorted(set(sgr_data) | {to_sg for clearances in sgr_data.values() for to_sg in clearances})
+    clearance = np.full((len(signal_groups), len(signal_groups)), -1, dtype=np.int16)
+    for from_sg, clearances in sgr_data.items():
+        for to_sg, clear_time in clearances.items():
+            clearance[signal_groups.index(from_sg), signal_groups.index(to_sg)] = int(clear_time)
+
+    arrays = {
+        'source_hash': np.array(source_hash(name, directory)),
+        'lane_ids': np.array([lane['laneID'] for lane in lanes], dtype=str),
+        'lane_stop_line': np.array([lane['nodes'][0]['attribute'] == 'stopLine' for lane in lanes], dtype=bool),
+        'lane_connects_to': np.array([lane['connectsTo']['lane'] for lane in lanes], dtype=str),
+        'lane_signal_group': np.array([lane['connectsTo']['signalGroup'] for lane in lanes], dtype=str),
+        'lane_node_offsets': offsets([len(lane['nodes']) for lane in lanes]),
+        'node_xy': np.array([node['ref_pos'] for lane in lanes for node in lane['nodes']],
+                            dtype=np.float64).reshape(-1, 2),
+        'node_stop_line': np.array([node['attribute'] == 'stopLine' for lane in lanes for node in lane['nodes']],
+                                   dtype=bool),
+        'lane_regional_offsets': offsets([len(lane['regional']) for lane in lanes]),
+        'regional_xy': np.array([node['ref_pos'] for lane in lanes for node in lane['regional']],
+                                dtype=np.float64).reshape(-1, 2),
+        'sensor_names': np.array([sensor['name'] for sensor in sensors], dtype=str),
+        'sensor_lanes': np.array([sensor['laneID'] for sensor in sensors], dtype=str),
+        'sensor_gen': np.array(['gen' in sensor for sensor in sensors], dtype=bool),
+        'sensor_distance': np.array([int(sensor['distance']) for sensor in sensors], dtype=np.int64),
+        'sensor_xy': np.array([sensor['sensorRefPos'] for sensor in sensors], dtype=np.float64).reshape(-1, 2, 2),
+        'signal_groups': np.array(signal_groups, dtype=str),
+        'clearance': clearance
+    }
+    # The bundle is written next to its path first and then moved in place, so a process that compiles
+    # the same bundle at the same time never reads a half written one.
+    path = bundle_path(name, directory)
+    temporary_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(temporary_path, 'wb') as bundle_file:
+            np.savez(bundle_file, **arrays)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if temporary_path.exists():
+            os.remove(temporary_path)
+        raise
+    return path
+
+
+def read_bundle(path: Path) -> dict:
+    """
+    Reads all the arrays of a bundle at once.
+    :param path: The path of the bundle.
+    :return: A dictionary with the arrays.
+    """
+    with np.load(path) as bundle:
+        return {key: bundle[key] for key in bundle.files}
+
+
+def load_bundle(name: str, directory: Path) -> dict:
+    """
+    Loads the bundle of an intersection, it is compiled again when the json files changed.
+    Without json files an existing bundle is used as it is.
+    :param name: The name of the intersection.
+    :param directory: The folder with the data.
+    :return: A dictionary with all the arrays of the bundle.
+    """
+    path = bundle_path(name, directory)
+    if path.exists():
+        arrays = read_bundle(path)
+        has_source = source_paths(name, directory)[0].exists()
+        if not has_source or str(arrays['source_hash']) == source_hash(name, directory):
+            return arrays
+    compile_bundle(name, directory)
+    return read_bundle(path)
@@ -0,0 +1,145 @@
+from pathlib import Path
+
+import numpy as np
+
+
+class ColumnCollector:
+    """
+    A class used to represent the collected model data, a row every interval of steps in preallocated NumPy columns.
+    It takes the place of the Mesa DataCollector, which keeps a Python list per reporter with a value every step.
+    It has the members of the DataCollector that Mesa itself uses, for the BatchRunner and the ChartModule.
+    Attributes:
+        reporters: Per column the name of the model attribute that is collected.
+        agent_reporters: None, no agent data is collected.
+        interval: Every how many steps a row is collected.
+        rows: The amount of rows that are collected.
+        calls: The amount of steps that were offered to the collector, collected or not.
+        steps: The model step of every row.
+        values: Per column the array with the values.
+    """
+
+    def __init__(self, reporters: dict, length: int, interval: int = 1):
+        """
+        Constructor for the ColumnCollector class.
+        :param reporters: Per column the name of the model attribute to collect.
+        :param length: The amount of steps the model runs for, the columns get room for all of their rows.
+        :param interval: Every how many steps a row is collected, the first step is always collected.
+        """
+        if interval < 1:
+            raise ValueError(f'The collect interval needs to be at least 1, not {interval}')
+        self.reporters = dict(reporters)
+        self.agent_reporters = None
+        self.interval = interval
+        self.rows = 0
+        self.calls = 0
+        capacity = max(1, -(-length // interval))
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        self.values = {name: np.zeros(capacity) for name in self.reporters}
+
+    def grow(self, needed: int) -> None:
+        """
+        Makes room for more rows, for a model that runs longer than it was made for.
+        :param needed: The amount of rows that need to fit.
+        :return: None
+        """
+        capacity = max(needed, 2 * len(self.steps))
+        self.steps = np.concatenate((self.steps, np.zeros(capacity - len(self.steps), dtype=np.int64)))
+        for name, values in self.values.items():
+            self.values[name] = np.concatenate((values, np.zeros(capacity - len(values))))
+
+    def collect(self, model, steps: int = 1) -> None:
+        """
+        Offers one or more steps to the collector, which all have the current values of the model.
+        A row is written for every offered step that is a multiple of the interval.
+        :param model: The model to read the attributes of, its step_count is the last offered step.
+        :param steps: The amount of steps, more than one when the model jumped over steps without changes.
+        :return: None
+        """
+        first = self.calls
+        self.calls += steps
+        due = np.arange(first + (-first % self.interval), self.calls, self.interval)
+        if len(due) == 0:
+            return
+        end = self.rows + len(due)
+        if end > len(self.steps):
+            self.grow(end)
+        self.steps[self.rows:end] = model.step_count - (self.calls - 1 - due)
+        for name, attribute in self.reporters.items():
+            self.values[name][self.rows:end] = getattr(model, attribute)
+        self.rows = end
+
+    def load(self, columns: dict, calls: int) -> None:
+        """
+        Replaces the collected rows, to continue collecting from a snapshot.
+        :param columns: The step column and a column per reporter, like columns gives them.
+        :param calls: The amount of steps that were offered to the collector.
+        :return: None
+        """
+        rows = len(columns['step'])
+        if rows > len(self.steps):
+            self.grow(rows)
+        self.steps[:rows] = columns['step']
+        for name in self.values:
+            self.values[name][:rows] = columns[name]
+        self.rows = rows
+        self.calls = calls
+
+    def columns(self) -> dict:
+        """
+        Gets the collected rows.
+        :return: A dictionary with the step column and a column per reporter, as arrays.
+        """
+        columns = {'step': self.steps[:self.rows]}
+        for name, values in self.values.items():
+            columns[name] = values[:self.rows]
+        return columns
+
+    @property
+    def model_reporters(self) -> dict:
+        """
+        The reporters, like the model_reporters of a Mesa DataCollector.
+        :return: Per column the name of the model attribute that is collected.
+        """
+        return self.reporters
+
+    @property
+    def model_vars(self) -> dict:
+        """
+        The collected values, like the model_vars of a Mesa DataCollector, the ChartModule reads the last one.
+        :return: Per reporter an array with the values.
+        """
+        return {name: values[:self.rows] for name, values in self.values.items()}
+
+    def get_model_vars_dataframe(self):
+        """
+        Gets the collected rows as a pandas DataFrame, like a Mesa DataCollector, the BatchRunner calls this.
+        :return: A DataFrame with a column per reporter and the step of every row as index.
+        """
+        import pandas
+        return pandas.DataFrame(self.model_vars, index=pandas.Index(self.steps[:self.rows], name='step'))
+
+    def to_npz(self, path: Path) -> Path:
+        """
+        Writes the collected rows to a npz file, with an array per column.
+        :param path: The path of the file.
+        :return: The path of the file.
+        """
+        path = Path(path)
+        with open(path, 'wb') as npz_file:
+            np.savez(npz_file, **self.columns())
+        return path
+
+    def to_parquet(self, path: Path) -> Path:
+        """
+        Writes the collected rows to a Parquet file, this needs pyarrow.
+        :param path: The path of the file.
+        :return: The path of the file.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as error:
+            raise ImportError('Writing Parquet files needs pyarrow, use to_npz without it') from error
+        path = Path(path)
+        pyarrow.parquet.write_table(pyarrow.table(self.columns()), path)
+        return path
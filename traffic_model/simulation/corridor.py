@@ -0,0 +1,452 @@
+import argparse
+import heapq
+import json
+import multiprocessing
+from collections import namedtuple
+from pathlib import Path
+
+from .intersection import load_intersection
+from .model import Traffic
+from .statistics import Accumulator
+from .sweep import prepare
+
+# A lane out of one intersection that leads to a lane in of another, the cars drive over it in delay steps.
+Link = namedtuple('Link', ['source', 'exit_lane', 'target', 'entry_lane', 'delay'])
+
+# The links between BOS210 and BOS211, the lanes out of one are the same road as the lanes in of the other.
+BOS_LINKS = (
+    Link('BOS210', '15', 'BOS211', '15', 1),
+    Link('BOS210', '17', 'BOS211', '14', 1),
+    Link('BOS210', '18', 'BOS211', '13', 1),
+    Link('BOS211', '21', 'BOS210', '1', 1),
+    Link('BOS211', '20', 'BOS210', '2', 1)
+)
+
+
+class Corridor:
+    """
+    A class used to represent intersections that are simulated together, the cars that leave one over a link
+    enter the next. Every intersection is a Traffic model with its own activation log, lights and spawn loops,
+    the models do their steps together.
+    A corridor can also be one shard of a ShardedCorridor, the cars on links to the intersections of other shards
+    are then kept in the outbox and the cars from them are given to receive.
+    Attributes:
+        models: The Traffic model per intersection name.
+        links: The Link per intersection name and exit lane.
+        fast_forward: Whether the steps without cars in any model or on any link are jumped over.
+        steps: The amount of steps the corridor did.
+        max_steps: The amount of steps the corridor runs for.
+        in_transit: A heap with the cars on a link: the step they enter, the step, intersection and order they left
+            in, and the intersection and lane they enter.
+        outbox: The cars that left to an intersection of another shard, in the same form.
+        handed_off: The amount of cars that drove over a link.
+        running: Whether the models are still running.
+    """
+
+    def __init__(self, intersections: dict, links: tuple = BOS_LINKS, fast_forward: bool = False, **parameters):
+        """
+        Constructor for the Corridor class.
+        :param intersections: Per intersection name the parameters of its Traffic model that are its own,
+            for example the activation_path or the light_settings.
+        :param links: The links between the intersections, also the links to intersections of other shards.
+        :param fast_forward: Whether to jump over the steps without cars, in all the models at once.
+        :param parameters: The parameters of Traffic that all the models share, for example max_steps or engine.
+        """
+        check_links(links)
+        self.links = {(link.source, link.exit_lane): link for link in links}
+        self.models = {}
+        for name, own in intersections.items():
+            model_parameters = dict(parameters)
+            model_parameters.update(own)
+            if model_parameters.get('max_steps', 72000) != parameters.get('max_steps', 72000):
+                raise ValueError('All the intersections of a corridor need the same max_steps')
+            self.models[name] = Traffic(
+                intersection=name,
+                exit_lanes=tuple(link.exit_lane for link in links if link.source == name),
+                entry_lanes=tuple(link.entry_lane for link in links if link.target == name),
+                **model_parameters)
+        self.fast_forward = fast_forward
+        self.steps = 0
+        self.max_steps = parameters.get('max_steps', 72000)
+        self.in_transit = []
+        self.outbox = []
+        self.handed_off = 0
+        self.running = True
+
+    def step(self, limit: int = None) -> None:
+        """
+        Does a step in all the models. The cars that arrive over a link enter their model before its step,
+        the cars that left a model during the step are put on their link after it.
+        In fast forward mode the steps without cars are jumped over first, up to the next car on a link.
+        :param limit: The step the fast forward stops at, the end of the run when None.
+        :return: None
+        """
+        models = self.models.values()
+        if self.fast_forward and all(model.active_car_count == 0 for model in models):
+            limit = self.max_steps if limit is None else limit
+            target = min([model.next_spawn_step() - model.step_count + self.steps for model in models]
+                         + [limit] + [car[0] for car in self.in_transit[:1]]) - 1
+            if target > self.steps:
+                for model in models:
+                    model.skip_empty_steps(model.step_count + target - self.steps)
+                self.steps = target
+
+        self.steps += 1
+        while self.in_transit and self.in_transit[0][0] <= self.steps:
+            car = heapq.heappop(self.in_transit)
+            self.models[car[4]].enter(car[5])
+        for model in models:
+            model.step()
+        for name, model in self.models.items():
+            for index, lane_id in enumerate(model.exits):
+                link = self.links[name, lane_id]
+                car = (self.steps + link.delay, self.steps, name, index, link.target, link.entry_lane)
+                if link.target in self.models:
+                    heapq.heappush(self.in_transit, car)
+                else:
+                    self.outbox.append(car)
+                self.handed_off += 1
+            model.exits.clear()
+        self.running = self.steps < self.max_steps
+
+    def run(self, until: int) -> None:
+        """
+        Does steps until a step, or until the end of the run.
+        :param until: The step to stop at.
+        :return: None
+        """
+        until = min(until, self.max_steps)
+        while self.steps < until:
+            self.step(until)
+
+    def receive(self, cars: list) -> None:
+        """
+        Puts the cars that left an intersection of another shard on their links.
+        :param cars: The cars, from the outbox of the other shard.
+        :return: None
+        """
+        for car in cars:
+            heapq.heappush(self.in_transit, car)
+
+    def earliest_exit(self) -> int:
+        """
+        Gets the first step a car can leave over a link to an intersection of another shard.
+        The cars have to drive to the lane out first, see Traffic.steps_to_leave.
+        :return: The step, after the end of the run when there are no such links.
+        """
+        steps = [model.steps_to_leave({link.exit_lane for link in self.links.values()
+                                       if link.source == name and link.target not in self.models})
+                 for name, model in self.models.items()]
+        return self.steps + min(steps, default=self.max_steps)
+
+    def finished_cars(self) -> tuple:
+        """
+        Gets the steps and wait steps of the finished cars of all the models together.
+        A car that drives through more intersections counts once in every one of them.
+        :return: A tuple with the Accumulator of the steps and the Accumulator of the wait steps.
+        """
+        return merge_finished([model.finished_cars for model in self.models.values()])
+
+    def metrics(self) -> dict:
+        """
+        Gets the averages of the finished cars per intersection and of the whole corridor.
+        :return: A dictionary with per intersection name and for 'corridor' the finished cars and the averages.
+        """
+        return corridor_metrics({name: (model.finished_cars, model.active_car_count)
+                                 for name, model in self.models.items()},
+                                self.handed_off, len(self.in_transit) + len(self.outbox))
+
+
+class ShardedCorridor:
+    """
+    A class used to represent a corridor that is split over worker processes, every shard is a Corridor
+    of one or more intersections in its own process.
+    The shards run a synchronization window of steps at once and only send the cars on the links between them.
+    A window ends before the first step a car can arrive from another shard: the first step a car can leave that
+    shard plus the delay of its link. So a car never has to enter before its shard received it, and the results
+    are the same as those of one Corridor with all the intersections.
+    Attributes:
+        shards: The intersection names of every shard.
+        shard_of: The index of the shard per intersection name.
+        window: The least amount of steps the shards run between two exchanges, the shortest delay of the links.
+        delays: Per shard the shortest delay of its links to other shards, None without such links.
+        earliest_exits: Per shard the first step a car can leave it to another shard, sent after every window.
+        exchanges: The amount of windows that were run.
+        steps: The amount of steps the corridor did.
+        max_steps: The amount of steps the corridor runs for.
+        mailboxes: The cars every shard receives at the start of the next window.
+        connections: The pipe to every worker.
+        processes: The worker processes.
+    """
+
+    def __init__(self, intersections: dict, links: tuple = BOS_LINKS, shards: list = None,
+                 fast_forward: bool = False, **parameters):
+        """
+        Constructor for the ShardedCorridor class, it starts the workers.
+        :param intersections: Per intersection name the parameters of its Traffic model that are its own.
+        :param links: The links between the intersections.
+        :param shards: The intersection names of every shard, every intersection in its own shard when None.
+        :param fast_forward: Whether every shard jumps over its steps without cars.
+        :param parameters: The parameters of Traffic that all the models share.
+        """
+        check_links(links)
+        self.shards = [list(names) for names in shards] if shards else [[name] for name in intersections]
+        self.shard_of = {name: index for index, names in enumerate(self.shards) for name in names}
+        if sorted(self.shard_of) != sorted(intersections) or sum(map(len, self.shards)) != len(intersections):
+            raise ValueError('Every intersection needs to be in exactly one shard')
+        self.max_steps = parameters.get('max_steps', 72000)
+        self.delays = [None] * len(self.shards)
+        for link in links:
+            if link.source in self.shard_of and link.target in self.shard_of:
+                source = self.shard_of[link.source]
+                if source != self.shard_of[link.target]:
+                    self.delays[source] = min(link.delay, self.delays[source] or link.delay)
+        self.window = min([delay for delay in self.delays if delay is not None], default=self.max_steps)
+        self.earliest_exits = [1] * len(self.shards)
+        self.exchanges = 0
+        self.steps = 0
+        self.mailboxes = [[] for _ in self.shards]
+
+        # The logs are compiled before the workers start, so they do not compile the same log at once.
+        for name, own in intersections.items():
+            prepare(name, own.get('activation_path', parameters.get('activation_path')))
+        self.connections = []
+        self.processes = []
+        for names in self.shards:
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_shard, daemon=True,
+                args=(worker_connection, {name: intersections[name] for name in names}, links, fast_forward,
+                      parameters))
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def run(self) -> dict:
+        """
+        Runs all the windows, exchanges the cars between the shards after every window and stops the workers.
+        :return: The metrics, like Corridor.metrics.
+        """
+        try:
+            while self.steps < self.max_steps:
+                until = min([earliest + delay - 1 for earliest, delay in zip(self.earliest_exits, self.delays)
+                             if delay is not None] + [self.max_steps])
+                for connection, mailbox in zip(self.connections, self.mailboxes):
+                    connection.send(('run', until, mailbox))
+                self.mailboxes = [[] for _ in self.shards]
+                for index, connection in enumerate(self.connections):
+                    cars, self.earliest_exits[index] = receive(connection)
+                    for car in cars:
+                        self.mailboxes[self.shard_of[car[4]]].append(car)
+                self.steps = until
+                self.exchanges += 1
+
+            models = {}
+            handed_off = 0
+            in_transit = sum(map(len, self.mailboxes))
+            for connection in self.connections:
+                connection.send(('metrics',))
+                shard_models, shard_handed_off, shard_in_transit = receive(connection)
+                models.update(shard_models)
+                handed_off += shard_handed_off
+                in_transit += shard_in_transit
+        finally:
+            self.close()
+        return corridor_metrics({name: models[name] for name in self.shard_of}, handed_off, in_transit)
+
+    def close(self) -> None:
+        """
+        Stops the workers.
+        :return: None
+        """
+        for connection in self.connections:
+            try:
+                connection.send(('stop',))
+            except OSError:
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+
+def run_shard(connection, intersections: dict, links: tuple, fast_forward: bool, parameters: dict) -> None:
+    """
+    Runs one shard of a ShardedCorridor in a worker process, until it is stopped.
+    Every message is answered, with the exception instead when it failed:
+    ('run', until, cars) receives the cars and runs the shard until the step, it answers with its outbox and the
+    first step a car can leave it to another shard.
+    ('metrics',) answers with the statistics and active cars per intersection, the handed off cars and the cars
+    in transit. ('stop',) stops the worker.
+    :param connection: The pipe to the main process.
+    :param intersections: Per intersection name of the shard the parameters of its own.
+    :param links: All the links of the corridor.
+    :param fast_forward: Whether the shard jumps over its steps without cars.
+    :param parameters: The parameters of Traffic that all the models share.
+    :return: None
+    """
+    try:
+        corridor = Corridor(intersections, links, fast_forward, **parameters)
+    except Exception as error:
+        corridor = error
+    while True:
+        message = connection.recv()
+        if message[0] == 'stop':
+            break
+        try:
+            if isinstance(corridor, Exception):
+                raise corridor
+            if message[0] == 'run':
+                corridor.receive(message[2])
+                corridor.run(message[1])
+                answer = corridor.outbox, corridor.earliest_exit()
+                corridor.outbox = []
+            else:
+                answer = ({name: (model.finished_cars, model.active_car_count)
+                           for name, model in corridor.models.items()},
+                          corridor.handed_off, len(corridor.in_transit) + len(corridor.outbox))
+        except Exception as error:
+            answer = error
+        connection.send(answer)
+    connection.close()
+
+
+def receive(connection):
+    """
+    Receives the answer of a worker.
+    :param connection: The pipe to the worker.
+    :return: The answer.
+    """
+    answer = connection.recv()
+    if isinstance(answer, Exception):
+        raise RuntimeError('A shard of the corridor failed') from answer
+    return answer
+
+
+def check_links(links: tuple) -> None:
+    """
+    Checks if the cars need at least one step to drive over every link.
+    :param links: The links.
+    :return: None
+    """
+    for link in links:
+        if link.delay < 1:
+            raise ValueError(f'A link needs a delay of at least 1 step, not {link.delay}')
+
+
+def merge_finished(statistics: list) -> tuple:
+    """
+    Adds the finished cars of more models together, in order.
+    :param statistics: The CarStatistics of the models.
+    :return: A tuple with the Accumulator of the steps and the Accumulator of the wait steps.
+    """
+    steps = Accumulator()
+    wait = Accumulator()
+    for finished in statistics:
+        steps.merge(finished.steps)
+        wait.merge(finished.wait)
+    return steps, wait
+
+
+def corridor_metrics(models: dict, handed_off: int, in_transit: int) -> dict:
+    """
+    Gets the averages of the finished cars per intersection and of the whole corridor.
+    :param models: Per intersection name, in the order of the corridor, its CarStatistics and active cars.
+    :param handed_off: The amount of cars that drove over a link.
+    :param in_transit: The amount of cars that are still on a link.
+    :return: A dictionary with per intersection name and for 'corridor' the finished cars and the averages.
+    """
+    metrics = {}
+    for name, (finished, active_cars) in models.items():
+        metrics[name] = {'finished_cars': finished.steps.count, 'avg_car_steps': finished.steps.mean(),
+                         'avg_car_wait': finished.wait.mean(), 'active_cars': active_cars}
+    steps, wait = merge_finished([finished for finished, _ in models.values()])
+    metrics['corridor'] = {'finished_cars': steps.count, 'avg_car_steps': steps.mean(), 'avg_car_wait': wait.mean(),
+                           'handed_off': handed_off, 'in_transit': in_transit}
+    return metrics
+
+
+def named_values(texts: list) -> dict:
+    """
+    Reads values per intersection from the command line.
+    :param texts: The arguments, as NAME=VALUE.
+    :return: Per intersection name the value.
+    """
+    values = {}
+    for text in texts:
+        name, _, value = text.partition('=')
+        values[name.strip()] = value.strip()
+    return values
+
+
+def light_settings(texts: list) -> dict:
+    """
+    Reads the green time increase of the signal groups per intersection from the command line.
+    :param texts: The arguments, as NAME=GROUP:PERCENT,GROUP:PERCENT.
+    :return: Per intersection name the percentage per signal group.
+    """
+    settings = {}
+    for name, value in named_values(texts).items():
+        groups = settings.setdefault(name, {})
+        for setting in value.split(','):
+            group, _, percent = setting.partition(':')
+            groups[group.strip()] = int(percent)
+    return settings
+
+
+def main(argv: list = None) -> dict:
+    """
+    Runs a corridor from the command line and writes its metrics.
+    :param argv: The arguments, the arguments of the process when None.
+    :return: The metrics.
+    """
+    parser = argparse.ArgumentParser(description='Runs intersections together, the cars drive from one to the next.')
+    parser.add_argument('--intersections', nargs='+', default=['BOS210', 'BOS211'],
+                        help='The names of the intersections, linked with the BOS links.')
+    parser.add_argument('--log', nargs='+', default=[], metavar='NAME=PATH',
+                        help='The activation log of an intersection, instead of its recorded log.')
+    parser.add_argument('--start', nargs='+', default=[], metavar='NAME=ROW',
+                        help='The step of the data an intersection starts at, 252500 by default.')
+    parser.add_argument('--lights', nargs='+', default=[], metavar='NAME=GROUP:PERCENT,GROUP:PERCENT',
+                        help='The percentage the green time of signal groups of an intersection is increased.')
+    parser.add_argument('--max-steps', type=int, default=72000, help='The amount of steps to run, 10 per second.')
+    parser.add_argument('--engine', choices=('agent', 'vector', 'route'), default='agent',
+                        help='How the cars are moved, see the engine parameter of Traffic.')
+    parser.add_argument('--fast-forward', action='store_true', help='Jump over the steps without cars.')
+    parser.add_argument('--shards', nargs='+', default=None, metavar='NAME,NAME',
+                        help='Run every group of intersections in its own process, for example BOS210 BOS211.')
+    parser.add_argument('--output', type=Path, default=Path('corridor.json'), help='The file the metrics go to.')
+    args = parser.parse_args(argv)
+
+    logs = named_values(args.log)
+    for name in args.intersections:
+        if name not in logs and not load_intersection(name).activation_path.exists():
+            parser.error(f'{name} has no recorded activation log, give one with --log {name}=PATH '
+                         f'(tools/generate_log.py --intersection {name} writes a synthetic one)')
+    starts = named_values(args.start)
+    lights = light_settings(args.lights)
+    intersections = {name: {'activation_path': logs.get(name), 'start': int(starts.get(name, 252500)),
+                            'light_settings': lights.get(name)}
+                     for name in args.intersections}
+    parameters = {'max_steps': args.max_steps, 'engine': args.engine, 'width': 750, 'height': 750,
+                  'collect_interval': 10}
+    if args.shards:
+        shards = [group.split(',') for group in args.shards]
+        metrics = ShardedCorridor(intersections, shards=shards, fast_forward=args.fast_forward, **parameters).run()
+    else:
+        corridor = Corridor(intersections, fast_forward=args.fast_forward, **parameters)
+        while corridor.running:
+            corridor.step()
+        metrics = corridor.metrics()
+    with open(args.output, 'w') as json_file:
+        json.dump(metrics, json_file, indent=4)
+    for name, values in metrics.items():
+        print(f'{name}: {values["finished_cars"]} finished cars, avg car steps {values["avg_car_steps"]:.1f}, '
+              f'avg car wait {values["avg_car_wait"]:.1f}')
+    return metrics
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,794 @@
+import heapq
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from .agents import Car
+
+# What the vector engine gives the visualization for every driving car.
+CarView = namedtuple('CarView', ['pos', 'active', 'agent_type'])
+
+# From this many cars the engine moves them at once with numpy, fewer cars are faster one by one in Python.
+BATCH_CARS = 24
+
+# The arrays with a value per car.
+FLOAT_COLUMNS = ('x', 'y', 'next_x', 'next_y', 'speed', 'distance_to_next_node')
+INT_COLUMNS = ('node', 'end', 'light', 'steps_active', 'wait_at_light', 'route')
+
+
+def wrap(x: np.ndarray, y: np.ndarray, space) -> None:
+    """
+    Wraps the points that are outside a space around its edges, the same way as space.torus_adj does for one point.
+    :param x: The x coordinates, changed in place.
+    :param y: The y coordinates, changed in place.
+    :param space: The ContinuousSpace.
+    :return: None
+    """
+    outside = (x < space.x_min) | (x >= space.x_max) | (y < space.y_min) | (y >= space.y_max)
+    if outside.any():
+        x[outside] = space.x_min + np.remainder(x[outside] - space.x_min, space.width)
+        y[outside] = space.y_min + np.remainder(y[outside] - space.y_min, space.height)
+
+
+class VectorCar:
+    """
+    A class used to represent the place of a car of the vector engine in a LaneQueue.
+    Attributes:
+        engine: The engine the car is in.
+        slot: The index of the car in the arrays of the engine.
+        unique_id: The number of the car, the cars that spawned later have a higher number.
+        queue: The LaneQueue of the lane of the next node.
+        ahead: The car in front of the car in the queue.
+        behind: The car behind the car in the queue.
+    """
+    __slots__ = ('engine', 'slot', 'unique_id', 'queue', 'ahead', 'behind')
+
+    def __init__(self, engine, slot: int, unique_id: int):
+        """
+        Constructor for the VectorCar class.
+        :param engine: The engine the car is in.
+        :param slot: The index of the car in the arrays of the engine.
+        :param unique_id: The number of the car.
+        """
+        self.engine = engine
+        self.slot = slot
+        self.unique_id = unique_id
+        self.queue = None
+        self.ahead = None
+        self.behind = None
+
+    @property
+    def pos(self) -> tuple:
+        """
+        The x, y position of the car.
+        :return: A x, y position tuple.
+        """
+        engine = self.engine
+        if engine.columns is not None:
+            return engine.columns['x'][self.slot], engine.columns['y'][self.slot]
+        engine.store()
+        return float(engine.x[self.slot]), float(engine.y[self.slot])
+
+    def lane_distance(self) -> float:
+        """
+        Calculates how far the car is along the lane of its next node, the order of the queue of the lane.
+        :return: The distance in pixels from the first node of the lane.
+        """
+        engine = self.engine
+        if engine.distances is not None:
+            return engine.distances[self.slot]
+        return float(engine.node_lane_offset[engine.column('node')[self.slot] + 1]
+                     - engine.column('distance_to_next_node')[self.slot])
+
+
+class VectorEngine:
+    """
+    A class used to represent all the driving cars as arrays (struct of arrays), moved in batch every step.
+    The cars follow the same rules as Car, the engine is scheduled as one agent in place of the cars.
+    The cars step in the order they spawned, like the agents in the schedule.
+    Attributes:
+        unique_id: The unique agent ID.
+        model: The model where the engine is in.
+        pos: The position of the engine itself, it has none.
+        agent_type: What type of agent this is.
+        count: The amount of driving cars, they are in the first rows of the arrays in the order they spawned.
+        x: The x positions.
+        y: The y positions.
+        next_x: The x positions the cars move to in advance.
+        next_y: The y positions the cars move to in advance.
+        speed: The current amount of pixels per step the cars are moving at.
+        distance_to_next_node: The distance in pixels to the next node.
+        node: The current node, as an index of the flat node arrays.
+        end: The node the car stops at.
+        light: The light the car brakes for, the light of the first node of its route.
+        steps_active: How many steps the cars have been active.
+        wait_at_light: How many steps the cars have been waiting at a red light.
+        route: The index of the route of every car.
+        cars: The VectorCar of every slot, for the lane queues.
+        spawned: The amount of cars that were placed in the engine, the number of the next VectorCar.
+        ahead: The slot of the car in front of every car in its lane queue, the slot of the car itself without one.
+        leaders: The slots of the cars in front of a car that spawned after them, None when ahead changed since.
+        relinked: The cars of which the car in front changed since ahead was last updated.
+        batch_cars: From how many cars they are moved at once, see BATCH_CARS.
+        columns: While the cars are moved one by one, the columns as lists by name, they are newer than the arrays.
+            None otherwise, see store.
+        distances: While cars change queues, how far every car is along the lane of its next node, otherwise None.
+        routes: The Route of every route index.
+        route_offset: Per route the index of its first node.
+        route_end: Per route the node the cars stop at.
+        route_light: Per route the light the cars brake for, the light of its first node.
+        node_x: The x positions of the nodes of all routes after each other.
+        node_y: The y positions of the nodes.
+        node_segment: The distance from the node to the node after it in its route, 0 for the last node.
+        node_stop_light: The light of the node when it is a stop line, otherwise -1.
+        node_lane: The lane id of the node.
+        node_lane_code: The lane of the node as a number, the same number for the same lane id.
+        node_lane_offset: How far the node is along its lane, see Route.lane_offsets.
+        node_columns: The x, y, segment and stop light of the nodes as lists, for moving the cars one by one.
+        lane_codes: The number of every lane id.
+        lights: The lights the routes use.
+        light_x: The x positions of the lights.
+        light_y: The y positions of the lights.
+        light_columns: The x and y positions of the lights as lists.
+        states: The state of every light when light_state was made.
+        light_state: The state of every light, with -1 at the end for the cars without a light.
+        inside: Whether all nodes are in the space, then the cars never have to be wrapped around its edges.
+    """
+
+    def __init__(self, unique_id: int, model, capacity: int = 64, batch_cars: int = BATCH_CARS):
+        """
+        Constructor for the VectorEngine class.
+        :param unique_id: The unique agent ID.
+        :param model: The model where the engine is in.
+        :param capacity: The amount of cars the arrays have room for, they grow when needed.
+        :param batch_cars: From how many cars they are moved at once.
+        """
+        self.unique_id = unique_id
+        self.model = model
+        self.pos = None
+        self.agent_type = 'engine'
+        self.count = 0
+        for name in FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(capacity))
+        for name in INT_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.int64))
+        self.cars = []
+        self.spawned = 0
+        self.ahead = np.zeros(0, dtype=np.int64)
+        self.leaders = np.zeros(0, dtype=np.int64)
+        self.relinked = []
+        self.batch_cars = batch_cars
+        self.columns = None
+        self.distances = None
+        self.finished = self.moved = np.zeros(0, dtype=bool)
+
+        self.routes = []
+        self.route_offset = np.zeros(0, dtype=np.int64)
+        self.route_end = np.zeros(0, dtype=np.int64)
+        self.route_light = np.zeros(0, dtype=np.int64)
+        self.node_x = np.zeros(0)
+        self.node_y = np.zeros(0)
+        self.node_segment = np.zeros(0)
+        self.node_stop_light = np.zeros(0, dtype=np.int64)
+        self.node_lane = []
+        self.node_lane_code = np.zeros(0, dtype=np.int64)
+        self.node_lane_offset = np.zeros(0)
+        self.node_columns = ([], [], [], [])
+        self.lane_codes = {}
+        self.lights = []
+        self.light_x = np.zeros(0)
+        self.light_y = np.zeros(0)
+        self.light_columns = ([], [])
+        self.states = []
+        self.light_state = np.array([-1])
+        self.inside = True
+
+    def light_index(self, light) -> int:
+        """
+        Gets the index of a light in the lights of the engine, the light is added when it is new.
+        :param light: The Light, or None.
+        :return: The index, -1 for no light.
+        """
+        if light is None:
+            return -1
+        for index, known in enumerate(self.lights):
+            if known is light:
+                return index
+        self.lights.append(light)
+        self.light_x = np.array([known.pos[0] for known in self.lights], dtype=np.float64)
+        self.light_y = np.array([known.pos[1] for known in self.lights], dtype=np.float64)
+        self.light_columns = (self.light_x.tolist(), self.light_y.tolist())
+        return len(self.lights) - 1
+
+    def add_route(self, route) -> int:
+        """
+        Adds the nodes of a route to the flat node arrays, once per route when the model is made.
+        :param route: The Route.
+        :return: The index of the route.
+        """
+        offset = len(self.node_x)
+        self.routes.append(route)
+        self.route_offset = np.append(self.route_offset, offset)
+        self.route_end = np.append(self.route_end, offset + route.end_index)
+        self.route_light = np.append(self.route_light, self.light_index(route.light))
+        self.node_x = np.append(self.node_x, [node.pos[0] for node in route.nodes])
+        self.node_y = np.append(self.node_y, [node.pos[1] for node in route.nodes])
+        self.node_segment = np.append(self.node_segment, route.segments + [0.0])
+        self.node_stop_light = np.append(self.node_stop_light, [self.light_index(node.light) if node.stop_line else -1
+                                                                for node in route.nodes])
+        self.node_lane.extend(node.lane_id for node in route.nodes)
+        self.node_lane_code = np.append(self.node_lane_code, [self.lane_codes.setdefault(node.lane_id,
+                                                                                         len(self.lane_codes))
+                                                              for node in route.nodes])
+        self.node_lane_offset = np.append(self.node_lane_offset, route.lane_offsets)
+        self.node_columns = (self.node_x.tolist(), self.node_y.tolist(), self.node_segment.tolist(),
+                             self.node_stop_light.tolist())
+        space = self.model.space
+        # A car is always between two nodes, a pixel of room keeps the rounding of its position in the space too.
+        self.inside = self.inside and all(space.x_min + 1 <= node.pos[0] <= space.x_max - 1 and
+                                          space.y_min + 1 <= node.pos[1] <= space.y_max - 1 for node in route.nodes)
+        return len(self.routes) - 1
+
+    def column(self, name: str):
+        """
+        Gets the values of a column of the cars, the list while the cars are moved one by one, otherwise the array.
+        :param name: The name of the column, one of FLOAT_COLUMNS or INT_COLUMNS.
+        :return: The list or the array, indexed by slot.
+        """
+        if self.columns is not None:
+            return self.columns[name]
+        return getattr(self, name)
+
+    def store(self) -> None:
+        """
+        Writes the columns the cars were moved with one by one back to the arrays, the arrays are used from then on.
+        Everything that reads or changes the arrays of the cars directly calls this first.
+        :return: None
+        """
+        if self.columns is not None:
+            for name, values in self.columns.items():
+                getattr(self, name)[:self.count] = values
+            self.columns = None
+
+    def distances_to_end(self, exit_lanes: set) -> np.ndarray:
+        """
+        Calculates how far the cars that leave over some lanes out have to drive to their end node.
+        :param exit_lanes: The lanes out.
+        :return: An array with the distance in pixels of every car that leaves over one of the lanes.
+        """
+        self.store()
+        count = self.count
+        leaving = np.isin(self.route[:count], [index for index, route in enumerate(self.routes)
+                                               if route.exit_lane in exit_lanes])
+        total = np.concatenate(([0.0], np.cumsum(self.node_segment)))
+        return (self.distance_to_next_node[:count][leaving] + total[self.end[:count][leaving]]
+                - total[self.node[:count][leaving] + 1])
+
+    def grow(self) -> None:
+        """
+        Doubles the room in the arrays of the cars.
+        :return: None
+        """
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            values = getattr(self, name)
+            setattr(self, name, np.concatenate((values, np.zeros_like(values))))
+
+    def spawn(self, route) -> None:
+        """
+        Adds a car at the start of a route and lets it join the queue of its next lane.
+        :param route: The Route, added to the engine with add_route.
+        :return: None
+        """
+        car = self.place(route, 0, route.start_node.pos, route.segments[0], Car.max_speed, 0, 0)
+        self.join(car, self.model.lane_queues[route.next_node.lane_id])
+
+    def place(self, route, node_index: int, pos: tuple, distance_to_next_node: float, speed: float,
+              steps_active: int, wait_at_light: int) -> VectorCar:
+        """
+        Adds a car somewhere on a route, it is not in a queue yet.
+        :param route: The Route, added to the engine with add_route.
+        :param node_index: The index of the current node in the route.
+        :param pos: A x, y position tuple.
+        :param distance_to_next_node: The distance in pixels to the next node.
+        :param speed: The current amount of pixels per step the car is moving at.
+        :param steps_active: How many steps the car has been active.
+        :param wait_at_light: How many steps the car has been waiting at a red light.
+        :return: The VectorCar of the car.
+        """
+        self.store()
+        if self.count == len(self.speed):
+            self.grow()
+        slot = self.count
+        self.count += 1
+        index = route.engine_index
+        self.route[slot] = index
+        self.node[slot] = self.route_offset[index] + node_index
+        self.end[slot] = self.route_end[index]
+        self.light[slot] = self.route_light[index]
+        self.x[slot], self.y[slot] = pos
+        self.next_x[slot], self.next_y[slot] = pos
+        self.distance_to_next_node[slot] = distance_to_next_node
+        self.speed[slot] = speed
+        self.steps_active[slot] = steps_active
+        self.wait_at_light[slot] = wait_at_light
+        car = VectorCar(self, slot, self.spawned)
+        self.spawned += 1
+        self.cars.append(car)
+        self.ahead = np.append(self.ahead, slot)
+        return car
+
+    def ahead_slots(self) -> np.ndarray:
+        """
+        Gets the slot of the car in front of every car in its lane queue, updated for the cars of which it changed.
+        :return: An array with the slot of the car in front, the slot of the car itself without one.
+        """
+        if not self.relinked:
+            return self.ahead
+        ahead = self.ahead
+        for car in self.relinked:
+            # A car that finished is not in the engine anymore.
+            if car.queue is not None:
+                ahead[car.slot] = car.slot if car.ahead is None else car.ahead.slot
+        self.relinked.clear()
+        self.leaders = None
+        return self.ahead
+
+    def leave(self, car: VectorCar) -> None:
+        """
+        Takes a car out of its lane queue, the car behind it gets the car in front of it as its next car.
+        :param car: The car.
+        :return: None
+        """
+        if car.behind is not None:
+            self.relinked.append(car.behind)
+        car.queue.leave(car)
+
+    def join(self, car: VectorCar, queue) -> None:
+        """
+        Puts a car in a lane queue, it becomes the next car of the car behind it.
+        :param car: The car.
+        :param queue: The LaneQueue.
+        :return: None
+        """
+        queue.join(car)
+        self.relinked.append(car)
+        if car.behind is not None:
+            self.relinked.append(car.behind)
+
+    def light_states(self) -> np.ndarray:
+        """
+        Gets the state of every light, made again only when a light changed.
+        :return: An array with the state of every light and -1 for the cars without a light.
+        """
+        states = [known.state for known in self.lights]
+        if states != self.states:
+            self.states = states
+            self.light_state = np.array(states + [-1])
+        return self.light_state
+
+    def settle(self, ahead: np.ndarray, passed: np.ndarray, speed: np.ndarray, free_speed: np.ndarray,
+               driving: np.ndarray) -> None:
+        """
+        Moves the cars again one by one that see a car in front of them that stepped before them and passed a node.
+        That car is on the node it passed, or gone from the queue when it was its end node, then the car in front of
+        it is the next car. A car that passes a node because of it, or not anymore, changes what the cars behind it
+        see, those cars step later so they are moved again after it.
+        :param ahead: The slot of the car in front of every car, see ahead_slots.
+        :param passed: Which cars pass a node in this step, changed in place.
+        :param speed: The new speeds, changed in place.
+        :param free_speed: The speeds without a car in front.
+        :param driving: Which cars are not waiting at a red light.
+        :return: None
+        """
+        x, y, node, end, distance_to_next_node = (self.x, self.y, self.node, self.end, self.distance_to_next_node)
+        slots = np.arange(len(ahead))
+        waiting = ((ahead < slots) & passed[ahead] & driving).nonzero()[0].tolist()
+        heapq.heapify(waiting)
+        done = set()
+        while waiting:
+            slot = heapq.heappop(waiting)
+            if slot in done or not driving[slot]:
+                continue
+            done.add(slot)
+            next_car = int(ahead[slot])
+            while next_car < slot and passed[next_car] and node[next_car] + 1 == end[next_car]:
+                further = int(ahead[next_car])
+                next_car = slot if further == next_car else further
+            new_speed = float(free_speed[slot])
+            if next_car != slot:
+                if next_car < slot and passed[next_car]:
+                    next_node = node[next_car] + 1
+                    gap = math.hypot(x[slot] - self.node_x[next_node], y[slot] - self.node_y[next_node])
+                else:
+                    gap = math.hypot(x[slot] - x[next_car], y[slot] - y[next_car])
+                if 0 < gap <= new_speed + 15:
+                    new_speed = gap - 15
+            new_speed = max(new_speed, 0.0)
+            speed[slot] = new_speed
+            now_passed = bool(distance_to_next_node[slot] < new_speed)
+            if now_passed != bool(passed[slot]):
+                passed[slot] = now_passed
+                # The cars behind it that step later see it, also through the cars that are gone in between.
+                behind = self.cars[slot].behind
+                while behind is not None:
+                    if behind.slot > slot:
+                        heapq.heappush(waiting, behind.slot)
+                    if not (passed[behind.slot] and node[behind.slot] + 1 == end[behind.slot]):
+                        break
+                    behind = behind.behind
+
+    def step(self) -> None:
+        """
+        Moves all the cars with the rules of Car.step, one by one when there are few cars and at once otherwise.
+        Cars that reach their end node are counted as finished and are removed in advance.
+        :return: None
+        """
+        count = self.count
+        if count == 0:
+            self.finished = self.moved = np.zeros(0, dtype=bool)
+            return
+        self.light_states()
+        if count < self.batch_cars:
+            self.step_each(count)
+        else:
+            self.step_batch(count)
+
+        if self.finished is not self.moved:
+            finished = self.finished.nonzero()[0]
+            routes, steps_active, wait_at_light = (self.column('route'), self.column('steps_active'),
+                                                   self.column('wait_at_light'))
+            for slot in finished.tolist():
+                route = self.routes[int(routes[slot])]
+                self.model.finished_cars.add(route.lane_id, route.signal_group, int(steps_active[slot]),
+                                             int(wait_at_light[slot]))
+                if route.exit_lane is not None:
+                    self.model.exits.append(route.exit_lane)
+            self.model.active_car_count -= len(finished)
+
+    def step_each(self, count: int) -> None:
+        """
+        Moves the cars one by one in the order they spawned, like the Car agents step in the schedule.
+        For a few cars Python floats are faster than numpy, so the columns are kept as lists until the arrays are
+        needed again, see store.
+        :param count: The amount of cars.
+        :return: None
+        """
+        if self.columns is None:
+            self.columns = {name: getattr(self, name)[:count].tolist() for name in FLOAT_COLUMNS + INT_COLUMNS}
+        columns = self.columns
+        xs, ys, nodes, ends, lights, speeds, distances, steps_active, wait_at_light = (
+            columns['x'], columns['y'], columns['node'], columns['end'], columns['light'], columns['speed'],
+            columns['distance_to_next_node'], columns['steps_active'], columns['wait_at_light'])
+        # A car that does not move stays where it is.
+        next_xs = columns['next_x'] = xs[:]
+        next_ys = columns['next_y'] = ys[:]
+        states = self.states + [-1]
+        node_x, node_y, node_segment, node_stop_light = self.node_columns
+        light_x, light_y = self.light_columns
+        ahead = self.ahead_slots().tolist()
+        passed = []
+        gone = []
+        hypot = math.hypot
+        acceleration = Car.acceleration
+        max_speed = Car.max_speed
+        for slot in range(count):
+            steps_active[slot] += 1
+            node = nodes[slot]
+            # Cars at a stop line with a red light wait.
+            if states[node_stop_light[node]] == 0:
+                speeds[slot] = 0.0
+                wait_at_light[slot] += 1
+                continue
+
+            # Brake before a red light (80px = 48.54246804450987m), otherwise accelerate.
+            x = xs[slot]
+            y = ys[slot]
+            speed = speeds[slot]
+            light = lights[slot]
+            if states[light] == 0 and hypot(x - light_x[light], y - light_y[light]) <= 80:
+                speed -= acceleration / 2
+            elif speed < max_speed:
+                speed += acceleration
+
+            # Brake so the car stays 15px behind the car in front of it, a car in front that already stepped is on
+            # the node it passed or gone when it was its end node.
+            next_car = ahead[slot]
+            while next_car in gone:
+                next_car = slot if ahead[next_car] == next_car else ahead[next_car]
+            if next_car != slot:
+                if next_car in passed:
+                    gap = hypot(x - node_x[nodes[next_car]], y - node_y[nodes[next_car]])
+                else:
+                    gap = hypot(x - xs[next_car], y - ys[next_car])
+                if 0 < gap <= speed + 15:
+                    speed = gap - 15
+            if speed < 0:
+                speed = 0.0
+            speeds[slot] = speed
+
+            # Move towards the next node, the distance that is left over is driven on the next segment.
+            distance = distances[slot]
+            left = distance - speed
+            node += 1
+            if left < 0:
+                passed.append(slot)
+                if node == ends[slot]:
+                    gone.append(slot)
+                    continue
+                nodes[slot] = node
+                over = -left
+                segment = node_segment[node]
+                factor = over / segment
+                next_xs[slot] = node_x[node] + (node_x[node + 1] - node_x[node]) * factor
+                next_ys[slot] = node_y[node] + (node_y[node + 1] - node_y[node]) * factor
+                distances[slot] = segment - over
+            else:
+                factor = speed / distance
+                next_xs[slot] = x + (node_x[node] - x) * factor
+                next_ys[slot] = y + (node_y[node] - y) * factor
+                distances[slot] = left
+
+        # When nobody passed a node finished and moved are the same array, advance has nothing to do then.
+        self.finished = self.moved = np.zeros(count, dtype=bool)
+        if passed:
+            self.moved = np.zeros(count, dtype=bool)
+            self.moved[passed] = True
+            self.moved[gone] = False
+            self.finished[gone] = True
+
+    def step_batch(self, count: int) -> None:
+        """
+        Moves all the cars at once with numpy, with the same rules as step_each.
+        All cars first see the cars in front of them where they are, the few cars behind a car that stepped before them
+        and passed a node are moved again with settle.
+        :param count: The amount of cars.
+        :return: None
+        """
+        self.store()
+        x = self.x[:count]
+        y = self.y[:count]
+        node = self.node[:count]
+        light = self.light[:count]
+        light_state = self.light_state
+        self.steps_active[:count] += 1
+
+        # Cars at a stop line with a red light wait.
+        driving = light_state[self.node_stop_light[node]] != 0
+        self.wait_at_light[:count] += ~driving
+
+        # Brake before a red light (80px = 48.54246804450987m), otherwise accelerate.
+        speed = self.speed[:count]
+        brake = (np.hypot(x - self.light_x[light], y - self.light_y[light]) <= 80) & (light_state[light] == 0)
+        free_speed = speed + (speed < Car.max_speed) * Car.acceleration
+        np.copyto(free_speed, speed - Car.acceleration / 2, where=brake)
+
+        # Brake so the car stays 15px behind the car in front of it. The car in front is only looked for within
+        # 60px, but it is only braked for within free_speed + 15px, much closer, so that is all that is checked.
+        distance_to_next_node = self.distance_to_next_node[:count]
+        ahead = self.ahead_slots()
+        gap = np.hypot(x - x[ahead], y - y[ahead])
+        new_speed = free_speed.copy()
+        np.copyto(new_speed, gap - 15, where=(gap > 0) & (gap <= free_speed + 15))
+        np.maximum(new_speed, 0, out=new_speed)
+        new_speed *= driving
+        passed = distance_to_next_node < new_speed
+        if self.leaders is None:
+            self.leaders = ahead[ahead < np.arange(count)]
+        # Without a car in front that stepped before and passed a node, everyone saw the cars where they are.
+        if np.count_nonzero(passed[self.leaders]):
+            self.settle(ahead, passed, new_speed, free_speed, driving)
+        speed[:] = new_speed
+
+        # Move towards the next node, the distance that is left over is driven on the next segment.
+        next_node = node + 1
+        factor = speed / distance_to_next_node
+        next_x = x + (self.node_x[next_node] - x) * factor
+        next_y = y + (self.node_y[next_node] - y) * factor
+        left = distance_to_next_node - speed
+        # When nobody passed a node finished and moved are the same array, advance has nothing to do then.
+        self.finished = self.moved = passed
+        keep = driving
+        if np.count_nonzero(passed):
+            self.finished = passed & (next_node == self.end[:count])
+            self.moved = passed & ~self.finished
+            moved = self.moved.nonzero()[0]
+            node[moved] += 1
+            start_x, start_y = self.node_x[node[moved]], self.node_y[node[moved]]
+            end_x, end_y = self.node_x[node[moved] + 1], self.node_y[node[moved] + 1]
+            segment = self.node_segment[node[moved]]
+            over = np.abs(left[moved])
+            next_x[moved] = start_x + (end_x - start_x) * (over / segment)
+            next_y[moved] = start_y + (end_y - start_y) * (over / segment)
+            left[moved] = segment - over
+            keep = driving & ~self.finished
+        np.copyto(self.next_x[:count], next_x, where=keep)
+        np.copyto(self.next_y[:count], next_y, where=keep)
+        np.copyto(distance_to_next_node, left, where=keep)
+
+    def move(self, count: int) -> None:
+        """
+        Puts the cars at the positions they drove to in the step.
+        :param count: The amount of cars.
+        :return: None
+        """
+        if not self.inside:
+            self.store()
+        columns = self.columns
+        if columns is None:
+            self.x[:count] = self.next_x[:count]
+            self.y[:count] = self.next_y[:count]
+            if not self.inside:
+                wrap(self.x[:count], self.y[:count], self.model.space)
+        else:
+            columns['x'] = columns['next_x']
+            columns['y'] = columns['next_y']
+
+    def advance(self) -> None:
+        """
+        Moves the cars, takes the finished cars out and lets the cars that passed a node change queues.
+        :return: None
+        """
+        count = self.count
+        if count == 0:
+            return
+        self.move(count)
+        if self.finished is self.moved:
+            return
+        columns = self.columns
+        queues = self.model.lane_queues
+        for slot in self.finished.nonzero()[0].tolist():
+            self.leave(self.cars[slot])
+        # Like Traffic.change_lanes, the cars that passed a node onto another lane all leave first.
+        # The car was in the queue of the lane of the node it passed.
+        node = np.asarray(self.column('node'))[:count]
+        changes = (self.moved & (self.node_lane_code[node] != self.node_lane_code[node + 1])).nonzero()[0].tolist()
+        if changes:
+            for slot in changes:
+                self.leave(self.cars[slot])
+            self.distances = (self.node_lane_offset[node + 1]
+                              - np.asarray(self.column('distance_to_next_node'))[:count]).tolist()
+            for slot in changes:
+                self.join(self.cars[slot], queues[self.node_lane[node[slot] + 1]])
+            self.distances = None
+
+        if np.count_nonzero(self.finished):
+            keep = (~self.finished).nonzero()[0]
+            # The slots after the first finished car move up, the cars in front are found at their new slots.
+            first = int(self.finished.argmax())
+            self.ahead = (np.cumsum(~self.finished) - 1)[self.ahead[keep]]
+            self.leaders = None
+            if columns is None:
+                for name in FLOAT_COLUMNS + INT_COLUMNS:
+                    values = getattr(self, name)
+                    values[:len(keep)] = values[keep]
+            else:
+                kept = keep.tolist()
+                for name, values in columns.items():
+                    columns[name] = [values[slot] for slot in kept]
+            self.cars = [self.cars[slot] for slot in keep.tolist()]
+            for slot in range(first, len(self.cars)):
+                self.cars[slot].slot = slot
+            self.count = len(keep)
+
+    def views(self) -> list:
+        """
+        Gets the driving cars for the visualization.
+        :return: A list with a CarView per car.
+        """
+        self.store()
+        return [CarView(pos, True, 'car') for pos in zip(self.x[:self.count].tolist(), self.y[:self.count].tolist())]
+
+
+class RouteEngine(VectorEngine):
+    """
+    A class used to represent all the driving cars as a distance along their route (arc length), moved in batch.
+    A car is the node it drove past and the distance to the next node, the x, y positions are only worked out from
+    them when they are asked for, by the sensors, the visualization or a snapshot (see store).
+    The cars follow the rules of Car with distances along the route in place of straight lines, so the results are
+    not the same as those of the other engines:
+    - a car brakes for a red light within 80px along the route of its stop line, before or after it;
+    - the gap to the car in front is how much further that car is along their lane;
+    - every car sees the car in front of it where it was at the start of the step, also when it stepped first.
+    Attributes:
+        node_length: How far the node is along its route, from the start node.
+        route_light_length: Per route how far the stop line of its light is along it, infinite without a light.
+        outdated: Whether the cars moved since their x, y positions were worked out.
+    """
+
+    def __init__(self, unique_id: int, model, capacity: int = 64):
+        """
+        Constructor for the RouteEngine class, the cars are always moved at once.
+        :param unique_id: The unique agent ID.
+        :param model: The model where the engine is in.
+        :param capacity: The amount of cars the arrays have room for, they grow when needed.
+        """
+        super().__init__(unique_id, model, capacity, batch_cars=0)
+        self.node_length = np.zeros(0)
+        self.route_light_length = np.zeros(0)
+        self.outdated = False
+
+    def add_route(self, route) -> int:
+        """
+        Adds the nodes of a route to the flat node arrays, with how far every node is along the route.
+        :param route: The Route.
+        :return: The index of the route.
+        """
+        self.node_length = np.append(self.node_length, np.concatenate(([0.0], np.cumsum(route.segments))))
+        self.route_light_length = np.append(self.route_light_length,
+                                            np.inf if route.light_length is None else route.light_length)
+        return super().add_route(route)
+
+    def store(self) -> None:
+        """
+        Works out the x, y positions of the cars from where they are along their routes, when they moved since.
+        :return: None
+        """
+        super().store()
+        if self.outdated:
+            self.outdated = False
+            count = self.count
+            node = self.node[:count]
+            fraction = 1 - self.distance_to_next_node[:count] / self.node_segment[node]
+            x = self.x[:count]
+            y = self.y[:count]
+            x[:] = self.node_x[node] + (self.node_x[node + 1] - self.node_x[node]) * fraction
+            y[:] = self.node_y[node] + (self.node_y[node + 1] - self.node_y[node]) * fraction
+            if not self.inside:
+                wrap(x, y, self.model.space)
+
+    def step_batch(self, count: int) -> None:
+        """
+        Moves all the cars at once along their routes, every distance is a subtraction of two lengths along a route
+        or a lane.
+        :param count: The amount of cars.
+        :return: None
+        """
+        node = self.node[:count]
+        light_state = self.light_state
+        self.steps_active[:count] += 1
+
+        # Cars at a stop line with a red light wait.
+        driving = light_state[self.node_stop_light[node]] != 0
+        self.wait_at_light[:count] += ~driving
+
+        # Brake within 80px (48.54246804450987m) of a red light along the route, otherwise accelerate.
+        distance_to_next_node = self.distance_to_next_node[:count]
+        driven = self.node_length[node + 1] - distance_to_next_node
+        speed = self.speed[:count]
+        brake = ((np.abs(self.route_light_length[self.route[:count]] - driven) <= 80)
+                 & (light_state[self.light[:count]] == 0))
+        free_speed = speed + (speed < Car.max_speed) * Car.acceleration
+        np.copyto(free_speed, speed - Car.acceleration / 2, where=brake)
+
+        # Brake so the car stays 15px behind the car in front of it, both are on the way to the same lane. A car that
+        # spawned on a car that did not drive away yet waits for it.
+        ahead = self.ahead_slots()
+        along = self.node_lane_offset[node + 1] - distance_to_next_node
+        gap = along[ahead] - along
+        new_speed = free_speed.copy()
+        np.copyto(new_speed, gap - 15, where=(ahead != np.arange(count)) & (gap <= free_speed + 15))
+        np.maximum(new_speed, 0, out=new_speed)
+        new_speed *= driving
+        speed[:] = new_speed
+
+        # Passing a node is driving further than the distance to it, the rest is driven on the next segment.
+        left = distance_to_next_node - speed
+        passed = left < 0
+        # When nobody passed a node finished and moved are the same array, advance has nothing to do then.
+        self.finished = self.moved = passed
+        if np.count_nonzero(passed):
+            self.finished = passed & (node + 1 == self.end[:count])
+            self.moved = passed & ~self.finished
+            moved = self.moved.nonzero()[0]
+            node[moved] += 1
+            left[moved] += self.node_segment[node[moved]]
+        np.copyto(distance_to_next_node, left, where=~self.finished)
+
+    def move(self, count: int) -> None:
+        """
+        Marks the x, y positions as outdated, the cars already moved along their routes in the step.
+        :param count: The amount of cars.
+        :return: None
+        """
+        self.outdated = True
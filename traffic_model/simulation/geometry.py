@@ -0,0 +1,65 @@
+class Geometry:
+    """
+    A class used to represent the static layer of an intersection: the nodes, roads, lights and sensors.
+    The layer is built once, it is not in the schedule or the space and is never stepped.
+    The lights and sensors change their state when the data says so, but they never move.
+    Attributes:
+        items: The nodes and roads in the order they were built, a tuple once frozen.
+        nodes: The nodes, a tuple once frozen.
+        roads: The roads, a tuple once frozen.
+        signals: The lights and sensors in the order they were built, a tuple once frozen.
+        frozen: Whether the layer is built, nothing can be added to it after that.
+    """
+
+    def __init__(self):
+        """
+        Constructor for the Geometry class.
+        """
+        self.items = []
+        self.nodes = []
+        self.roads = []
+        self.signals = []
+        self.frozen = False
+
+    def add(self, item) -> None:
+        """
+        Adds a node, road, light or sensor to the layer while the intersection is built.
+        :param item: The Node, Road, Light or Sensor.
+        :return: None
+        """
+        if self.frozen:
+            raise RuntimeError('The geometry is already built, make a new Geometry to build an intersection again')
+        if item.agent_type == 'node':
+            self.items.append(item)
+            self.nodes.append(item)
+        elif item.agent_type == 'road':
+            self.items.append(item)
+            self.roads.append(item)
+        else:
+            self.signals.append(item)
+
+    def freeze(self) -> None:
+        """
+        Makes the layer immutable, after the intersection is built.
+        :return: None
+        """
+        self.items = tuple(self.items)
+        self.nodes = tuple(self.nodes)
+        self.roads = tuple(self.roads)
+        self.signals = tuple(self.signals)
+        self.frozen = True
+
+    def __iter__(self):
+        """
+        Iterates over the nodes and roads in the order they were built, then over the lights and sensors.
+        :return: An iterator with the nodes, roads, lights and sensors.
+        """
+        yield from self.items
+        yield from self.signals
+
+    def __len__(self) -> int:
+        """
+        Gets the amount of nodes, roads, lights and sensors.
+        :return: The amount of nodes, roads, lights and sensors.
+        """
+        return len(self.items) + len(self.signals)
@@ -0,0 +1,147 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+from .model import Traffic
+
+# The time of one step in seconds.
+STEP_SECONDS = 0.1
+
+# The lights whose green time can be increased, the light_* parameters of Traffic.
+LIGHTS = ('11', '12', '01', '03', '41', '04', '05')
+
+
+def model_metrics(model: Traffic) -> dict:
+    """
+    Gets the final metrics of a model run.
+    :param model: The model.
+    :return: A dictionary with the metrics, it can be written as json.
+    """
+    finished = model.finished_cars
+    metrics = {
+        'step_count': model.step_count,
+        'data_time': model.data_time,
+        'finished_cars': finished.steps.count,
+        'active_cars': model.active_car_count,
+        'sensor_on_car_found': model.sensor_on_car_found,
+        'sensor_on_no_car': model.sensor_on_no_car
+    }
+    for name, accumulator in (('car_steps', finished.steps), ('car_wait', finished.wait)):
+        metrics[f'avg_{name}'] = accumulator.mean()
+        metrics[f'std_{name}'] = accumulator.std()
+        for q in (0.5, 0.9, 0.95):
+            metrics[f'p{round(q * 100)}_{name}'] = accumulator.quantile(q)
+    return metrics
+
+
+def run_model(model: Traffic, progress: float = 0, out=print) -> dict:
+    """
+    Runs a model until it stops, and prints the progress now and then.
+    :param model: The model.
+    :param progress: Every how many wall seconds the progress is printed, 0 to print nothing.
+    :param out: The function the progress lines are given to.
+    :return: The final metrics, with the wall time and the speed of the run.
+    """
+    first_step = model.step_count
+    total = model.end_step - first_step
+    started = last = time.perf_counter()
+    while model.running:
+        model.step()
+        if progress:
+            now = time.perf_counter()
+            if now - last >= progress:
+                last = now
+                out(progress_line(model.step_count - first_step, total, now - started))
+    wall = time.perf_counter() - started
+    metrics = model_metrics(model)
+    metrics['wall_seconds'] = wall
+    metrics['steps_per_second'] = (model.step_count - first_step) / wall if wall else 0
+    metrics['simulated_seconds_per_second'] = metrics['steps_per_second'] * STEP_SECONDS
+    if progress:
+        out(progress_line(model.step_count - first_step, total, wall))
+    return metrics
+
+
+def progress_line(done: int, total: int, wall: float) -> str:
+    """
+    Formats the progress of a run.
+    :param done: The amount of steps that are done.
+    :param total: The amount of steps of the run.
+    :param wall: The wall seconds since the start of the run.
+    :return: The progress line.
+    """
+    speed = done / wall if wall else 0
+    fraction = done / total if total else 1
+    return f'step {done}/{total} ({fraction:.0%}), {speed:.0f} steps/s, ' \
+           f'{speed * STEP_SECONDS:.1f} simulated s per wall s'
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Reads the parameters of the model and the run from the command line.
+    :param argv: The arguments, the arguments of the process when None.
+    :return: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Runs the traffic simulation without the visualization.')
+    for light in LIGHTS:
+        parser.add_argument(f'--light-{light}', type=int, default=0,
+                            help=f'The percentage the green time of light {light} is increased.')
+    parser.add_argument('--start', type=int, default=252500, help='The step of the data to start at.')
+    parser.add_argument('--max-steps', type=int, default=72000, help='The amount of steps to run, 10 per second.')
+    parser.add_argument('--width', type=int, default=750, help='The width of the model.')
+    parser.add_argument('--height', type=int, default=750, help='The height of the model.')
+    parser.add_argument('--intersection', default='BOS210', help='The name of the intersection.')
+    parser.add_argument('--log', default=None,
+                        help='The activation log to use instead of the recorded log, for example a synthetic log.')
+    parser.add_argument('--engine', choices=('agent', 'vector', 'route'), default='agent',
+                        help='How the cars are moved, see the engine parameter of Traffic.')
+    parser.add_argument('--fast-forward', action='store_true', help='Jump over the steps without cars.')
+    parser.add_argument('--collect-interval', type=int, default=10, help='Every how many steps data is collected.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time the phases of every step and the agents, written to profile.json.')
+    parser.add_argument('--progress', type=float, default=5, help='Every how many seconds the progress is printed.')
+    parser.add_argument('--output', type=Path, default=Path('results'),
+                        help='The folder the metrics (metrics.json) and the series (series.npz) are written to.')
+    return parser.parse_args(argv)
+
+
+def model_parameters(args: argparse.Namespace) -> dict:
+    """
+    Gets the parameters of Traffic from the parsed arguments.
+    :param args: The parsed arguments.
+    :return: A dictionary with the keyword arguments of Traffic.
+    """
+    parameters = {f'light_{light}': getattr(args, f'light_{light}') for light in LIGHTS}
+    parameters.update(width=args.width, height=args.height, max_steps=args.max_steps, start=args.start,
+                      fast_forward=args.fast_forward, intersection=args.intersection, engine=args.engine,
+                      collect_interval=args.collect_interval, profile=args.profile,
+                      activation_path=args.log)
+    return parameters
+
+
+def main(argv: list = None) -> dict:
+    """
+    Runs one simulation from the command line and writes its metrics and collected series.
+    :param argv: The arguments, the arguments of the process when None.
+    :return: The final metrics.
+    """
+    args = parse_args(argv)
+    parameters = model_parameters(args)
+    model = Traffic(**parameters)
+    metrics = run_model(model, args.progress)
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    with open(args.output / 'metrics.json', 'w') as json_file:
+        json.dump({'parameters': parameters, 'metrics': metrics}, json_file, indent=4)
+    model.datacollector.to_npz(args.output / 'series.npz')
+    if model.profiler is not None:
+        model.profiler.to_json(args.output / 'profile.json')
+        print(model.profiler.format())
+    print(f'avg car steps {metrics["avg_car_steps"]:.1f}, avg car wait {metrics["avg_car_wait"]:.1f}, '
+          f'written to {args.output}')
+    return metrics
+
+
+if __name__ == '__main__':
+    main()
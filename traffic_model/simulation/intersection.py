@@ -0,0 +1,49 @@
+from functools import lru_cache
+from pathlib import Path
+
+from .bundle import load_bundle
+
+# The folder with the data of all the intersections.
+data_path = Path(__file__).resolve().parent / 'data'
+
+
+class Intersection:
+    """
+    A class used to represent the data of one intersection.
+    Attributes:
+        name: The name of the intersection, for example BOS210.
+        bundle: The arrays of the compiled lanes, sensors and signal groups, see bundle.compile_bundle.
+        signal_groups: Per signal group the clearance times in seconds of the conflicting signal groups.
+        activation_path: The path of the activation data (sensors and traffic lights).
+    """
+
+    def __init__(self, name: str, bundle: dict, activation_path: Path):
+        """
+        Constructor for the Intersection class.
+        :param name: The name of the intersection.
+        :param bundle: The arrays of the compiled bundle.
+        :param activation_path: The path of the activation data.
+        """
+        self.name = name
+        self.bundle = bundle
+        self.activation_path = activation_path
+
+        groups = bundle['signal_groups'].tolist()
+        self.signal_groups = {}
+        for row, from_sg in enumerate(groups):
+            conflicts = {groups[col]: int(bundle['clearance'][row, col])
+                         for col in range(len(groups)) if bundle['clearance'][row, col] >= 0}
+            if conflicts:
+                self.signal_groups[from_sg] = conflicts
+
+
+@lru_cache(maxsize=None)
+def load_intersection(name: str, directory: Path = data_path) -> Intersection:
+    """
+    Loads the data of an intersection from its bundle, once per process.
+    :param name: The name of the intersection, for example BOS210.
+    :param directory: The folder with the data.
+    :return: The Intersection.
+    """
+    directory = Path(directory)
+    return Intersection(name, load_bundle(name, directory), directory / f'{name}.csv')
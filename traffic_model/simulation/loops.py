@@ -0,0 +1,41 @@
+import math
+
+
+class LoopOccupancy:
+    """
+    A class used to represent where the cars are on the induction loops, checked for all detecting loops at once.
+    Only the cars in the queue of the lane of a loop can be on it, every lane with a loop is walked once.
+    Attributes:
+        threshold: How much space between the center of the loop and the car.
+    """
+
+    def __init__(self, threshold: float = 8):
+        """
+        Constructor for the LoopOccupancy class.
+        :param threshold: How much space between the center of the loop and the car.
+        """
+        self.threshold = threshold
+
+    def occupied(self, sensors, lane_queues: dict) -> list:
+        """
+        Checks which loops have a car on them, with one pass over the queue of every lane with a loop.
+        :param sensors: The Sensor agents to check.
+        :param lane_queues: The LaneQueue per lane id.
+        :return: A list with the sensors that have a car on them.
+        """
+        lanes = {}
+        for sensor in sensors:
+            if sensor.lane_id in lane_queues:
+                lanes.setdefault(sensor.lane_id, []).append(sensor)
+
+        found = []
+        for lane_id, waiting in lanes.items():
+            for car in lane_queues[lane_id]:
+                if not waiting:
+                    break
+                pos = car.pos
+                for sensor in list(waiting):
+                    if math.dist(sensor.center, pos) <= self.threshold:
+                        found.append(sensor)
+                        waiting.remove(sensor)
+        return found
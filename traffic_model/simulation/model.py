@@ -1,29 +1,20 @@
-import pandas as pd
-import json
-import os
-
 from mesa import Model
-from mesa.datacollection import DataCollector
 from mesa.space import ContinuousSpace
 from mesa.time import SimultaneousActivation
+from .activation import ActivationLog
 from .agents import *
-
-dir_path = os.path.dirname(os.path.realpath(__file__))
-
-# Loads all the information about the lanes.
-with open(dir_path + r'\data\lane_done_BOS210.json') as json_file:
-    data = json.load(json_file)
-
-# Loads all the information about the sensors.
-with open(dir_path + r'\data\sensors_done_BOS210.json') as json_file:
-    sensor_data = json.load(json_file)
-
-# Loads all the information about the signalgroups.
-with open(dir_path + r'\data\signalgroup_BOS210.json') as json_file:
-    sgr_data = json.load(json_file)
-
-# Load the actication data (sensors and traffic light.
-activation_data = pd.read_csv(dir_path + r'\data\BOS210.csv', sep=';')
+from .collector import ColumnCollector
+from .engine import RouteEngine, VectorEngine
+from .geometry import Geometry
+from .intersection import load_intersection
+from .loops import LoopOccupancy
+from .overlay import OverlayLog
+from .profiling import StepProfiler
+from .queues import LaneQueue
+from .routes import Route
+from .signal_plan import conflicting_groups, green_extensions, replace_timings
+from .statistics import CarStatistics
+from .transitions import TransitionIndex
 
 
 class Traffic(Model):
@@ -31,19 +22,38 @@ class Traffic(Model):
     A class used to represent a Traffic model.
     Attributes:
         placed_agent_count: The amount of agents placed in simulation.
+        parameters: The parameters the model was made with, to make it again from a snapshot.
+        intersection: The data of the intersection, loaded once per process.
         sgr_data: The signal group relations data.
         light_dict: The light witht the lane as value.
-        data: The sensor and traffic light data.
-        finished_car_steps: A list with all the finished cars step amounts.
-        finished_car_wait:A list with all the finished cars wait step amounts.
+        activation_path: The path of the activation log the data is read from.
+        data: The sensor and traffic light data, an OverlayLog.
+        finished_cars: The CarStatistics of the steps and wait steps of the finished cars.
         finished_car_steps_int: The average steps it takes a car to get to it's end point.
         finished_car_wait_int: The average steps a car waits at a red light..
         max_steps: The max amount of steps the simulation will run.
         step_count: The amount of steps the simulation is running for.
+        end_step: The step the simulation stops at.
+        fast_forward: Whether steps without cars are jumped over.
+        active_car_count: The amount of cars that are driving.
+        done_cars: The cars that finished during this step, they are removed after it.
+        car_pool: The removed cars, they are reused for new cars.
+        spawn_edges: Per spawn loop the steps where it starts detecting.
+        signal_agents: The lights and sensors per column of the data.
+        detecting_sensors: The sensors that detect something and do not spawn cars, by unique id.
+        geometry: The static nodes, roads, lights and sensors, they are not in the schedule or the space.
+        vector_engine: The VectorEngine or RouteEngine that moves all the cars, None when every car is a Car agent.
+        lane_queues: The cars per lane, in the order they drive, by the lane id of their next node.
+        lane_changes: The Car agents that passed a node onto another lane during this step.
+        spawn_routes: The Route of the cars per spawn loop, also the loops on entry lanes.
+        entry_routes: The Route of the cars that come from another intersection, per entry lane.
+        exits: The exit lanes of the cars that left to another intersection during this step, a corridor empties it.
+        loop_occupancy: The LoopOccupancy that checks which detecting sensors have a car on them.
+        transitions: The state changes of the lights and sensors.
+        profiler: The StepProfiler that times the phases of every step, None when the run is not profiled.
+        datacollector: The ColumnCollector with the average car steps and wait, a row every collect interval.
     """
     placed_agent_count = 0
-    sgr_data = sgr_data
-    light_dict = {}
 
     def __init__(
             self,
@@ -57,7 +67,16 @@ class Traffic(Model):
             width: int = 100,
             height: int = 100,
             max_steps: int = 72000,
-            start: int = 252500
+            start: int = 252500,
+            fast_forward: bool = False,
+            intersection: str = 'BOS210',
+            engine: str = 'agent',
+            collect_interval: int = 1,
+            profile: bool = False,
+            activation_path: str = None,
+            exit_lanes: tuple = (),
+            entry_lanes: tuple = (),
+            light_settings: dict = None
     ):
         """
         Constructor for the Traffic class.
@@ -72,19 +91,61 @@ class Traffic(Model):
         :param height: The height of the model.
         :param max_steps: The max amount of steps the simulation will run.
         :param start: The time the simulation starts at, in steps.
+        :param fast_forward: Whether to jump over the steps without cars, up to the next car that spawns.
+        :param intersection: The name of the intersection to simulate.
+        :param engine: How the cars are moved: 'agent' for a Car agent per car, 'vector' for all cars in arrays,
+        'route' for all cars in arrays as a distance along their route, see RouteEngine for how its results differ.
+        :param collect_interval: Every how many steps the data is collected, 10 is once per simulated second.
+        :param profile: Whether to time the phases of every step and the agents, see StepProfiler.
+        :param activation_path: The activation log to use instead of the recorded log of the intersection,
+        for example a synthetic log.
+        :param exit_lanes: The lanes out that lead to another intersection, the cars leave the model where they start.
+        :param entry_lanes: The lanes in that another intersection leads to, their cars come from it with enter
+        instead of from the spawn loop.
+        :param light_settings: The percentage the green time is increased per signal group of the intersection,
+        on top of the light_* settings which are the signal groups of BOS210.
         """
-        self.data = activation_data.copy()
-        self.finished_car_steps = []
-        self.finished_car_wait = []
+        self.parameters = {'light_11': light_11, 'light_12': light_12, 'light_01': light_01, 'light_03': light_03,
+                           'light_41': light_41, 'light_04': light_04, 'light_05': light_05, 'width': width,
+                           'height': height, 'max_steps': max_steps, 'start': start, 'fast_forward': fast_forward,
+                           'intersection': intersection, 'engine': engine, 'collect_interval': collect_interval,
+                           'profile': profile, 'activation_path': activation_path, 'exit_lanes': exit_lanes,
+                           'entry_lanes': entry_lanes, 'light_settings': light_settings}
+        self.intersection = load_intersection(intersection)
+        self.sgr_data = self.intersection.signal_groups
+        # Only the rows of this run are mapped, the changed light timings are kept apart from the shared log.
+        self.activation_path = activation_path or self.intersection.activation_path
+        self.data = OverlayLog(ActivationLog.open_window(self.activation_path, start, start + max_steps + 1))
+        self.finished_cars = CarStatistics()
         self.finished_car_steps_int = 0
         self.finished_car_wait_int = 0
         self.max_steps = max_steps
         self.step_count = start
+        self.end_step = start + max_steps
+        self.fast_forward = fast_forward
+        self.active_car_count = 0
+        self.done_cars = []
+        self.car_pool = []
         self.data_time = self.read_row_col('time')
         self.schedule = SimultaneousActivation(self)
         self.space = ContinuousSpace(width, height, True)
+        self.signal_agents = {}
+        self.detecting_sensors = {}
+        self.geometry = Geometry()
+        self.light_dict = {}
         self.lanes = self.make_intersection()
         self.make_sensors()
+        self.geometry.freeze()
+        self.vector_engine = None
+        if engine == 'vector':
+            self.vector_engine = VectorEngine(self.placed_agent_count, self)
+        elif engine == 'route':
+            self.vector_engine = RouteEngine(self.placed_agent_count, self)
+        if self.vector_engine is not None:
+            self.schedule.add(self.vector_engine)
+            self.placed_agent_count += 1
+        self.lane_queues = {lane_id: LaneQueue(lane_id) for lane_id in self.intersection.bundle['lane_ids'].tolist()}
+        self.lane_changes = []
 
         # Traffic light setting
         light_setting = {
@@ -96,65 +157,85 @@ class Traffic(Model):
             '04': light_04,
             '05': light_05
         }
+        light_setting.update(light_settings or {})
         self.manipulate_traffic_light_data(light_setting)
 
         # Sensor accuracy tracker
         self.sensor_on_no_car = 0
         self.sensor_on_car_found = 0
 
-        self.active_loops = {
-            '044': 0,
-            '054': 0,
-            '114': 0,
-            '124': 0,
-            '014': 0,
-            '034': 0
-        }
+        # The cars spawn at the induction loops that are marked to generate cars, unless they come from a link.
+        bundle = self.intersection.bundle
+        sensor_lanes = dict(zip(bundle['sensor_names'][bundle['sensor_gen']].tolist(),
+                                bundle['sensor_lanes'][bundle['sensor_gen']].tolist()))
+        self.active_loops = {loop: 0 for loop, lane_id in sensor_lanes.items() if lane_id not in entry_lanes}
+        self.exits = []
+        self.spawn_routes = {}
+        self.entry_routes = {}
+        for loop, lane_id in sensor_lanes.items():
+            lane = self.lanes[lane_id]
+            out_nodes = lane['out']['nodes']
+            exit_lane = out_nodes[0].lane_id
+            if exit_lane in exit_lanes:
+                # The cars leave at the first node of the lane out that is not on the intersection.
+                on_route = {node.pos for node in lane['in']['nodes'] + lane['conn']['nodes']}
+                last = next((index for index, node in enumerate(out_nodes) if node.pos not in on_route), 0)
+                lane = dict(lane, out={'nodes': out_nodes[:last + 1]})
+            route = Route(loop, lane_id, lane)
+            if exit_lane in exit_lanes:
+                route.exit_lane = exit_lane
+            if self.vector_engine is not None:
+                route.engine_index = self.vector_engine.add_route(route)
+            self.spawn_routes[loop] = route
+            if lane_id in entry_lanes:
+                self.entry_routes[lane_id] = route
+        self.loop_occupancy = LoopOccupancy()
 
         # Data collector
-        self.datacollector = DataCollector(
-            model_reporters={'avg_car_steps': 'finished_car_steps_int', 'avg_car_wait': 'finished_car_wait_int'})
-
+        self.datacollector = ColumnCollector({'avg_car_steps': 'finished_car_steps_int',
+                                              'avg_car_wait': 'finished_car_wait_int'}, max_steps, collect_interval)
+
+        self.profiler = None
+        if profile:
+            self.profiler = StepProfiler()
+            self.profiler.attach(self)
+        self.index_transitions(self.step_count)
         self.running = True
 
+    def index_transitions(self, start: int) -> None:
+        """
+        Indexes the state changes of the lights and sensors from a step onwards,
+        and the steps where a spawn loop starts detecting, a car can only spawn at these steps.
+        :param start: The step of the first change of every column, its state at that step.
+        :return: None
+        """
+        self.transitions = TransitionIndex(self.data, list(self.signal_agents), start)
+        self.spawn_edges = {}
+        for loop in self.active_loops.keys():
+            steps, states = self.transitions.column_transitions[loop]
+            self.spawn_edges[loop] = steps[states == DETECTED]
+
     def calc_finished_car_steps(self) -> int:
         """
         Calculates the average amount of steps that a car needed to take to get to the end.
         :return: The average amount of steps a car takes.
         """
-        # Checks if cars are not moving
-        if len(self.finished_car_steps) > 0:
-            return sum(self.finished_car_steps) / len(self.finished_car_steps)
-        else:
-            return 0
+        return self.finished_cars.steps.mean()
 
     def calc_finished_car_wait(self) -> int:
         """
         Calculates the average amount of steps a car is waiting for a red light.
         :return: The average amount a car waits.
         """
-        # Checks if cars are waiting
-        if len(self.finished_car_wait) > 0:
-            return sum(self.finished_car_wait) / len(self.finished_car_wait)
-        else:
-            return 0
+        return self.finished_cars.wait.mean()
 
-    def read_row_col(self, col: str) -> str:
+    def read_row_col(self, col: str):
         """
         Reads the data of a specific column.
         :param col: The column to read.
-        :return: The value of the column on the given step.
-        """
-        return self.data[col][self.step_count]
-
-    def increase_by(self, value_to_increase: int, percent: int) -> float:
-        """
-        Calculate how many steps the traffic light need to be extra on green.
-        :param value_to_increase: Base value.
-        :param percent: How much percent longer does the light need to be green.
-        :return: The amount of steps needed to reach the increase.
+        :return: The value of the column on the given step, the state code or the formatted time.
         """
-        return value_to_increase / 100 * percent
+        return self.data.read(self.step_count, col)
 
     def manipulate_traffic_light_data(self, lights: dict) -> None:
         """
@@ -162,217 +243,304 @@ class Traffic(Model):
         :param lights: A dictionary with the setting of the traffic light.
         :return: None
         """
+        unknown = sorted(light for light in lights.keys() if lights[light] and light not in self.sgr_data)
+        if unknown:
+            raise ValueError(f'{self.intersection.name} has no signal group {", ".join(unknown)}, '
+                             f'its signal groups are {", ".join(sorted(self.sgr_data))}')
         for light in lights.keys():
             if lights[light] > 0:
-                streak = 0
-                to_replace = []
-                for index, value in enumerate(self.data[light][self.step_count:self.step_count + self.max_steps]):
-                    if value == "#":
-                        streak += 1
-                    else:
-                        if streak > 0:
-                            increase_info = self.increase_by(streak, lights[light])
-                            orange_index = index + self.step_count
-                            orange_value = value
-                            while orange_value == 'Z':
-                                orange_index += 1
-                                try:
-                                    orange_value = self.data[light][orange_index]
-                                except:
-                                    break
-                            to_replace.append([index + self.step_count, int(np.round(increase_info)),
-                                               orange_index + np.round(increase_info)])
-                        streak = 0
-                if len(to_replace) > 1:
-                    to_replace.pop()
+                first = self.step_count - self.data.offset
+                to_replace = green_extensions(self.data.column(light), first, self.max_steps, lights[light])
                 for i in to_replace:
                     self.check_and_replace_timings(i[0], i[1], i[2], light)
 
     def check_and_replace_timings(self, replace_index: int, increase: int, orange: int, light: str) -> None:
         """
         Exutaly replaces the timings of the traffic lights. Also makes sure the other lights still work fine.
+        The indexes are rows of the loaded window and the replaced ranges include their last index.
+        Rows after the loaded window are not read or replaced.
         :param replace_index: At what index does the replace start.
         :param increase: How many steps does the light need to be on extra.
         :param orange: How long was the light orange.
         :param light: The light ID.
         :return: None
         """
-        for col in self.data.columns:
-            if col in self.sgr_data[light]:
-                crosses = []
-                for c in range(replace_index, replace_index + increase):
-                    if self.data[col][c] == 'Z' or self.data[col][c] == '#':
-                        crosses.append(c)
-                if len(crosses) > 0:
-                    crosses.append(crosses[-1] + int(self.sgr_data[light][col]) * 10)
-                    self.data.loc[crosses[0]: crosses[-1], col] = np.nan
-
-        self.data.loc[replace_index:replace_index + increase, light] = '#'
-        self.data.loc[replace_index + increase: orange, light] = 'Z'
+        conflicts = conflicting_groups(self.data.columns, self.sgr_data[light])
+        replace_timings(self.data, conflicts, replace_index, increase, orange, light)
 
     def step(self) -> None:
         """
         A function that mesa requires. Just does a step in the simulation.
+        In fast forward mode the steps without cars before it are jumped over first.
+        Every phase is its own method, so a StepProfiler can time them.
         :return: None
         """
+        if self.fast_forward and self.active_car_count == 0:
+            self.skip_empty_steps()
+
         self.data_time = self.read_row_col('time')
         self.step_count += 1
 
         self.spawn_cars()
-        self.finished_car_steps_int = self.calc_finished_car_steps()
-        self.finished_car_wait_int = self.calc_finished_car_wait()
+        self.update_signals()
+        self.update_averages()
+        self.collect_data()
+        self.step_schedule()
+        self.change_lanes()
+        self.get_done_cars()
+        if self.step_count >= self.end_step:
+            self.running = False
+
+    def collect_data(self) -> None:
+        """
+        Lets the data collector collect the averages of this step.
+        :return: None
+        """
         self.datacollector.collect(self)
+
+    def step_schedule(self) -> None:
+        """
+        Steps and advances the cars, or the vector engine, in the schedule.
+        :return: None
+        """
         self.schedule.step()
 
+    def change_lanes(self) -> None:
+        """
+        Moves the cars that passed a node onto another lane to the queue of that lane.
+        It is done once all the cars moved, so every car is put in its place at the distance it drove this step.
+        :return: None
+        """
+        if self.lane_changes:
+            # A car that also passed its end node already left its queue.
+            changes = [car for car in self.lane_changes if car.active]
+            for car in changes:
+                car.queue.leave(car)
+            for car in changes:
+                car.join_queue()
+            self.lane_changes.clear()
+
+    def update_averages(self) -> None:
+        """
+        Updates the average steps and wait of the finished cars, which the data collector reads.
+        :return: None
+        """
+        self.finished_car_steps_int = self.calc_finished_car_steps()
+        self.finished_car_wait_int = self.calc_finished_car_wait()
+
+    def next_spawn_step(self) -> int:
+        """
+        Finds the next step where a car spawns, when no cars are spawned before it.
+        :return: The step, or the end step if no car spawns before the end.
+        """
+        next_step = self.end_step
+        for loop, active in self.active_loops.items():
+            if not active and self.data.read(self.step_count + 1, loop) == DETECTED:
+                return self.step_count + 1
+            edges = self.spawn_edges[loop]
+            index = np.searchsorted(edges, self.step_count + 2)
+            if index < len(edges):
+                next_step = min(next_step, int(edges[index]))
+        return next_step
+
+    def skip_empty_steps(self, target: int = None) -> None:
+        """
+        Jumps to the step before the next car spawns, while there are no cars.
+        The lights, sensors, sensor accuracy, spawn loops and collected data end up as if every step was done.
+        :param target: The step to jump to, before the next car spawns. The step before the next spawn when None.
+        :return: None
+        """
+        if target is None:
+            target = self.next_spawn_step() - 1
+        skipped = target - self.step_count
+        if skipped <= 0:
+            return
+
+        # Without cars every detecting sensor counts a detection without a car.
+        first = self.step_count + 1 - self.data.offset
+        for col, agents in self.signal_agents.items():
+            if agents[0].agent_type == 'sensor' and col not in self.active_loops.keys():
+                detected = np.count_nonzero(self.data.column(col, first, first + skipped) == DETECTED)
+                self.sensor_on_no_car += int(detected) * len(agents)
+
+        self.step_count = target
+        self.data_time = self.data.read(target - 1, 'time')
+        for col, state in self.transitions.pop(target):
+            for agent in self.signal_agents[col]:
+                agent.update(state)
+        for loop in self.active_loops.keys():
+            self.active_loops[loop] = 1 if self.read_row_col(loop) == DETECTED else 0
+
+        self.update_averages()
+        self.datacollector.collect(self, skipped)
+        self.schedule.steps += skipped
+        self.schedule.time += skipped
+
+    def update_signals(self) -> None:
+        """
+        Updates the lights and sensors whose state changes at this step,
+        and checks for all the detecting sensors at once if there is a car on them.
+        :return: None
+        """
+        for col, state in self.transitions.pop(self.step_count):
+            for agent in self.signal_agents[col]:
+                agent.update(state)
+        if self.detecting_sensors:
+            found = len(self.loop_occupancy.occupied(self.detecting_sensors.values(), self.lane_queues))
+            self.sensor_on_car_found += found
+            self.sensor_on_no_car += len(self.detecting_sensors) - found
+
     def get_done_cars(self) -> None:
         """
-        Removes all the cars from simulation that are done.
+        Removes all the cars from simulation that are done and puts them in the pool to be reused.
+        The cars can only be removed after the step of the schedule, Mesa still advances them during it.
         :return: None
         """
-        for car in self.schedule.agents:
-            if car.agent_type == 'car':
-                if not car.active:
-                    self.space.remove_agent(car)
-                    self.schedule.remove(car)
+        for car in self.done_cars:
+            self.schedule.remove(car)
+            self.car_pool.append(car)
+        self.done_cars.clear()
+
+    def make_car(self, route: Route) -> Car:
+        """
+        Gets a car from the pool of finished cars, or makes a new one when the pool is empty.
+        :param route: The Route the car drives over.
+        :return: The car, not scheduled yet.
+        """
+        if self.car_pool:
+            car = self.car_pool.pop()
+            car.reset(self.placed_agent_count, route)
+            return car
+        return Car(self.placed_agent_count, self, route)
 
     def spawn_cars(self) -> None:
         """
         Spawns (or generates, depending on what games you play) the cars.
-        The cars spawn when a sensor is activated.
+        The cars spawn when a sensor is activated, on the route that was compiled for the sensor.
         :return: None
         """
         for loop in self.active_loops.keys():
             sensor_info = self.read_row_col(loop)
             if self.active_loops[loop]:
-                if sensor_info != '|':
+                if sensor_info != DETECTED:
                     self.active_loops[loop] = 0
             else:
-                if sensor_info == '|':
+                if sensor_info == DETECTED:
                     if self.active_loops[loop] == 0:
-                        for sensor in sensor_data:
-                            if sensor['name'] == loop:
-                                lane = sensor['laneID']
-                        ln = []
-                        ln_pos = []
-                        list_nodes = self.lanes[lane]['in']['nodes'] + self.lanes[lane]['conn']['nodes'] + \
-                                     self.lanes[lane]['out']['nodes']
-                        for i in self.lanes[lane]['in']['nodes']:
-                            ln.append(i)
-                            ln_pos.append(i.pos)
-                        for i in self.lanes[lane]['conn']['nodes'] + self.lanes[lane]['out']['nodes']:
-                            if i.pos not in ln_pos:
-                                ln.append(i)
-                                ln_pos.append(i.pos)
-                        ln.append(list_nodes[len(list_nodes) - 1])
-                        car = Car(self.placed_agent_count, self, self.lanes[lane]['in']['nodes'][0].pos, ln, 0,
-                                  self.lanes[lane]['in']['nodes'][0],
-                                  self.lanes[lane]['in']['nodes'][1], self.lanes[lane]['out']['nodes'][-1])
-                        self.place_agent(car, self.lanes[lane]['in']['nodes'][0].pos)
+                        self.spawn_car(self.spawn_routes[loop])
                     self.active_loops[loop] += 1
 
+    def spawn_car(self, route: Route) -> None:
+        """
+        Adds a car at the start of a route.
+        :param route: The Route of the car.
+        :return: None
+        """
+        if self.vector_engine is not None:
+            self.vector_engine.spawn(route)
+        else:
+            # The cars are only scheduled, they are not on the space.
+            car = self.make_car(route)
+            self.schedule.add(car)
+            self.placed_agent_count += 1
+            car.join_queue()
+        self.active_car_count += 1
+
+    def steps_to_leave(self, exit_lanes: set) -> int:
+        """
+        Gets the least amount of steps before a car can leave over one of the lanes out, counted from this step.
+        No car drives faster than max_speed + acceleration, a car that did not spawn yet has a whole route to drive.
+        :param exit_lanes: The lanes out.
+        :return: The amount of steps, at least 1, or max_steps when no route leaves over the lanes.
+        """
+        routes = [route for route in list(self.spawn_routes.values()) + list(self.entry_routes.values())
+                  if route.exit_lane in exit_lanes]
+        if not routes:
+            return self.max_steps
+        distances = [sum(route.segments[:route.end_index]) for route in routes]
+        if self.vector_engine is not None:
+            distances.extend(self.vector_engine.distances_to_end(exit_lanes).tolist())
+        else:
+            distances.extend(car.distance_to_end() for queue in self.lane_queues.values() for car in queue
+                             if car.route.exit_lane in exit_lanes)
+        return max(1, int(min(distances) // (Car.max_speed + Car.acceleration)))
+
+    def enter(self, lane_id: str) -> None:
+        """
+        Adds a car that comes from another intersection, at the start of the route of an entry lane.
+        :param lane_id: The entry lane.
+        :return: None
+        """
+        self.spawn_car(self.entry_routes[lane_id])
+
     def make_intersection(self) -> dict:
         """
         Function that basically makes the whole intersection: the roads, all the nodes and all the traffic lights.
         Needs to happen in one function because the order is important.
         :return: Dictionary with all the lanes and information about them.
         """
+        bundle = self.intersection.bundle
+        scale = np.array([self.space.x_max, self.space.y_max])
+        node_xy = (bundle['node_xy'] * scale).tolist()
+        node_stop_line = bundle['node_stop_line'].tolist()
+        regional_xy = (bundle['regional_xy'] * scale).tolist()
+        node_offsets = bundle['lane_node_offsets'].tolist()
+        regional_offsets = bundle['lane_regional_offsets'].tolist()
+
         lanes = {}
         all_lane_nodes = {}
-        for lane in data:
-            lane_id = lane['laneID']
-            if lane['laneAttributes']['type_lane'] == 'vehicle':
-                all_lane_nodes[lane_id] = []
-                if lane['nodes'][0]['attribute'] == 'stopLine':
-                    stop_line_lane = True
-                    connecting_lane = lane['connectsTo']['lane']
-                    lane_info = {
-                        'in': {
-                            'nodes': []
-                        },
-                        'conn': {
-                            'nodes': []
-                        },
-                        'out': {
-                            'nodes': []
-                        }
+        traffic_light = None
+        for lane, lane_id in enumerate(bundle['lane_ids'].tolist()):
+            stop_line_lane = bool(bundle['lane_stop_line'][lane])
+            connecting_lane = None
+            if stop_line_lane:
+                connecting_lane = str(bundle['lane_connects_to'][lane])
+                posxy = tuple(node_xy[node_offsets[lane]])
+                traffic_light = Light(self.placed_agent_count, self, posxy, 0, str(bundle['lane_signal_group'][lane]))
+                self.place_static(traffic_light)
+                self.signal_agents.setdefault(traffic_light.light_id, []).append(traffic_light)
+                self.light_dict[lane_id] = traffic_light
+
+            # Lanes without a stop line keep the light of the lane before them, only stop lines use it.
+            nodes = []
+            for pos in range(node_offsets[lane], node_offsets[lane + 1]):
+                posxy = tuple(node_xy[pos])
+                agent = Node(self.placed_agent_count, self, posxy, node_stop_line[pos], False, lane_id, traffic_light,
+                             connecting_lane)
+                self.place_static(agent)
+                nodes.append(agent)
+            for start_node, end_node in zip(nodes, nodes[1:]):
+                road_agent = Road(self.placed_agent_count, self, start_node, end_node, lane_id,
+                                  self.light_dict[lane_id] if stop_line_lane else None)
+                self.place_static(road_agent)
+            all_lane_nodes[lane_id] = nodes
+
+            if stop_line_lane:
+                # Add the nodes on the intersection
+                conn_nodes = []
+                for pos in range(regional_offsets[lane], regional_offsets[lane + 1]):
+                    posxy = tuple(regional_xy[pos])
+                    agent = Node(self.placed_agent_count, self, posxy, False, True, lane_id, self.light_dict[lane_id])
+                    self.place_static(agent)
+                    conn_nodes.append(agent)
+                for start_node, end_node in zip(conn_nodes, conn_nodes[1:]):
+                    road_agent = Road(self.placed_agent_count, self, start_node, end_node, f'reg_{lane_id}',
+                                      self.light_dict[lane_id])
+                    self.place_static(road_agent)
+                lanes[lane_id] = {
+                    'in': {
+                        'nodes': nodes[::-1]
+                    },
+                    'conn': {
+                        'nodes': conn_nodes
+                    },
+                    'out': {
+                        'nodes': []
                     }
-                else:
-                    stop_line_lane = False
-                    connecting_lane = None
-
-                node_count = 0
-                start_node = None
-                end_node = None
-                reg_start_node = None
-                reg_end_node = None
-                for pos in range(len(lane['nodes'])):
-                    x = lane['nodes'][pos]['ref_pos'][0] * self.space.x_max
-                    y = lane['nodes'][pos]['ref_pos'][1] * self.space.y_max
-
-                    attr = lane['nodes'][pos]['attribute']
-                    stop_line = False
-                    if attr == 'stopLine':
-                        stop_line = True
-
-                    posxy = x, y
-                    if node_count == 0:
-                        node_count += 1
-                        if stop_line_lane:
-                            traffic_light = Light(self.placed_agent_count, self, posxy, 0,
-                                                  lane['connectsTo']['signalGroup'])
-                            self.place_agent(traffic_light, posxy)
-                            self.light_dict[lane_id] = traffic_light
-                    agent = Node(self.placed_agent_count, self, posxy, stop_line, False, lane_id, traffic_light,
-                                 connecting_lane)
-                    self.place_agent(agent, posxy)
-                    all_lane_nodes[lane_id].append(agent)
-                    if stop_line_lane:
-                        lane_info['in']['nodes'].append(agent)
-
-                    if start_node is not None and end_node is None:
-                        end_node = agent
-
-                    if start_node is None:
-                        start_node = agent
-
-                    if start_node and end_node:
-                        if stop_line_lane:
-                            road_agent = Road(self.placed_agent_count, self, start_node, end_node, lane_id,
-                                              self.light_dict[lane_id])
-                        else:
-                            road_agent = Road(self.placed_agent_count, self, start_node, end_node, lane_id)
-                        self.place_agent(road_agent, road_agent.start_node.pos)
-                        start_node = end_node
-                        end_node = None
-
-                if stop_line_lane:
-                    lane_info['in']['nodes'].reverse()
-                    # Add the nodes on the intersection
-                    for pos in lane['regional']:
-                        x = pos['ref_pos'][0] * self.space.x_max
-                        y = pos['ref_pos'][1] * self.space.y_max
-                        pos = x, y
-                        agent = Node(self.placed_agent_count, self, pos, False, True, lane_id, self.light_dict[lane_id])
-                        lane_info['conn']['nodes'].append(agent)
-                        self.place_agent(agent, pos)
-                        if reg_start_node is not None and reg_end_node is None:
-                            reg_end_node = agent
-
-                        if reg_start_node is None:
-                            reg_start_node = agent
-
-                        if reg_start_node and reg_end_node:
-                            road_agent = Road(self.placed_agent_count, self, reg_start_node, reg_end_node,
-                                              f'reg_{lane_id}', self.light_dict[lane_id])
-                            self.place_agent(road_agent, reg_start_node.pos)
-                            reg_start_node = reg_end_node
-                            reg_end_node = None
-                    lanes[lane_id] = lane_info
-
-        for l in all_lane_nodes:
-            if all_lane_nodes[l][0].connecting_lane:
-                connection = all_lane_nodes[all_lane_nodes[l][0].connecting_lane]
-                lanes[l]['out']['nodes'] = connection
+                }
+
+        for l in lanes:
+            lanes[l]['out']['nodes'] = all_lane_nodes[all_lane_nodes[l][0].connecting_lane]
         return lanes
 
     def make_sensors(self) -> None:
@@ -380,38 +548,50 @@ class Traffic(Model):
         Function that places all the sensors.
         :return: None
         """
-        for sensor in sensor_data:
-            if sensor['sensorDeviceType'] == 'inductionLoop':
-                start_pos = sensor['sensorRefPos'][0][0] * self.space.x_max, sensor['sensorRefPos'][0][
-                    1] * self.space.y_max
-                end_pos = sensor['sensorRefPos'][1][0] * self.space.x_max, sensor['sensorRefPos'][1][
-                    1] * self.space.y_max
-                if 'gen' in sensor:
-                    averaged = tuple(np.average(np.array([start_pos, end_pos]), axis=0))
-                    sensor_node = Node(self.placed_agent_count, self, averaged, False, False, sensor['laneID'],
-                                       self.light_dict[sensor['laneID']])
-                    self.place_agent(sensor_node, averaged)
-                    last = 999
-                    nodes_to_remove = []
-                    for i in self.lanes[sensor['laneID']]['in']['nodes']:
-                        if math.dist(averaged, i.pos) < last:
-                            nodes_to_remove.append(i)
-                            last = math.dist(averaged, i.pos)
-
-                    for on in nodes_to_remove:
-                        self.lanes[sensor['laneID']]['in']['nodes'].remove(on)
-                    self.lanes[sensor['laneID']]['in']['nodes'].insert(0, sensor_node)
-                agent = Sensor(self.placed_agent_count, self, start_pos, start_pos, end_pos, 0, sensor['name'],
-                               sensor['laneID'], sensor['distance'])
-                self.place_agent(agent, start_pos)
-
-    def place_agent(self, agent: Agent, pos: tuple) -> None:
-        """
-        Function that places an agent on the space and adds it to the schedule.
-        :param agent: The agent to add.
-        :param pos: Where to add the agent.
+        bundle = self.intersection.bundle
+        sensor_xy = (bundle['sensor_xy'] * np.array([self.space.x_max, self.space.y_max])).tolist()
+        for index, name in enumerate(bundle['sensor_names'].tolist()):
+            lane_id = str(bundle['sensor_lanes'][index])
+            start_pos, end_pos = tuple(sensor_xy[index][0]), tuple(sensor_xy[index][1])
+            if bundle['sensor_gen'][index]:
+                averaged = tuple(np.average(np.array([start_pos, end_pos]), axis=0))
+                sensor_node = Node(self.placed_agent_count, self, averaged, False, False, lane_id,
+                                   self.light_dict[lane_id])
+                self.place_static(sensor_node)
+                last = 999
+                nodes_to_remove = []
+                for i in self.lanes[lane_id]['in']['nodes']:
+                    if math.dist(averaged, i.pos) < last:
+                        nodes_to_remove.append(i)
+                        last = math.dist(averaged, i.pos)
+
+                for on in nodes_to_remove:
+                    self.lanes[lane_id]['in']['nodes'].remove(on)
+                self.lanes[lane_id]['in']['nodes'].insert(0, sensor_node)
+            agent = Sensor(self.placed_agent_count, self, start_pos, start_pos, end_pos, 0, name, lane_id,
+                           int(bundle['sensor_distance'][index]))
+            self.place_static(agent)
+            self.signal_agents.setdefault(agent.sensor_id, []).append(agent)
+
+    def get_drawn_agents(self) -> list:
+        """
+        Gets everything the canvas draws: the static nodes and roads first, then the lights and sensors,
+        then the scheduled cars, with the cars of the vector engine in place of the engine.
+        :return: A list with the agents.
+        """
+        agents = list(self.geometry)
+        for agent in self.schedule.agents:
+            if agent is self.vector_engine:
+                agents.extend(agent.views())
+            else:
+                agents.append(agent)
+        return agents
+
+    def place_static(self, agent: Agent) -> None:
+        """
+        Function that adds a node, road, light or sensor to the static geometry, it is not on the space or scheduled.
+        :param agent: The node, road, light or sensor to add.
         :return: None
         """
-        self.space.place_agent(agent, pos)
-        self.schedule.add(agent)
+        self.geometry.add(agent)
         self.placed_agent_count += 1
@@ -0,0 +1,94 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from .activation import ActivationLog
+
+
+class OverlayLog:
+    """
+    A class used to represent an activation log with changed signal timings, without copying the log.
+    The changes are kept as intervals per column and are read before the shared, read-only base log.
+    Rows are counted from the first row of the loaded window, unless stated otherwise.
+    Attributes:
+        base: The read-only ActivationLog.
+        intervals: Per changed column, the sorted starts, stops and states of the intervals that replace the base.
+    """
+
+    def __init__(self, base: ActivationLog):
+        """
+        Constructor for the OverlayLog class.
+        :param base: The read-only ActivationLog.
+        """
+        self.base = base
+        self.intervals = {}
+
+    @property
+    def columns(self) -> list:
+        return self.base.columns
+
+    @property
+    def offset(self) -> int:
+        return self.base.offset
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def assign(self, col: str, start: int, stop: int, state: int) -> None:
+        """
+        Replaces the states of a column from start up to stop. Rows after the log are ignored.
+        :param col: The column to change.
+        :param start: The first row to change.
+        :param stop: The row after the last row to change.
+        :param state: The new state code.
+        :return: None
+        """
+        stop = min(stop, len(self))
+        if start >= stop:
+            return
+        starts, stops, states = self.intervals.setdefault(col, ([], [], []))
+        first = bisect_right(stops, start)
+        last = bisect_left(starts, stop)
+        new = []
+        if first < last and starts[first] < start:
+            new.append((starts[first], start, states[first]))
+        new.append((start, stop, state))
+        if first < last and stops[last - 1] > stop:
+            new.append((stop, stops[last - 1], states[last - 1]))
+        starts[first:last] = [interval[0] for interval in new]
+        stops[first:last] = [interval[1] for interval in new]
+        states[first:last] = [interval[2] for interval in new]
+
+    def column(self, col: str, start: int = 0, stop: int = None) -> np.ndarray:
+        """
+        Gets the states of one column, with the changes applied.
+        Unchanged columns are not copied, so the result must not be written to.
+        :param col: The column name.
+        :param start: The first row.
+        :param stop: The row after the last row.
+        :return: The states of the column.
+        """
+        values = self.base.column(col)[start:stop]
+        if col not in self.intervals:
+            return values
+        stop = start + len(values)
+        values = np.array(values)
+        starts, stops, states = self.intervals[col]
+        for i in range(bisect_right(stops, start), bisect_left(starts, stop)):
+            values[max(starts[i], start) - start:min(stops[i], stop) - start] = states[i]
+        return values
+
+    def read(self, row: int, col: str):
+        """
+        Reads one cell of the log, the changes first.
+        :param row: The row to read, as a row of the full log.
+        :param col: The column to read.
+        :return: The formatted time for the time column, otherwise the state code.
+        """
+        if col in self.intervals:
+            starts, stops, states = self.intervals[col]
+            local = row - self.base.offset
+            i = bisect_right(starts, local) - 1
+            if i >= 0 and local < stops[i]:
+                return states[i]
+        return self.base.read(row, col)
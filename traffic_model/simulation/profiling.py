@@ -0,0 +1,167 @@
+import json
+import time
+from pathlib import Path
+
+# The phases of Traffic.step that are timed, as the name in the profile and the method of the model.
+PHASES = (
+    ('skip_empty_steps', 'skip_empty_steps'),
+    ('spawn_cars', 'spawn_cars'),
+    ('update_signals', 'update_signals'),
+    ('statistics', 'update_averages'),
+    ('collect', 'collect_data'),
+    ('change_lanes', 'change_lanes'),
+    ('get_done_cars', 'get_done_cars')
+)
+
+
+class StepProfiler:
+    """
+    A class used to represent the profile of a model run: wall time and calls per phase of Traffic.step,
+    per agent type in the schedule and the amount of active cars over time.
+    It is only attached to a model made with profile=True, without it the phases are called directly.
+    Attributes:
+        phases: Per phase of the step the total wall seconds and the amount of calls.
+        agents: Per agent type and method (for example car.step) the total wall seconds and the amount of calls.
+        sample_interval: Every how many steps the amount of active cars is kept.
+        samples: The steps and active car counts that are kept.
+        steps: The amount of profiled steps.
+    """
+
+    def __init__(self, sample_interval: int = 10):
+        """
+        Constructor for the StepProfiler class.
+        :param sample_interval: Every how many steps the amount of active cars is kept.
+        """
+        self.phases = {}
+        self.agents = {}
+        self.sample_interval = sample_interval
+        self.samples = []
+        self.steps = 0
+
+    def attach(self, model) -> None:
+        """
+        Wraps the phases and the step of a model, so every step of it is profiled.
+        The wrappers are set on the model itself, the class and the models without a profiler are not changed.
+        :param model: The Traffic model.
+        :return: None
+        """
+        for name, method in PHASES:
+            setattr(model, method, self.timed(name, getattr(model, method)))
+        model.step_schedule = self.timed('schedule', lambda: self.step_schedule(model.schedule))
+        step = model.step
+
+        def profiled_step() -> None:
+            step()
+            self.sample(model)
+
+        model.step = profiled_step
+
+    def timed(self, name: str, function):
+        """
+        Makes a function that calls a function with its wall time added to a phase.
+        :param name: The name of the phase.
+        :param function: The function to time.
+        :return: The timed function.
+        """
+        def timed_function(*args):
+            return self.time(name, function, *args)
+
+        return timed_function
+
+    def time(self, name: str, function, *args):
+        """
+        Calls a function and adds its wall time to a phase.
+        :param name: The name of the phase.
+        :param function: The function to call.
+        :param args: The arguments of the function.
+        :return: What the function returns.
+        """
+        started = time.perf_counter()
+        result = function(*args)
+        add(self.phases, name, time.perf_counter() - started)
+        return result
+
+    def step_schedule(self, schedule) -> None:
+        """
+        Does a step of a SimultaneousActivation schedule, like Mesa does, with the wall time of every agent.
+        :param schedule: The schedule.
+        :return: None
+        """
+        agents = schedule.agents
+        for method in ('step', 'advance'):
+            for agent in agents:
+                started = time.perf_counter()
+                getattr(agent, method)()
+                add(self.agents, f'{agent.agent_type}.{method}', time.perf_counter() - started)
+        schedule.steps += 1
+        schedule.time += 1
+
+    def sample(self, model) -> None:
+        """
+        Counts a profiled step and keeps the amount of active cars every sample interval.
+        :param model: The model.
+        :return: None
+        """
+        if self.steps % self.sample_interval == 0:
+            self.samples.append((model.step_count, model.active_car_count))
+        self.steps += 1
+
+    def report(self) -> dict:
+        """
+        Gets the profile.
+        :return: A dictionary with the phases, the agents and the active cars, it can be written as json.
+        """
+        return {
+            'steps': self.steps,
+            'phases': summary(self.phases),
+            'agents': summary(self.agents),
+            'active_cars': {'step': [step for step, _ in self.samples], 'count': [count for _, count in self.samples]}
+        }
+
+    def format(self) -> str:
+        """
+        Formats the phases and agents as a table, the slowest first.
+        :return: The table.
+        """
+        lines = [f'{"phase":<24}{"seconds":>10}{"calls":>10}{"us per call":>14}']
+        for part in (self.phases, self.agents):
+            for name, (seconds, calls) in sorted(part.items(), key=lambda item: -item[1][0]):
+                lines.append(f'{name:<24}{seconds:>10.3f}{calls:>10}{seconds / calls * 1e6:>14.1f}')
+        return '\n'.join(lines)
+
+    def to_json(self, path: Path) -> Path:
+        """
+        Writes the profile to a json file.
+        :param path: The path of the file.
+        :return: The path of the file.
+        """
+        path = Path(path)
+        with open(path, 'w') as json_file:
+            json.dump(self.report(), json_file, indent=4)
+        return path
+
+
+def add(totals: dict, name: str, seconds: float) -> None:
+    """
+    Adds one call to the totals of a name.
+    :param totals: Per name a list with the total seconds and the amount of calls.
+    :param name: The name.
+    :param seconds: The wall seconds of the call.
+    :return: None
+    """
+    total = totals.get(name)
+    if total is None:
+        totals[name] = [seconds, 1]
+    else:
+        total[0] += seconds
+        total[1] += 1
+
+
+def summary(totals: dict) -> dict:
+    """
+    Turns the totals into a dictionary per name.
+    :param totals: Per name a list with the total seconds and the amount of calls.
+    :return: Per name the seconds, the calls and the microseconds per call.
+    """
+    return {name: {'seconds': seconds, 'calls': calls, 'us_per_call': seconds / calls * 1e6}
+            for name, (seconds, calls) in totals.items()}
@@ -0,0 +1,88 @@
+class LaneQueue:
+    """
+    A class used to represent the cars driving towards the nodes of one lane, ordered by how far they are along it.
+    The car in front is the closest to the end of the lane. Every car links to the car in front of it and the car
+    behind it, so the next car of a car is the car in front of it in the queue.
+    Cars can not pass each other on a lane, so the order only changes when a car joins or leaves.
+    Attributes:
+        lane_id: The id of the lane.
+        front: The car closest to the end of the lane, None when the queue is empty.
+        back: The car furthest from the end of the lane, None when the queue is empty.
+        count: The amount of cars in the queue.
+    """
+
+    def __init__(self, lane_id: str):
+        """
+        Constructor for the LaneQueue class.
+        :param lane_id: The id of the lane.
+        """
+        self.lane_id = lane_id
+        self.front = None
+        self.back = None
+        self.count = 0
+
+    def join(self, car) -> None:
+        """
+        Adds a car at its place in the queue, searched from the back where most cars join.
+        Of two cars just as far along the lane the car that spawned last is behind the other one,
+        so it is the next car of the cars behind them, like the neighbour search picked it.
+        :param car: The car to add, with a lane_distance and a unique_id.
+        :return: None
+        """
+        distance = car.lane_distance()
+        behind = None
+        ahead = self.back
+        while ahead is not None:
+            ahead_distance = ahead.lane_distance()
+            if ahead_distance > distance or (ahead_distance == distance and ahead.unique_id < car.unique_id):
+                break
+            behind = ahead
+            ahead = ahead.ahead
+        car.ahead = ahead
+        car.behind = behind
+        if ahead is None:
+            self.front = car
+        else:
+            ahead.behind = car
+        if behind is None:
+            self.back = car
+        else:
+            behind.ahead = car
+        car.queue = self
+        self.count += 1
+
+    def leave(self, car) -> None:
+        """
+        Removes a car from the queue.
+        :param car: The car to remove.
+        :return: None
+        """
+        if car.ahead is None:
+            self.front = car.behind
+        else:
+            car.ahead.behind = car.behind
+        if car.behind is None:
+            self.back = car.ahead
+        else:
+            car.behind.ahead = car.ahead
+        car.ahead = None
+        car.behind = None
+        car.queue = None
+        self.count -= 1
+
+    def __len__(self) -> int:
+        """
+        Gets the amount of cars in the queue.
+        :return: The amount of cars.
+        """
+        return self.count
+
+    def __iter__(self):
+        """
+        Iterates over the cars from the front of the queue to the back.
+        :return: An iterator over the cars.
+        """
+        car = self.front
+        while car is not None:
+            yield car
+            car = car.behind
@@ -0,0 +1,68 @@
+import math
+
+
+class Route:
+    """
+    A class used to represent the route of the cars that spawn at one induction loop, compiled once per model.
+    Attributes:
+        loop: The name of the induction loop.
+        lane_id: The id of the lane the cars spawn on.
+        nodes: The nodes the cars drive over: the lane in, then the nodes on the intersection and the lane out
+            that are not at a position that is already in the route, and the end node once more.
+        start_node: The node the cars spawn at.
+        next_node: The node the cars drive to first.
+        end_node: The final node, the cars stop at this node.
+        segments: Per node the distance to the node after it, in pixels.
+        lane_offsets: Per node how far it is along its lane, from the first node of the lane, in pixels. The lane in
+            and the nodes on the intersection are one lane, every route over a lane has the same offsets for it.
+        end_index: The index of the node the cars stop at, the first time the end node is in the route.
+        light: The light the cars brake for, the light of the start node.
+        light_length: How far the stop line of the light is along the route, from the start node, in pixels.
+            None without a light.
+        signal_group: The signal group of the light, None without a light.
+        engine_index: The index of the route in the VectorEngine, None when the cars are agents.
+        exit_lane: The lane out that leads to another intersection, the route ends where it starts.
+            None when the cars drive the whole lane out.
+    """
+
+    def __init__(self, loop: str, lane_id: str, lane: dict):
+        """
+        Constructor for the Route class.
+        :param loop: The name of the induction loop.
+        :param lane_id: The id of the lane the cars spawn on.
+        :param lane: The in, conn and out nodes of the lane, from Traffic.make_intersection.
+        """
+        self.loop = loop
+        self.lane_id = lane_id
+        in_nodes = lane['in']['nodes']
+        self.nodes = list(in_nodes)
+        positions = {node.pos for node in in_nodes}
+        for node in lane['conn']['nodes'] + lane['out']['nodes']:
+            if node.pos not in positions:
+                self.nodes.append(node)
+                positions.add(node.pos)
+        self.nodes.append((in_nodes + lane['conn']['nodes'] + lane['out']['nodes'])[-1])
+        self.start_node = in_nodes[0]
+        self.next_node = in_nodes[1]
+        self.end_node = lane['out']['nodes'][-1]
+
+        self.segments = [math.dist(start.pos, end.pos) for start, end in zip(self.nodes, self.nodes[1:])]
+        offsets = {}
+        for chain in (in_nodes + lane['conn']['nodes'], lane['out']['nodes']):
+            offset = 0.0
+            for previous, node in zip([chain[0]] + chain, chain):
+                offset += math.dist(previous.pos, node.pos)
+                offsets.setdefault(id(node), offset)
+        self.lane_offsets = [offsets[id(node)] for node in self.nodes]
+        self.end_index = next(index for index, node in enumerate(self.nodes) if index > 0 and node is self.end_node)
+        self.light = self.start_node.light
+        self.signal_group = None if self.light is None else self.light.light_id
+        self.light_length = None
+        length = 0.0
+        for node, segment in zip(self.nodes, self.segments):
+            if self.light is not None and node.stop_line and node.light is self.light:
+                self.light_length = length
+                break
+            length += segment
+        self.engine_index = None
+        self.exit_lane = None
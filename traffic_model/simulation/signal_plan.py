@@ -0,0 +1,65 @@
+import numpy as np
+
+from .activation import AMBER, GREEN, OFF
+
+
+def green_extensions(column: np.ndarray, first: int, count: int, percent: int) -> list:
+    """
+    Finds where the green phases of a light end and how much longer they need to be, with run-length encoding.
+    Only green phases that end within the window count, the last one is left out when there are more.
+    :param column: The states of the light, rows of the loaded window.
+    :param first: The first row of the window.
+    :param count: The amount of rows in the window.
+    :param percent: How much percent longer the light needs to be green.
+    :return: A list with the row the green phase ends, the amount of extra steps and the end of the amber phase.
+    """
+    green = np.concatenate(([False], column[first:first + count] == GREEN)).astype(np.int8)
+    edges = np.diff(green)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    streaks = ends - starts[:len(ends)]
+    increase_info = streaks / 100 * percent
+    increase = np.round(increase_info)
+
+    # The amber phase ends at the first row that is not amber, or after the loaded rows.
+    not_amber = np.flatnonzero(column != AMBER)
+    rows = ends + first
+    found = np.searchsorted(not_amber, rows)
+    orange_index = np.append(not_amber, len(column))[found]
+
+    to_replace = [[int(row), int(inc), orange + inc] for row, inc, orange in zip(rows, increase, orange_index)]
+    if len(to_replace) > 1:
+        to_replace.pop()
+    return to_replace
+
+
+def conflicting_groups(columns: list, clearances: dict) -> list:
+    """
+    Gets the columns of the signal groups that conflict with a light, in the order of the log.
+    :param columns: The columns of the log.
+    :param clearances: The clearance times of the light, in seconds, per conflicting signal group.
+    :return: A list with the conflicting columns and their clearance time in steps.
+    """
+    return [(col, int(clearances[col]) * 10) for col in columns if col in clearances]
+
+
+def replace_timings(data, conflicts: list, replace_index: int, increase: int, orange: int, light: str) -> None:
+    """
+    Extends one green phase of a light, the conflicting groups are switched off as whole intervals.
+    The ranges include their last row.
+    :param data: The OverlayLog to change.
+    :param conflicts: The conflicting columns and their clearance time in steps.
+    :param replace_index: The row where the green phase ended.
+    :param increase: How many steps the light needs to be on extra.
+    :param orange: The row where the amber phase ends, after the extension.
+    :param light: The light ID.
+    :return: None
+    """
+    for col, clearance in conflicts:
+        values = data.column(col, replace_index, replace_index + increase)
+        crosses = np.flatnonzero((values == AMBER) | (values == GREEN))
+        if len(crosses) > 0:
+            data.assign(col, replace_index + int(crosses[0]), replace_index + int(crosses[-1]) + clearance + 1, OFF)
+
+    data.assign(light, replace_index, replace_index + increase + 1, GREEN)
+    data.assign(light, replace_index + increase, int(orange) + 1, AMBER)
@@ -0,0 +1,197 @@
+import copy
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+from .model import Traffic
+from .overlay import OverlayLog
+
+# The version of the snapshot layout.
+SNAPSHOT_VERSION = 2
+
+# The columns of the driving cars.
+CAR_COLUMNS = ('route', 'node_index', 'x', 'y', 'distance_to_next_node', 'speed', 'steps_active', 'wait_at_light')
+
+# The parameters a fork can not change, the snapshot would not fit the new model.
+FIXED_PARAMETERS = ('start', 'intersection', 'width', 'height', 'activation_path')
+
+
+def car_states(model: Traffic) -> tuple:
+    """
+    Gets the driving cars of a model as columns, in the order they are stepped, for both engines.
+    :param model: The model.
+    :return: A tuple with a dictionary of columns and a list with the car objects, in the same order.
+    """
+    routes = {id(route): index for index, route in enumerate(model.spawn_routes.values())}
+    engine = model.vector_engine
+    if engine is not None:
+        engine.store()
+        count = engine.count
+        route_index = [routes[id(engine.routes[index])] for index in engine.route[:count].tolist()]
+        node_index = (engine.node[:count] - engine.route_offset[engine.route[:count]]).tolist()
+        cars = list(engine.cars)
+        values = (route_index, node_index, engine.x[:count].tolist(), engine.y[:count].tolist(),
+                  engine.distance_to_next_node[:count].tolist(), engine.speed[:count].tolist(),
+                  engine.steps_active[:count].tolist(), engine.wait_at_light[:count].tolist())
+    else:
+        cars = [agent for agent in model.schedule.agents if agent.agent_type == 'car']
+        values = ([routes[id(car.route)] for car in cars], [car.node_index for car in cars],
+                  [car.pos[0] for car in cars], [car.pos[1] for car in cars],
+                  [car.distance_to_next_node for car in cars], [car.current_speed for car in cars],
+                  [car.steps_active for car in cars], [car.wait_at_light for car in cars])
+    names = CAR_COLUMNS
+    dtypes = (np.int16, np.int32, np.float64, np.float64, np.float64, np.float64, np.int64, np.int64)
+    return {name: np.array(column, dtype=dtype) for name, column, dtype in zip(names, values, dtypes)}, cars
+
+
+def take_snapshot(model: Traffic) -> dict:
+    """
+    Takes the full dynamic state of a model between two steps: the step, the cars, the lights and sensors,
+    the statistics, the collected data and the changed signal timings.
+    :param model: The model.
+    :return: A dictionary with the state, it can be pickled.
+    """
+    cars, objects = car_states(model)
+    index = {id(car): position for position, car in enumerate(objects)}
+    return {
+        'version': SNAPSHOT_VERSION,
+        'parameters': dict(model.parameters),
+        'step_count': model.step_count,
+        'data_time': model.data_time,
+        'running': model.running,
+        'schedule_steps': model.schedule.steps,
+        'schedule_time': model.schedule.time,
+        'placed_agent_count': model.placed_agent_count,
+        'signal_states': {col: [agent.state for agent in agents] for col, agents in model.signal_agents.items()},
+        'detecting_sensors': list(model.detecting_sensors),
+        'active_loops': dict(model.active_loops),
+        'sensor_on_car_found': model.sensor_on_car_found,
+        'sensor_on_no_car': model.sensor_on_no_car,
+        'active_car_count': model.active_car_count,
+        'finished_cars': copy.deepcopy(model.finished_cars),
+        'finished_car_steps_int': model.finished_car_steps_int,
+        'finished_car_wait_int': model.finished_car_wait_int,
+        'intervals': copy.deepcopy(model.data.intervals),
+        'cars': cars,
+        'queues': {lane_id: np.array([index[id(car)] for car in queue], dtype=np.int32)
+                   for lane_id, queue in model.lane_queues.items() if len(queue)},
+        'collector_calls': model.datacollector.calls,
+        'collector': {name: values.copy() for name, values in model.datacollector.columns().items()}
+    }
+
+
+def merge_plans(snapshot_intervals: dict, data: OverlayLog, row: int) -> None:
+    """
+    Keeps the changed signal timings of the snapshot before a row and the timings of the new model from it on.
+    :param snapshot_intervals: The intervals of the OverlayLog of the snapshot.
+    :param data: The OverlayLog of the new model, changed in place.
+    :param row: The first row of the new timings, a row of the loaded window.
+    :return: None
+    """
+    new_intervals = data.intervals
+    data.intervals = {}
+    for col, (starts, stops, states) in snapshot_intervals.items():
+        for start, stop, state in zip(starts, stops, states):
+            data.assign(col, start, min(stop, row), state)
+    for col, (starts, stops, states) in new_intervals.items():
+        for start, stop, state in zip(starts, stops, states):
+            data.assign(col, max(start, row), stop, state)
+
+
+def restore(snapshot: dict, **changes) -> Traffic:
+    """
+    Makes a model in the state of a snapshot, it continues exactly like the model the snapshot was taken of.
+    With changes it is a fork: for example other light_* parameters change the signal timings after the snapshot,
+    or another engine or max_steps. The snapshot itself is not changed and can be restored many times.
+    :param snapshot: The snapshot from take_snapshot.
+    :param changes: The parameters of Traffic that are different in the fork.
+    :return: The model.
+    """
+    if snapshot['version'] != SNAPSHOT_VERSION:
+        raise ValueError(f'Snapshot version {snapshot["version"]} can not be restored, {SNAPSHOT_VERSION} can')
+    fixed = [name for name in changes
+             if name in FIXED_PARAMETERS and changes[name] != snapshot['parameters'].get(name)]
+    if fixed:
+        raise ValueError(f'A fork can not change {", ".join(fixed)}')
+    parameters = dict(snapshot['parameters'])
+    parameters.update(changes)
+    model = Traffic(**parameters)
+
+    model.step_count = snapshot['step_count']
+    model.data_time = snapshot['data_time']
+    model.running = snapshot['running'] and model.step_count < model.end_step
+    model.schedule.steps = snapshot['schedule_steps']
+    model.schedule.time = snapshot['schedule_time']
+    merge_plans(snapshot['intervals'], model.data, model.step_count + 1 - model.data.offset)
+    # Every column gets its state again at the next step, so the new timings are used right away.
+    model.index_transitions(model.step_count + 1)
+
+    agents = {}
+    for col, states in snapshot['signal_states'].items():
+        for agent, state in zip(model.signal_agents[col], states):
+            agent.state = state
+            agents[agent.unique_id] = agent
+    model.detecting_sensors = {unique_id: agents[unique_id] for unique_id in snapshot['detecting_sensors']}
+    model.active_loops = dict(snapshot['active_loops'])
+    model.sensor_on_car_found = snapshot['sensor_on_car_found']
+    model.sensor_on_no_car = snapshot['sensor_on_no_car']
+    model.finished_cars = copy.deepcopy(snapshot['finished_cars'])
+    model.finished_car_steps_int = snapshot['finished_car_steps_int']
+    model.finished_car_wait_int = snapshot['finished_car_wait_int']
+    model.datacollector.load(snapshot['collector'], snapshot['collector_calls'])
+    model.placed_agent_count = max(model.placed_agent_count, snapshot['placed_agent_count'])
+
+    routes = list(model.spawn_routes.values())
+    cars = []
+    columns = snapshot['cars']
+    for route_index, node_index, x, y, distance_to_next_node, speed, steps_active, wait_at_light in zip(
+            *(columns[name].tolist() for name in CAR_COLUMNS)):
+        route = routes[route_index]
+        if model.vector_engine is not None:
+            car = model.vector_engine.place(route, node_index, (x, y), distance_to_next_node, speed, steps_active,
+                                            wait_at_light)
+        else:
+            car = model.make_car(route)
+            car.node_index = node_index
+            car.current_node = route.nodes[node_index]
+            car.next_node = route.nodes[node_index + 1]
+            car.pos = car.next_pos = (x, y)
+            car.distance_to_next_node = distance_to_next_node
+            car.current_speed = speed
+            car.steps_active = steps_active
+            car.wait_at_light = wait_at_light
+            model.schedule.add(car)
+            model.placed_agent_count += 1
+        cars.append(car)
+    for lane_id, order in snapshot['queues'].items():
+        for position in order.tolist():
+            if model.vector_engine is not None:
+                model.vector_engine.join(cars[position], model.lane_queues[lane_id])
+            else:
+                model.lane_queues[lane_id].join(cars[position])
+    model.active_car_count = snapshot['active_car_count']
+    return model
+
+
+def save_snapshot(snapshot: dict, path: Path) -> Path:
+    """
+    Writes a snapshot to a file, for example to continue a long run after it was stopped.
+    :param snapshot: The snapshot from take_snapshot.
+    :param path: The path of the file.
+    :return: The path of the file.
+    """
+    path = Path(path)
+    with open(path, 'wb') as snapshot_file:
+        pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def load_snapshot(path: Path) -> dict:
+    """
+    Reads a snapshot that was written with save_snapshot.
+    :param path: The path of the file.
+    :return: The snapshot.
+    """
+    with open(path, 'rb') as snapshot_file:
+        return pickle.load(snapshot_file)
@@ -0,0 +1,157 @@
+import math
+
+
+class Accumulator:
+    """
+    A class used to represent a streaming summary of whole numbers of steps, updated in O(1) per value.
+    The sums are exact integers and the histogram keeps a count per value, so merging the accumulators
+    of parallel runs gives exactly the accumulator of all the values together.
+    Attributes:
+        count: The amount of values.
+        total: The sum of the values.
+        total_squares: The sum of the squares of the values.
+        counts: Per value how many times it was added, the histogram the quantiles are read from.
+    """
+
+    def __init__(self):
+        """
+        Constructor for the Accumulator class.
+        """
+        self.count = 0
+        self.total = 0
+        self.total_squares = 0
+        self.counts = {}
+
+    def add(self, value: int) -> None:
+        """
+        Adds one value.
+        :param value: The whole number to add.
+        :return: None
+        """
+        self.count += 1
+        self.total += value
+        self.total_squares += value * value
+        self.counts[value] = self.counts.get(value, 0) + 1
+
+    def merge(self, other) -> None:
+        """
+        Adds all the values of another accumulator.
+        :param other: The Accumulator to add.
+        :return: None
+        """
+        self.count += other.count
+        self.total += other.total
+        self.total_squares += other.total_squares
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+
+    def mean(self) -> float:
+        """
+        Calculates the mean of the values.
+        :return: The mean, 0 without values.
+        """
+        if self.count == 0:
+            return 0
+        return self.total / self.count
+
+    def variance(self) -> float:
+        """
+        Calculates the (population) variance of the values, from the exact sums.
+        :return: The variance, 0 without values.
+        """
+        if self.count == 0:
+            return 0
+        return (self.count * self.total_squares - self.total * self.total) / (self.count * self.count)
+
+    def std(self) -> float:
+        """
+        Calculates the standard deviation of the values.
+        :return: The standard deviation, 0 without values.
+        """
+        return math.sqrt(self.variance())
+
+    def quantile(self, q: float) -> int:
+        """
+        Gets the value at a quantile, the smallest value with at least that part of the values at or below it.
+        :param q: The quantile, between 0 and 1.
+        :return: The value, None without values.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= rank:
+                return value
+
+    def __eq__(self, other) -> bool:
+        """
+        Checks if two accumulators have the same values.
+        :param other: The other Accumulator.
+        :return: True if they are the same, otherwise False.
+        """
+        return isinstance(other, Accumulator) and (self.count, self.total, self.total_squares, self.counts) == \
+            (other.count, other.total, other.total_squares, other.counts)
+
+
+class CarStatistics:
+    """
+    A class used to represent the statistics of the finished cars: the steps they drove and the steps they waited.
+    Every statistic is kept for all cars, per lane the cars spawned on and per signal group of their light.
+    Attributes:
+        steps: The Accumulator of the steps of all the cars.
+        wait: The Accumulator of the steps all the cars waited at a red light.
+        lane_steps: The steps per lane id.
+        lane_wait: The steps waited per lane id.
+        group_steps: The steps per signal group.
+        group_wait: The steps waited per signal group.
+    """
+
+    def __init__(self):
+        """
+        Constructor for the CarStatistics class.
+        """
+        self.steps = Accumulator()
+        self.wait = Accumulator()
+        self.lane_steps = {}
+        self.lane_wait = {}
+        self.group_steps = {}
+        self.group_wait = {}
+
+    def add(self, lane_id: str, signal_group: str, steps: int, wait: int) -> None:
+        """
+        Adds a finished car.
+        :param lane_id: The id of the lane the car spawned on.
+        :param signal_group: The signal group of the light of the car.
+        :param steps: How many steps the car has been active.
+        :param wait: How many steps the car waited at a red light.
+        :return: None
+        """
+        self.steps.add(steps)
+        self.wait.add(wait)
+        self.lane_steps.setdefault(lane_id, Accumulator()).add(steps)
+        self.lane_wait.setdefault(lane_id, Accumulator()).add(wait)
+        self.group_steps.setdefault(signal_group, Accumulator()).add(steps)
+        self.group_wait.setdefault(signal_group, Accumulator()).add(wait)
+
+    def merge(self, other) -> None:
+        """
+        Adds all the cars of other statistics, for example of a parallel run.
+        :param other: The CarStatistics to add.
+        :return: None
+        """
+        self.steps.merge(other.steps)
+        self.wait.merge(other.wait)
+        for mine, theirs in ((self.lane_steps, other.lane_steps), (self.lane_wait, other.lane_wait),
+                             (self.group_steps, other.group_steps), (self.group_wait, other.group_wait)):
+            for key, accumulator in theirs.items():
+                mine.setdefault(key, Accumulator()).merge(accumulator)
+
+    def __eq__(self, other) -> bool:
+        """
+        Checks if two statistics have the same cars.
+        :param other: The other CarStatistics.
+        :return: True if they are the same, otherwise False.
+        """
+        return isinstance(other, CarStatistics) and vars(self) == vars(other)
@@ -0,0 +1,133 @@
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+from .activation import compile_if_needed
+from .headless import run_model
+from .intersection import load_intersection
+from .model import Traffic
+
+
+def parameter_grid(grid: dict, fixed: dict = None) -> list:
+    """
+    Makes every combination of the values of a grid of Traffic parameters.
+    :param grid: Per parameter the values to try.
+    :param fixed: The parameters that are the same for every run.
+    :return: A list with the keyword arguments of every run, the last parameter of the grid changes fastest.
+    """
+    names = list(grid)
+    points = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        parameters = dict(fixed or {})
+        parameters.update(zip(names, values))
+        points.append(parameters)
+    return points
+
+
+def prepare(intersection: str, activation_path: str = None) -> None:
+    """
+    Compiles the bundle and the activation log of an intersection once, before the workers start.
+    The workers then only map the same compiled files, the operating system shares their pages between them.
+    :param intersection: The name of the intersection.
+    :param activation_path: The activation log the runs use instead of the recorded log, if any.
+    :return: None
+    """
+    compile_if_needed(activation_path or load_intersection(intersection).activation_path)
+
+
+def run_point(point: tuple) -> dict:
+    """
+    Runs one point of a sweep, in a worker.
+    :param point: A tuple with the index of the point and the keyword arguments of Traffic.
+    :return: A row with the index, the parameters and the final metrics of the run.
+    """
+    index, parameters = point
+    row = {'index': index}
+    row.update(parameters)
+    row.update(run_model(Traffic(**parameters)))
+    return row
+
+
+def sweep(points: list, path: Path, processes: int = None, out=print) -> list:
+    """
+    Runs all the points over a pool of processes and writes every row to a csv file as soon as it is done.
+    :param points: The keyword arguments of every run.
+    :param path: The path of the csv file.
+    :param processes: The amount of worker processes, the amount of cores when None.
+    :param out: The function the progress lines are given to.
+    :return: A list with the rows, in the order of the points.
+    """
+    for intersection, activation_path in {(parameters.get('intersection', 'BOS210'),
+                                           parameters.get('activation_path')) for parameters in points}:
+        prepare(intersection, activation_path)
+    processes = min(processes or os.cpu_count() or 1, len(points)) or 1
+
+    rows = []
+    started = time.perf_counter()
+    with open(path, 'w', newline='') as csv_file, multiprocessing.Pool(processes) as pool:
+        writer = None
+        for row in pool.imap_unordered(run_point, list(enumerate(points))):
+            if writer is None:
+                writer = csv.DictWriter(csv_file, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            csv_file.flush()
+            rows.append(row)
+            out(f'{len(rows)}/{len(points)} runs done after {time.perf_counter() - started:.1f} s')
+    return sorted(rows, key=lambda row: row['index'])
+
+
+def parse_value(text: str):
+    """
+    Reads a parameter value from the command line: a whole number, true or false, or else the text itself.
+    :param text: The value as text.
+    :return: The value.
+    """
+    if text.lower() in ('true', 'false'):
+        return text.lower() == 'true'
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+def parse_parameters(texts: list) -> dict:
+    """
+    Reads parameters in the form name=value,value from the command line.
+    :param texts: The texts.
+    :return: Per parameter the list with values.
+    """
+    parameters = {}
+    for text in texts:
+        name, _, values = text.partition('=')
+        parameters[name.strip()] = [parse_value(value.strip()) for value in values.split(',')]
+    return parameters
+
+
+def main(argv: list = None) -> list:
+    """
+    Runs a sweep from the command line.
+    :param argv: The arguments, the arguments of the process when None.
+    :return: The rows of the sweep.
+    """
+    parser = argparse.ArgumentParser(description='Runs a grid of traffic simulations over a pool of processes.')
+    parser.add_argument('--grid', nargs='+', default=[], metavar='NAME=VALUES',
+                        help='A Traffic parameter with the values to try, for example light_12=0,10,20.')
+    parser.add_argument('--fixed', nargs='+', default=[], metavar='NAME=VALUE',
+                        help='A Traffic parameter that is the same for every run, for example max_steps=72000.')
+    parser.add_argument('--processes', type=int, default=None, help='The amount of workers, all cores by default.')
+    parser.add_argument('--output', type=Path, default=Path('sweep.csv'), help='The csv file the rows are written to.')
+    args = parser.parse_args(argv)
+
+    fixed = {'width': 750, 'height': 750}
+    fixed.update({name: values[0] for name, values in parse_parameters(args.fixed).items()})
+    points = parameter_grid(parse_parameters(args.grid), fixed)
+    return sweep(points, args.output, args.processes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from .activation import AMBER, DETECTED, GREEN, OFF, STATE_CODES, TIME_COLUMN, TIME_FORMAT, ActivationLog
+from .activation import is_compiled
+from .intersection import Intersection, load_intersection
+
+# The character of every state code in the raw activation log, OFF is an empty field.
+STATE_CHARACTERS = {code: character for character, code in STATE_CODES.items()}
+
+# The steps per hour, a step is a tenth of a second.
+STEPS_PER_HOUR = 36000
+
+# The most formatted rows that are kept, the cache starts over when it is full.
+CACHE_SIZE = 100000
+
+
+def conflicts(intersection: Intersection) -> dict:
+    """
+    Gets the clearance times of every pair of conflicting signal groups, in steps.
+    A pair conflicts when a clearance time is known in one of the directions, a missing direction is 0.
+    :param intersection: The intersection.
+    :return: Per pair (from group, to group) the steps between the end of the amber of from and the green of to.
+    """
+    clearance = {}
+    for from_sg, clearances in intersection.signal_groups.items():
+        for to_sg, seconds in clearances.items():
+            clearance[from_sg, to_sg] = seconds * 10
+            clearance.setdefault((to_sg, from_sg), 0)
+    return clearance
+
+
+def signal_cycle(groups: list, clearance: dict, green: int, amber: int) -> np.ndarray:
+    """
+    Makes a fixed-time signal cycle that honours the clearance times.
+    Every group gets one green and amber phase per cycle, in the order of groups, as early as its conflicts allow.
+    The cycle is long enough that the first groups can start again after the last ones cleared.
+    :param groups: The signal groups.
+    :param clearance: The clearance steps of the conflicting pairs, see conflicts.
+    :param green: The green steps of every group.
+    :param amber: The amber steps of every group.
+    :return: A cycle length x groups uint8 matrix with the states.
+    """
+    starts = {}
+    ends = {}
+    for group in groups:
+        starts[group] = max([ends[other] + clearance[other, group] for other in starts
+                             if (other, group) in clearance], default=0)
+        ends[group] = starts[group] + green + amber
+    length = max(ends.values(), default=1)
+    for index, first in enumerate(groups):
+        for later in groups[index + 1:]:
+            if (later, first) in clearance:
+                length = max(length, ends[later] + clearance[later, first] - starts[first])
+
+    cycle = np.full((length, len(groups)), OFF, dtype=np.uint8)
+    for col, group in enumerate(groups):
+        cycle[starts[group]:starts[group] + green, col] = GREEN
+        cycle[starts[group] + green:ends[group], col] = AMBER
+    return cycle
+
+
+def observed_rates(path: str, loops: list) -> dict:
+    """
+    Measures how many vehicles per hour every induction loop detects in a recorded activation log.
+    :param path: The path of the raw activation log, it is compiled first if needed.
+    :param loops: The induction loops.
+    :return: Per loop the vehicles per hour, a vehicle is the start of a detection.
+    """
+    log = ActivationLog.open(path)
+    hours = len(log) / STEPS_PER_HOUR
+    rates = {}
+    for loop in loops:
+        detected = log.column(loop) == DETECTED
+        starts = np.count_nonzero(detected[1:] & ~detected[:-1]) + int(detected[:1].sum())
+        rates[loop] = float(starts / hours) if hours else 0.0
+    return rates
+
+
+def arrival_chance(rate: float, occupancy: int) -> float:
+    """
+    Finds the chance per step that a vehicle arrives on a loop, so the loop detects vehicles at a rate.
+    A vehicle that arrives while the loop is still covered does not start a new detection,
+    so a detection starts with the chance p * (1 - p) ** occupancy, which is solved for p.
+    :param rate: The detections per hour.
+    :param occupancy: The steps a vehicle covers a loop.
+    :return: The chance, the loop detects as many vehicles as it can when the rate is higher than that.
+    """
+    target = rate / STEPS_PER_HOUR
+    low, high = 0.0, 1 / (occupancy + 1)
+    if target >= high * (1 - high) ** occupancy:
+        return high
+    for _ in range(60):
+        middle = (low + high) / 2
+        if middle * (1 - middle) ** occupancy < target:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def detections(arrivals: np.ndarray, last: np.ndarray, first_row: int, occupancy: int) -> tuple:
+    """
+    Turns the arrivals on the loops into the rows the loops detect a vehicle, a vehicle covers a loop for a while.
+    :param arrivals: A rows x loops bool matrix with the rows a vehicle arrives.
+    :param last: The last row a vehicle arrived on every loop before these rows, at most -occupancy if never.
+    :param first_row: The row of the first arrival row.
+    :param occupancy: The steps a vehicle covers a loop.
+    :return: A tuple with the bool detection matrix and the last arrival row of every loop.
+    """
+    rows = np.arange(first_row, first_row + len(arrivals))[:, None]
+    latest = np.maximum.accumulate(np.where(arrivals, rows, last[None, :]), axis=0)
+    return rows - latest < occupancy, latest[-1]
+
+
+def format_rows(states: np.ndarray, start: datetime, first_row: int, cache: dict) -> list:
+    """
+    Formats rows of states as lines of the raw activation log, the time first.
+    :param states: A rows x columns uint8 matrix with the states.
+    :param start: The time of the first row of the log.
+    :param first_row: The row of the first row of states.
+    :param cache: The formatted states by their bytes, the same states are only joined once.
+    :return: The lines.
+    """
+    lines = []
+    second = None
+    prefix = ''
+    for row, values in enumerate(states, first_row):
+        key = values.tobytes()
+        fields = cache.get(key)
+        if fields is None:
+            if len(cache) >= CACHE_SIZE:
+                cache.clear()
+            fields = ';'.join(STATE_CHARACTERS.get(state, '') for state in values.tolist())
+            cache[key] = fields
+        # The time only changes its seconds every 10 rows, the tenths are added to it.
+        if row // 10 != second:
+            second = row // 10
+            prefix = f'{start + timedelta(seconds=second):%d-%m-%Y %H:%M:%S}.'
+        lines.append(f'{prefix}{row % 10};{fields}\n')
+    return lines
+
+
+def generate_log(path: Path, intersection: Intersection, steps: int, rates: dict, scale: float = 1.0,
+                 green_seconds: int = 20, amber_seconds: int = 3, occupancy: int = 8,
+                 start: datetime = datetime(2020, 11, 2), seed: int = 0, chunk_size: int = 36000) -> Path:
+    """
+    Writes a synthetic activation log for an intersection, in the format of the recorded logs.
+    The lights follow a fixed-time cycle that honours the clearance times, the induction loops detect
+    vehicles that arrive at random (a Poisson process) with a rate per loop.
+    The log is written in chunks of rows, so logs of days or weeks are never in memory.
+    :param path: The path of the raw activation log to write.
+    :param intersection: The intersection, its signal groups, the lights of its lanes and its sensors are the columns.
+    :param steps: The amount of rows, 10 per second.
+    :param rates: Per induction loop the detected vehicles per hour, the loops that are missing detect nothing.
+    :param scale: The factor every rate is multiplied with, for example 5 for five times the demand.
+    :param green_seconds: The green time of every signal group.
+    :param amber_seconds: The amber time of every signal group.
+    :param occupancy: The steps a vehicle covers a loop.
+    :param start: The time of the first row, at a whole second.
+    :param seed: The seed of the random arrivals, the same seed gives the same log.
+    :param chunk_size: The amount of rows that is made and written at once.
+    :return: The path of the log.
+    """
+    bundle = intersection.bundle
+    # The lights of the lanes are columns as well when the signal group relations do not mention them.
+    lights = bundle['lane_signal_group'][bundle['lane_stop_line']].tolist()
+    groups = sorted(set(bundle['signal_groups'].tolist()) | set(lights))
+    loops = bundle['sensor_names'].tolist()
+    cycle = signal_cycle(groups, conflicts(intersection), green_seconds * 10, amber_seconds * 10)
+    chance = np.array([arrival_chance(rates.get(loop, 0.0) * scale, occupancy) for loop in loops])
+    random = np.random.default_rng(seed)
+    last = np.full(len(loops), -occupancy, dtype=np.int64)
+    cache = {}
+
+    path = Path(path)
+    with open(path, 'w', newline='') as log_file:
+        log_file.write(';'.join([TIME_COLUMN] + groups + loops) + '\n')
+        for first in range(0, steps, chunk_size):
+            rows = min(chunk_size, steps - first)
+            states = np.empty((rows, len(groups) + len(loops)), dtype=np.uint8)
+            states[:, :len(groups)] = cycle[np.arange(first, first + rows) % len(cycle)]
+            detected, last = detections(random.random((rows, len(loops))) < chance, last, first, occupancy)
+            states[:, len(groups):] = np.where(detected, DETECTED, OFF)
+            log_file.writelines(format_rows(states, start, first, cache))
+    return path
+
+
+def main(argv: list = None) -> Path:
+    """
+    Writes a synthetic activation log from the command line.
+    :param argv: The arguments, the arguments of the process when None.
+    :return: The path of the log.
+    """
+    parser = argparse.ArgumentParser(description='Writes a synthetic activation log for an intersection.')
+    parser.add_argument('--intersection', default='BOS210', help='The name of the intersection.')
+    parser.add_argument('--hours', type=float, default=24, help='The duration of the log, 168 is a week.')
+    parser.add_argument('--rates-from', default=None,
+                        help='The recorded log the rates of the loops are measured in, the log of the intersection '
+                             'by default.')
+    parser.add_argument('--default-rate', type=float, default=120,
+                        help='The vehicles per hour of every loop when the intersection has no recorded log.')
+    parser.add_argument('--rate', nargs='+', default=[], metavar='LOOP=VEHICLES',
+                        help='The vehicles per hour of a loop, instead of the measured rate, for example 044=300.')
+    parser.add_argument('--scale', type=float, default=1.0, help='The factor every rate is multiplied with.')
+    parser.add_argument('--green', type=int, default=20, help='The green seconds of every signal group.')
+    parser.add_argument('--amber', type=int, default=3, help='The amber seconds of every signal group.')
+    parser.add_argument('--occupancy', type=int, default=8, help='The steps a vehicle covers a loop.')
+    parser.add_argument('--start', default='02-11-2020 00:00:00.0', help='The time of the first row.')
+    parser.add_argument('--seed', type=int, default=0, help='The seed of the random arrivals.')
+    parser.add_argument('--output', type=Path, required=True, help='The csv file the log is written to.')
+    args = parser.parse_args(argv)
+
+    intersection = load_intersection(args.intersection)
+    loops = intersection.bundle['sensor_names'].tolist()
+    recorded = args.rates_from or intersection.activation_path
+    if Path(recorded).exists() or is_compiled(str(recorded)):
+        rates = observed_rates(recorded, loops)
+    else:
+        rates = {loop: args.default_rate for loop in loops}
+    for text in args.rate:
+        loop, _, rate = text.partition('=')
+        rates[loop.strip()] = float(rate)
+    path = generate_log(args.output, intersection, int(args.hours * STEPS_PER_HOUR), rates, args.scale, args.green,
+                        args.amber, args.occupancy, datetime.strptime(args.start, TIME_FORMAT), args.seed)
+    print(f'Wrote {int(args.hours * STEPS_PER_HOUR)} rows to {path}')
+    return path
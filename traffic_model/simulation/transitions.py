@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def column_transitions(values: np.ndarray) -> tuple:
+    """
+    Finds where the state of a column changes, with the first row as the first change.
+    :param values: The states of the column.
+    :return: A tuple with the rows of the changes and the new states.
+    """
+    rows = np.flatnonzero(values[1:] != values[:-1]) + 1
+    if len(values):
+        rows = np.concatenate(([0], rows))
+    return rows, values[rows]
+
+
+class TransitionIndex:
+    """
+    A class used to represent the state changes of the light and sensor columns, from a start step onwards.
+    Attributes:
+        column_transitions: Per column the steps where its state changes and the new states.
+        steps: The steps of all the changes, sorted.
+        changes: The column and new state of every change, in the order of steps.
+        cursor: The index of the first change that has not been popped yet.
+    """
+
+    def __init__(self, data, columns: list, start: int):
+        """
+        Constructor for the TransitionIndex class.
+        The first change of every column is its state at the start step.
+        :param data: The OverlayLog with the (changed) activation data.
+        :param columns: The columns to index.
+        :param start: The step to start at.
+        """
+        self.column_transitions = {}
+        for col in columns:
+            rows, states = column_transitions(data.column(col, start - data.offset))
+            self.column_transitions[col] = (rows + start, states)
+
+        steps = np.concatenate([steps for steps, _ in self.column_transitions.values()] + [[]])
+        cols = np.concatenate([[col] * len(steps) for col, (steps, _) in self.column_transitions.items()] + [[]])
+        states = np.concatenate([states for _, states in self.column_transitions.values()] + [[]])
+        order = np.argsort(steps, kind='stable')
+        self.steps = steps[order].astype(np.int64).tolist()
+        self.changes = list(zip(cols[order].tolist(), states[order].astype(np.uint8).tolist()))
+        self.cursor = 0
+
+    def pop(self, step: int) -> list:
+        """
+        Gets all the changes up to and including a step that have not been popped yet.
+        :param step: The current step.
+        :return: A list with the column and new state of every change.
+        """
+        start = self.cursor
+        while self.cursor < len(self.steps) and self.steps[self.cursor] <= step:
+            self.cursor += 1
+        return self.changes[start:self.cursor]